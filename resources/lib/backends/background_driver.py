@@ -17,6 +17,7 @@ import xbmcvfs
 from backends.settings.service_types import ServiceID, ServiceKey, TTS_Type
 from backends.settings.setting_properties import SettingProp
 from cache.cache_file_state import CacheFileState
+from cache.generation_scheduler import GenerationPriority, GenerationScheduler
 from common import *
 
 from backends.base import SimpleTTSBackend
@@ -202,6 +203,7 @@ class BackgroundDriver(BaseServices):
         try:
             if MY_LOGGER.isEnabledFor(DEBUG_V):
                 MY_LOGGER.debug_v('In create_voice_files')
+            GenerationScheduler.set_priority(GenerationPriority.BULK)
             while not cls._stop:
                 cls.voice_next()
         except StopIteration:
@@ -218,6 +220,7 @@ class BackgroundDriver(BaseServices):
         voiced_file: Path | None = None
         while not finished:
             cls._delay.delay()
+            GenerationScheduler.pause_point(GenerationPriority.BULK)
             text_file: Path = cls._work_list.get_next()
             MY_LOGGER.debug(f'text_file: {text_file}')
             if text_file is None:
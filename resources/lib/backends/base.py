@@ -90,6 +90,7 @@ class EngineQueue:
         if cls._instance is None:
             cls._instance = EngineQueue()
             cls._instance.active_queue = True
+            Monitor.register_abort_queue(cls._instance.tts_queue, name='EngnQueAbrt')
         if cls._instance.queue_processor is None:
             cls._instance.queue_processor = threading.Thread(
                     target=cls._instance._handleQueue, name=f'EngnQue')
@@ -108,10 +109,11 @@ class EngineQueue:
         #  if MY_LOGGER.isEnabledFor(DEBUG):
         #      MY_LOGGER.debug(f'Threaded EngineQueue started')
         try:
-            while self.active_queue and not Monitor.wait_for_abort(timeout=0.02):
+            while self.active_queue:
                 item: EngineQueue.QueueItem | None = None
                 try:
-                    item = self.tts_queue.get(timeout=0.0)
+                    # Sleeps until there is something to voice, or abort
+                    item = Monitor.get_or_abort(self.tts_queue)
                     if MY_LOGGER.isEnabledFor(DEBUG):
                         MY_LOGGER.debug(f'Queue item phrase: {item.phrase}')
                     self.tts_queue.task_done()  # TODO: Change this to use phrase delays
@@ -159,9 +161,9 @@ class EngineQueue:
         # MY_LOGGER.debug(f'empty_queue')
         try:
             while True:
-                cls._instance.tts_queue.get_nowait()
+                Monitor.get_or_abort(cls._instance.tts_queue, block=False)
                 cls._instance.tts_queue.task_done()
-        except queue.Empty:
+        except (queue.Empty, AbortException):
             return
 
     @classmethod
@@ -28,6 +28,7 @@ from backends.settings.service_types import ServiceID, Services
 from backends.settings.settings_map import SettingsMap
 from cache.voicecache import VoiceCache
 from cache.common_types import CacheEntryInfo
+from cache.generation_scheduler import GenerationScheduler
 from common.base_services import BaseServices
 from common.exceptions import ExpiredException
 from common.logger import *
@@ -81,6 +82,7 @@ class Driver(BaseServices):
 
         clz = type(self)
         Monitor.exception_on_abort(0.05)
+        GenerationScheduler.note_interactive()
         active_engine: BaseEngineService | None = None
         try:
             result: Result | None = None
@@ -0,0 +1,367 @@
+# coding=utf-8
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import io
+import itertools
+import queue
+import threading
+import time
+import wave
+from concurrent.futures import Future, wait
+
+from cache.generation_scheduler import GenerationPriority, GenerationScheduler
+from common import *
+from common.constants import Constants
+from common.logger import *
+from common.monitor import Monitor
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+# int SynthCallback(short *wav, int numsamples, espeak_EVENT *events)
+SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short),
+                                  ctypes.c_int, ctypes.c_void_p)
+
+
+class ESpeakRequest:
+    """
+    One text to be voiced by the ESpeakSynthesizer, with the voice settings
+    to use.
+    """
+
+    def __init__(self, text: str, voice: str | None, rate: int, pitch: int,
+                 volume: int) -> None:
+        self.text: str = text
+        self.voice: str | None = voice
+        self.rate: int = rate
+        self.pitch: int = pitch
+        self.volume: int = volume
+        self.future: Future = Future()
+
+
+class ESpeakSynthesizer:
+    """
+    Long-lived eSpeak-ng synthesizer. Avoids starting an espeak-ng process,
+    and loading its voice data, for every phrase.
+
+    libespeak-ng is loaded once through ctypes and stays initialized. The
+    library is not thread-safe, so every request is voiced by a single worker
+    thread, which takes requests from a queue in GenerationScheduler priority
+    order and returns each as the bytes of a .wav file.
+
+    If the library can not be loaded, is_available returns False and callers
+    continue to run the espeak-ng command for each phrase. If synthesis
+    fails, the library is terminated and initialized again before the next
+    request. If the worker thread dies, the next request starts another. If
+    a call into the library does not return within
+    ESPEAK_SYNTH_TIMEOUT_SECONDS, the library is not used again: the worker
+    can not be stopped, and is_available returns False so that callers run
+    espeak-ng without waiting on it.
+    """
+    # From speak_lib.h
+    AUDIO_OUTPUT_SYNCHRONOUS: Final[int] = 2
+    POS_CHARACTER: Final[int] = 1
+    ESPEAK_CHARS_UTF8: Final[int] = 1
+    ESPEAK_ENDPAUSE: Final[int] = 0x1000
+    ESPEAK_RATE: Final[int] = 1
+    ESPEAK_VOLUME: Final[int] = 2
+    ESPEAK_PITCH: Final[int] = 3
+    EE_OK: Final[int] = 0
+    DEFAULT_RATE: Final[int] = 175
+    DEFAULT_PITCH: Final[int] = 50
+
+    _lock: threading.RLock = threading.RLock()
+    _lib: ctypes.CDLL | None = None
+    _load_failed: bool = False
+    _initialized: bool = False
+    _sample_rate: int = 0
+    _voice: str | None = None
+    # Keep a reference so that the callback is not garbage collected
+    _callback: SYNTH_CALLBACK | None = None
+    _samples: bytearray = bytearray()
+    # Entries are (priority, serial, request). A None request stops the worker
+    _requests: queue.PriorityQueue = queue.PriorityQueue()
+    _serial: itertools.count = itertools.count()
+    _worker: threading.Thread | None = None
+    # time.monotonic() at which the worker began voicing its current request
+    _busy_since: float | None = None
+    # True once a call into the library has not returned in time
+    _hung: bool = False
+    requests: int = 0
+    failures: int = 0
+    restarts: int = 0
+    timeouts: int = 0
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """
+        :return: True if libespeak-ng is loaded and has not stopped
+                 responding
+        """
+        with cls._lock:
+            if cls._lib is None and not cls._load_failed:
+                cls._load_library()
+            return cls._lib is not None and not cls._hung
+
+    @classmethod
+    def synthesize(cls, text: str, voice: str | None, rate: int, pitch: int,
+                   volume: int) -> bytes | None:
+        """
+        Voices text. Waits for the result.
+
+        :param text: Text to voice
+        :param voice: eSpeak voice name or identifier (as for espeak-ng -v).
+                      None for eSpeak's default voice
+        :param rate: Words per minute (as for espeak-ng -s). 0 for default
+        :param pitch: 0 - 99 (as for espeak-ng -p). 0 for default
+        :param volume: Amplitude 0 - 200 (as for espeak-ng -a)
+        :return: The contents of a .wav file, or None if voicing failed or
+                 took longer than ESPEAK_SYNTH_TIMEOUT_SECONDS
+        :raises AbortException:
+        """
+        if not cls.is_available():
+            return None
+        request: ESpeakRequest = ESpeakRequest(text, voice, rate, pitch, volume)
+        priority: GenerationPriority = GenerationScheduler.get_priority()
+        cls._ensure_worker()
+        cls._requests.put((priority, next(cls._serial), request))
+        waited: float = 0.0
+        while not request.future.done():
+            wait([request.future], timeout=0.1)
+            Monitor.exception_on_abort()
+            waited += 0.1
+            if cls._hung:
+                request.future.cancel()
+                return None
+            if waited > Constants.ESPEAK_SYNTH_TIMEOUT_SECONDS:
+                request.future.cancel()
+                MY_LOGGER.info(f'Timed out voicing: {text}')
+                cls._check_hung()
+                return None
+        if request.future.cancelled() or request.future.exception() is not None:
+            return None  # Failure already logged by worker
+        return request.future.result()
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int]:
+        return {'requests': cls.requests,
+                'failures': cls.failures,
+                'restarts': cls.restarts,
+                'timeouts': cls.timeouts,
+                'hung': int(cls._hung),
+                'queued': cls._requests.qsize()}
+
+    @classmethod
+    def _check_hung(cls) -> None:
+        """
+        Called when a request times out. If the worker has been voicing one
+        request for longer than ESPEAK_SYNTH_TIMEOUT_SECONDS, it is stuck in
+        the library. Stop using the library, so that no one else waits on it.
+        """
+        with cls._lock:
+            cls.timeouts += 1
+            busy_since: float | None = cls._busy_since
+            if (cls._hung or busy_since is None or
+                    time.monotonic() - busy_since
+                    < Constants.ESPEAK_SYNTH_TIMEOUT_SECONDS):
+                return
+            cls._hung = True
+        MY_LOGGER.error('libespeak-ng stopped responding. Running espeak-ng '
+                        'for each phrase')
+
+    @classmethod
+    def _load_library(cls) -> None:
+        """
+        Loads libespeak-ng and declares the functions used. Must be called
+        with the lock held.
+        """
+        names: List[str] = []
+        if Constants.PLATFORM_WINDOWS:
+            if Constants.ESPEAK_PATH is not None:
+                names.append(str(Constants.ESPEAK_PATH / 'libespeak-ng.dll'))
+            names.append('libespeak-ng.dll')
+        else:
+            found: str | None = ctypes.util.find_library('espeak-ng')
+            if found is not None:
+                names.append(found)
+            names.append('libespeak-ng.so.1')
+        for name in names:
+            try:
+                lib: ctypes.CDLL = ctypes.CDLL(name)
+                lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int,
+                                                  ctypes.c_char_p, ctypes.c_int]
+                lib.espeak_Initialize.restype = ctypes.c_int
+                lib.espeak_SetSynthCallback.argtypes = [SYNTH_CALLBACK]
+                lib.espeak_SetSynthCallback.restype = None
+                lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+                lib.espeak_SetVoiceByName.restype = ctypes.c_int
+                lib.espeak_SetParameter.argtypes = [ctypes.c_int, ctypes.c_int,
+                                                    ctypes.c_int]
+                lib.espeak_SetParameter.restype = ctypes.c_int
+                lib.espeak_Synth.argtypes = [ctypes.c_char_p, ctypes.c_size_t,
+                                             ctypes.c_uint, ctypes.c_int,
+                                             ctypes.c_uint, ctypes.c_uint,
+                                             ctypes.POINTER(ctypes.c_uint),
+                                             ctypes.c_void_p]
+                lib.espeak_Synth.restype = ctypes.c_int
+                lib.espeak_Synchronize.argtypes = []
+                lib.espeak_Synchronize.restype = ctypes.c_int
+                lib.espeak_Terminate.argtypes = []
+                lib.espeak_Terminate.restype = ctypes.c_int
+                cls._lib = lib
+                if MY_LOGGER.isEnabledFor(DEBUG):
+                    MY_LOGGER.debug(f'Loaded {name}')
+                return
+            except (OSError, AttributeError):
+                if MY_LOGGER.isEnabledFor(DEBUG_V):
+                    MY_LOGGER.debug_v(f'Can not load {name}')
+        cls._load_failed = True
+        MY_LOGGER.info('libespeak-ng not found. Running espeak-ng for each phrase')
+
+    @classmethod
+    def _initialize(cls) -> bool:
+        """
+        Initializes the library, if needed. Only called from the worker thread.
+        """
+        if cls._initialized:
+            return True
+        path: bytes | None = None
+        if Constants.ESPEAK_DATA_PATH is not None:
+            path = str(Constants.ESPEAK_DATA_PATH).encode('utf-8')
+        sample_rate: int = cls._lib.espeak_Initialize(cls.AUDIO_OUTPUT_SYNCHRONOUS,
+                                                      0, path, 0)
+        if sample_rate <= 0:
+            MY_LOGGER.error(f'espeak_Initialize failed: {sample_rate}')
+            return False
+        cls._callback = SYNTH_CALLBACK(cls._synth_callback)
+        cls._lib.espeak_SetSynthCallback(cls._callback)
+        cls._sample_rate = sample_rate
+        cls._voice = None
+        cls._initialized = True
+        return True
+
+    @classmethod
+    def _terminate(cls) -> None:
+        """
+        Only called from the worker thread.
+        """
+        if not cls._initialized:
+            return
+        cls._initialized = False
+        try:
+            cls._lib.espeak_Terminate()
+        except Exception:
+            MY_LOGGER.exception('')
+
+    @classmethod
+    def _ensure_worker(cls) -> None:
+        with cls._lock:
+            if cls._worker is not None and cls._worker.is_alive():
+                return
+            if cls._worker is None:
+                Monitor.register_abort_listener(cls._wake_on_abort,
+                                                name='espkSynthAbrt')
+            else:
+                cls.restarts += 1
+                MY_LOGGER.info(f'Restarting eSpeak worker. restarts: '
+                               f'{cls.restarts}')
+            # Daemon, since a worker stuck in the library can not be stopped
+            cls._worker = threading.Thread(target=cls._run_worker,
+                                           name='espkSynth', daemon=True)
+            cls._worker.start()
+            from common.garbage_collector import GarbageCollector
+            GarbageCollector.add_thread(cls._worker)
+
+    @classmethod
+    def _wake_on_abort(cls) -> None:
+        cls._requests.put((-1, -1, None))
+
+    @classmethod
+    def _run_worker(cls) -> None:
+        try:
+            while True:
+                Monitor.exception_on_abort()
+                request: ESpeakRequest | None
+                try:
+                    _, _, request = cls._requests.get(
+                            timeout=Monitor.QUEUE_ABORT_CHECK_SECONDS)
+                except queue.Empty:
+                    continue
+                if request is None:
+                    break
+                if not request.future.set_running_or_notify_cancel():
+                    continue  # Caller gave up
+                cls.requests += 1
+                cls._busy_since = time.monotonic()
+                try:
+                    request.future.set_result(cls._synth(request))
+                except Exception as e:
+                    MY_LOGGER.exception(f'text: {request.text}')
+                    cls.failures += 1
+                    cls._terminate()  # Start fresh on next request
+                    request.future.set_exception(e)
+                finally:
+                    cls._busy_since = None
+        except AbortException:
+            pass
+        except Exception:
+            MY_LOGGER.exception('')
+        finally:
+            cls._terminate()
+
+    @classmethod
+    def _synth(cls, request: ESpeakRequest) -> bytes:
+        """
+        Voices one request. Only called from the worker thread.
+
+        :return: Contents of a .wav file
+        :raises RuntimeError: if eSpeak reports an error
+        """
+        if not cls._initialize():
+            raise RuntimeError('Can not initialize libespeak-ng')
+        lib: ctypes.CDLL = cls._lib
+        if request.voice != cls._voice:
+            if request.voice is not None:
+                rc: int = lib.espeak_SetVoiceByName(request.voice.encode('utf-8'))
+                if rc != cls.EE_OK:
+                    raise RuntimeError(f'Can not set voice {request.voice}: {rc}')
+            cls._voice = request.voice
+        lib.espeak_SetParameter(cls.ESPEAK_RATE,
+                                request.rate or cls.DEFAULT_RATE, 0)
+        lib.espeak_SetParameter(cls.ESPEAK_PITCH,
+                                request.pitch or cls.DEFAULT_PITCH, 0)
+        lib.espeak_SetParameter(cls.ESPEAK_VOLUME, request.volume, 0)
+        text: bytes = request.text.encode('utf-8') + b'\0'
+        cls._samples = bytearray()
+        rc: int = lib.espeak_Synth(text, len(text), 0, cls.POS_CHARACTER, 0,
+                                   cls.ESPEAK_CHARS_UTF8 | cls.ESPEAK_ENDPAUSE,
+                                   None, None)
+        if rc != cls.EE_OK:
+            raise RuntimeError(f'espeak_Synth failed: {rc}')
+        lib.espeak_Synchronize()
+        samples: bytes = bytes(cls._samples)
+        cls._samples = bytearray()
+        return cls._to_wave(samples, cls._sample_rate)
+
+    @classmethod
+    def _synth_callback(cls, wav, numsamples: int, events) -> int:
+        """
+        Called by libespeak-ng, on the worker thread, with each block of
+        16-bit mono samples. wav is NULL when synthesis is complete.
+
+        :return: 0 to continue synthesis
+        """
+        if wav and numsamples > 0:
+            cls._samples.extend(ctypes.string_at(wav, numsamples * 2))
+        return 0
+
+    @staticmethod
+    def _to_wave(samples: bytes, sample_rate: int) -> bytes:
+        data: io.BytesIO = io.BytesIO()
+        with wave.open(data, 'wb') as wave_file:
+            wave_file.setnchannels(1)
+            wave_file.setsampwidth(2)
+            wave_file.setframerate(sample_rate)
+            wave_file.writeframes(samples)
+        return data.getvalue()
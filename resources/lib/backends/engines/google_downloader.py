@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import io
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Tuple
 
+import requests
+
 from backends.google_data import GoogleData
-from common.constants import ReturnCode
+from common import *
+from common.constants import Constants, ReturnCode
 from common.exceptions import DownloaderBusyException
 from common.logger import *
 from gtts import gTTS, gTTSError
 
 from backends.engines.idownloader import IDownloader, TTSDownloadError
+from common.monitor import Monitor
 from common.phrases import Phrase
 
 MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
@@ -58,6 +64,63 @@ class Results:
         self.phrase = phrase
 
 
+class DownloadPool:
+    """
+    Resources shared by every download from Google: one requests.Session,
+    whose connection pool keeps connections alive between downloads (avoiding
+    a TCP and TLS handshake for every chunk), and a bounded pool of threads
+    so that the chunks of a long phrase can be downloaded concurrently.
+    """
+    _lock: threading.RLock = threading.RLock()
+    _session: requests.Session | None = None
+    _executor: ThreadPoolExecutor | None = None
+    # When not None, requests are sent to this URL instead of to Google.
+    # Allows downloads to be exercised against a local stub server.
+    translate_url: str | None = None
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        with cls._lock:
+            if cls._session is None:
+                session: requests.Session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                        pool_connections=Constants.GOOGLE_DOWNLOAD_WORKERS,
+                        pool_maxsize=Constants.GOOGLE_DOWNLOAD_WORKERS)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                cls._session = session
+            return cls._session
+
+    @classmethod
+    def submit(cls, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Runs fn in one of the download threads.
+
+        :return: Future for the result of fn
+        """
+        with cls._lock:
+            if cls._executor is None:
+                Monitor.register_abort_listener(cls.shutdown, name='dwnldPool')
+                cls._executor = ThreadPoolExecutor(
+                        max_workers=Constants.GOOGLE_DOWNLOAD_WORKERS,
+                        thread_name_prefix='dwnldChnk')
+            return cls._executor.submit(fn, *args, **kwargs)
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Called on abort. Queued downloads which have not yet started are
+        abandoned. Running ones die at their next abort check.
+        """
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False, cancel_futures=True)
+                cls._executor = None
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+
+
 class MyGTTS(IDownloader):
 
     # Prevent two simultaneous downloads from occurring: both to reduce cpu and
@@ -124,7 +187,10 @@ class MyGTTS(IDownloader):
                                lang=lang_code,
                                slow=False,
                                lang_check=lang_check,
-                               tld=tld
+                               tld=tld,
+                               timeout=Constants.GOOGLE_DOWNLOAD_TIMEOUT_SECONDS,
+                               session=DownloadPool.get_session(),
+                               translate_url=DownloadPool.translate_url
                                #  pre_processor_funcs=[
                                #     pre_processors.tone_marks,
                                #     pre_processors.end_of_line,
@@ -152,3 +218,14 @@ class MyGTTS(IDownloader):
         except gTTSError as e:
             raise TTSDownloadError() from e
         self.gtts = None
+
+    def download(self) -> bytes:
+        """
+        Downloads the configured phrase.
+
+        :return: The voiced text
+        :raises TTSDownloadError: when the download fails
+        """
+        data: io.BytesIO = io.BytesIO()
+        self.write_to_fp(data)
+        return data.getvalue()
@@ -2,15 +2,16 @@
 from __future__ import annotations
 
 import sys
-import threading
+from concurrent.futures import Future, wait
 from pathlib import Path
 
 import xbmc
 
-from backends.engines.google_downloader import MyGTTS
+from backends.engines.google_downloader import DownloadPool, MyGTTS
 from backends.engines.idownloader import IDownloader, TTSDownloadError
 from backends.ispeech_generator import ISpeechGenerator
 from cache.common_types import CacheEntryInfo
+from cache.generation_scheduler import GenerationPriority, GenerationScheduler
 from common.exceptions import AbortException, ExpiredException
 from common.settings import Settings
 from six import reraise
@@ -18,8 +19,10 @@ from six import reraise
 import langcodes
 from backends.base import SimpleTTSBackend
 from backends.settings.service_types import ServiceID
+from cache.cache_entry import CacheEntryMgr
 from cache.cache_file_state import CacheFileState
 from cache.voicecache import VoiceCache
+from common import *
 from common.constants import ReturnCode
 from common.kodi_player_monitor import KodiPlayerMonitor
 from common.logger import *
@@ -78,8 +81,6 @@ class Results:
 
 class SpeechGenerator(ISpeechGenerator):
 
-    exclusive_lock: threading.RLock = threading.RLock()
-
     def __init__(self, engine_instance: SimpleTTSBackend,
                  downloader: IDownloader,
                  max_phrase_length: int = 0,
@@ -154,9 +155,14 @@ class SpeechGenerator(ISpeechGenerator):
         phrase.set_cache_file_state(CacheFileState.CREATION_INCOMPLETE)
         if MY_LOGGER.isEnabledFor(DEBUG):
             MY_LOGGER.debug(f'runInThread _generate_speech')
+        # A thread of its own, not a WorkerPools worker: background generation
+        # can wait a long time in the GenerationScheduler, and must not leave
+        # interactive generation queued behind it for a worker.
         runInThread(self._remote_generate_speech, name='dwnldGen', delay=0.0,
                     phrase_chunks=unchecked_phrase_chunks, original_phrase=phrase,
-                    timeout=timeout, gender=phrase.gender)
+                    timeout=timeout, gender=phrase.gender,
+                    priority=GenerationScheduler.get_priority(),
+                    is_stale=GenerationScheduler.get_stale_check())
 
         max_wait: int = int(timeout / 0.1)
         while max_wait > 0:
@@ -191,6 +197,9 @@ class SpeechGenerator(ISpeechGenerator):
         # Concatenate returned binary voice files together and return
         clz = type(self)
         self.set_rc(ReturnCode.OK)
+        priority: GenerationPriority = kwargs.get('priority',
+                                                  GenerationPriority.INTERACTIVE)
+        is_stale: Callable[[], bool] | None = kwargs.get('is_stale', None)
         text_file_path: Path | None = None
         phrase_chunks: PhraseList | None = None
         original_phrase: Phrase | None = None
@@ -252,8 +261,16 @@ class SpeechGenerator(ISpeechGenerator):
 
         cache_path: Path | None = None
         tmp_path: Path | None = None
+        owner: bool = False
         try:
             cache_path = original_phrase.get_cache_path(check_expired=False)
+            in_flight: Future
+            owner, in_flight = CacheEntryMgr.start_work(cache_path, priority)
+            if not owner:
+                # Another thread is already voicing the same text
+                self._share_results(original_phrase, in_flight)
+                return
+
             rc2: int
             rc2, tmp_path, _ = self.voice_cache.create_tmp_sound_file(cache_path,
                                                                       create_dir_only=True)
@@ -267,69 +284,76 @@ class SpeechGenerator(ISpeechGenerator):
                 self.set_finished()
                 return
 
-            with clz.exclusive_lock:
+            with CacheEntryMgr.generation_slot(cache_path, priority,
+                                               is_stale=is_stale):
                 if cache_path.exists():
                     if MY_LOGGER.isEnabledFor(DEBUG):
                         MY_LOGGER.debug(f'PATH EXISTS: {cache_path}')
                     return
-                with open(tmp_path, mode='w+b', buffering=-1) as sound_file:
-                    # each 'phrase' is a chunk from one, longer phrase. The chunks
-                    # are small enough for gTTS to handle. We append the results
-                    # from the phrase_chunks to the same file.
+                # Each 'phrase' is a chunk from one, longer phrase. The chunks
+                # are small enough for gTTS to handle. They are downloaded
+                # concurrently, but appended to the file in order.
+                # Background work yields to interactive work before handing
+                # each chunk to the DownloadPool. The pause happens here, never
+                # in the DownloadPool threads, which interactive work shares.
+                futures: List[Future] = []
+                try:
                     for phrase_chunk in phrase_chunks:
-                        phrase_chunk: Phrase
-                        try:
-                            Monitor.exception_on_abort()
-                            if MY_LOGGER.isEnabledFor(DEBUG):
-                                MY_LOGGER.debug(f'phrase: '
-                                                f'{phrase_chunk.get_text()}')
-
-                            my_gtts: MyGTTS = MyGTTS()
-                            my_gtts.config(phrase_chunk, lang_code=lang_code,
-                                           country_code=country_code, tld=tld)
-                            if MY_LOGGER.isEnabledFor(DEBUG):
-                                MY_LOGGER.debug(f'GTTS lang: {lang_code}')
-                            phrase_chunk.add_event('my_gtts')
-                            # gtts.save(phrase.get_cache_path())
-                            #     gTTSError – When there’s an error with the API request.
-                            # gtts.stream() # Streams bytes
-                            my_gtts.write_to_fp(sound_file)
-                            if MY_LOGGER.isEnabledFor(DEBUG):
-                                MY_LOGGER.debug(f'Wrote cache_file fragment to: '
-                                                f'{tmp_path}')
-                        except AbortException:
-                            self.set_rc(ReturnCode.ABORT)
-                            self.set_finished()
-                            reraise(*sys.exc_info())
-                        except (TypeError, ExpiredException) as e:
-                            MY_LOGGER.exception('')
-                            self.set_rc(ReturnCode.DOWNLOAD)
-                            original_phrase.add_event('expired')
-                            self.set_finished()
-                        except TTSDownloadError as e:
-                            MY_LOGGER.info(f'{TTSDownloadError:} {e.msg}')
-                            MY_LOGGER.exception(f'TTSDownloadError')
-                            self.set_rc(ReturnCode.DOWNLOAD)
-                            original_phrase.add_event('download error')
-                            self.set_finished()
-                        except IOError as e:
-                            MY_LOGGER.exception(f'Error processing phrase: '
-                                                f'{phrase_chunk.get_text()}')
-                            MY_LOGGER.error(f'Error writing to temp file:'
-                                            f' {tmp_path}')
-                            original_phrase.add_event('error writing temp')
-                            original_phrase.set_cache_file_state(CacheFileState.BAD)
-                            self.set_rc(ReturnCode.DOWNLOAD)
-                            self.set_finished()
-                        except Exception as e:
-                            MY_LOGGER.exception('')
-                            original_phrase.add_event('download failed')
-                            self.set_rc(ReturnCode.DOWNLOAD)
-                            self.set_finished()
+                        GenerationScheduler.pause_point(priority,
+                                                        key=str(cache_path))
+                        futures.append(DownloadPool.submit(self._download_chunk,
+                                                           phrase_chunk,
+                                                           lang_code=lang_code,
+                                                           country_code=country_code,
+                                                           tld=tld))
+                    with open(tmp_path, mode='w+b', buffering=-1) as sound_file:
+                        for phrase_chunk, future in zip(phrase_chunks, futures):
+                            phrase_chunk: Phrase
+                            future: Future
+                            try:
+                                sound_file.write(self._wait_for_chunk(future))
+                                if MY_LOGGER.isEnabledFor(DEBUG):
+                                    MY_LOGGER.debug(f'Wrote cache_file fragment to: '
+                                                    f'{tmp_path}')
+                            except AbortException:
+                                self.set_rc(ReturnCode.ABORT)
+                                self.set_finished()
+                                reraise(*sys.exc_info())
+                            except (TypeError, ExpiredException) as e:
+                                MY_LOGGER.exception('')
+                                self.set_rc(ReturnCode.DOWNLOAD)
+                                original_phrase.add_event('expired')
+                                self.set_finished()
+                            except TTSDownloadError as e:
+                                MY_LOGGER.info(f'{TTSDownloadError:} {e.msg}')
+                                MY_LOGGER.exception(f'TTSDownloadError')
+                                self.set_rc(ReturnCode.DOWNLOAD)
+                                original_phrase.add_event('download error')
+                                self.set_finished()
+                            except IOError as e:
+                                MY_LOGGER.exception(f'Error processing phrase: '
+                                                    f'{phrase_chunk.get_text()}')
+                                MY_LOGGER.error(f'Error writing to temp file:'
+                                                f' {tmp_path}')
+                                original_phrase.add_event('error writing temp')
+                                original_phrase.set_cache_file_state(CacheFileState.BAD)
+                                self.set_rc(ReturnCode.DOWNLOAD)
+                                self.set_finished()
+                            except Exception as e:
+                                MY_LOGGER.exception('')
+                                original_phrase.add_event('download failed')
+                                self.set_rc(ReturnCode.DOWNLOAD)
+                                self.set_finished()
+                            if self.get_rc() != ReturnCode.OK:
+                                break  # The remaining chunks are useless
+                finally:
+                    for future in futures:
+                        future.cancel()
                 if (self.get_rc() == ReturnCode.OK
                         and tmp_path.stat().st_size > 100):
                     try:
                         tmp_path.rename(cache_path)
+                        VoiceCache.record_cache_file(cache_path)
                         original_phrase.set_exists(True, check_expired=False)
                         original_phrase.set_cache_file_state(CacheFileState.OK)
                         original_phrase.add_event('generation finished')
@@ -349,9 +373,12 @@ class SpeechGenerator(ISpeechGenerator):
             self.set_finished()
             reraise(*sys.exc_info())
         except ExpiredException:
-            MY_LOGGER.exception(f'{phrase_chunks}')
+            # Dropped by GenerationScheduler while waiting for a slot
+            if MY_LOGGER.isEnabledFor(DEBUG):
+                MY_LOGGER.debug(f'Not wanted: {original_phrase}')
+            original_phrase.add_event('dropped as stale')
             self.set_finished()
-            self.set_rc(ReturnCode.DOWNLOAD)
+            self.set_rc(ReturnCode.EXPIRED)
         except Exception as e:
             MY_LOGGER.exception('')
             if MY_LOGGER.isEnabledFor(ERROR):
@@ -359,6 +386,63 @@ class SpeechGenerator(ISpeechGenerator):
             self.set_finished()
             self.set_rc(ReturnCode.DOWNLOAD)
         finally:
-            tmp_path.unlink(missing_ok=True)
+            if owner:
+                tmp_path.unlink(missing_ok=True)
+                CacheEntryMgr.work_complete(cache_path, self.get_rc())
             self.set_finished()
         return None
+
+    def _share_results(self, original_phrase: Phrase, in_flight: Future) -> None:
+        """
+        Waits for another thread to finish voicing the same text as
+        original_phrase and adopts its results.
+
+        :param original_phrase: Phrase to voice
+        :param in_flight: From CacheEntryMgr.start_work
+        """
+        original_phrase.add_event('waiting on download in progress')
+        rc: ReturnCode = CacheEntryMgr.wait_for_work(in_flight)
+        if (rc == ReturnCode.OK and
+                original_phrase.get_cache_path(check_expired=False).exists()):
+            original_phrase.set_exists(True, check_expired=False)
+            original_phrase.set_cache_file_state(CacheFileState.OK)
+            original_phrase.set_download_pending(False)
+            original_phrase.add_event('generation finished elsewhere')
+        else:
+            rc = ReturnCode.DOWNLOAD
+        self.set_rc(rc)
+        self.set_finished()
+
+    def _download_chunk(self, phrase_chunk: Phrase, lang_code: str,
+                        country_code: str, tld: str) -> bytes:
+        """
+        Downloads the voicing of one chunk of a phrase. Runs in a
+        DownloadPool thread, so must never wait on the GenerationScheduler.
+
+        :return: The voiced chunk
+        :raises TTSDownloadError: when the download fails
+        """
+        Monitor.exception_on_abort()
+        if MY_LOGGER.isEnabledFor(DEBUG):
+            MY_LOGGER.debug(f'phrase: {phrase_chunk.get_text()}')
+        my_gtts: MyGTTS = MyGTTS()
+        my_gtts.config(phrase_chunk, lang_code=lang_code,
+                       country_code=country_code, tld=tld)
+        if MY_LOGGER.isEnabledFor(DEBUG):
+            MY_LOGGER.debug(f'GTTS lang: {lang_code}')
+        phrase_chunk.add_event('my_gtts')
+        #     gTTSError – When there’s an error with the API request.
+        return my_gtts.download()
+
+    def _wait_for_chunk(self, future: Future) -> bytes:
+        """
+        Waits for a chunk submitted to the DownloadPool, checking for abort
+        while waiting.
+
+        :return: The voiced chunk
+        :raises: Any exception raised by the download
+        """
+        while not future.done():
+            wait([future], timeout=0.1)
+            Monitor.exception_on_abort()
+        return future.result()
@@ -390,6 +390,7 @@ class PowerShellTTS(SimpleTTSBackend):
             return None
         try:
             result.temp_voice_path.rename(result.final_audio_path)
+            VoiceCache.record_cache_file(result.final_audio_path)
             phrase.set_cache_path(cache_path=result.final_audio_path,
                                   text_exists=phrase.text_exists(active_engine=self,
                                                                  check_expired=False),
@@ -1,17 +1,21 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations  # For union operator |
 
+import io
 import os
 import subprocess
 import sys
+import threading
 
 import langcodes
 
 from pathlib import Path
 
+from backends.engines.espeak_synthesizer import ESpeakSynthesizer
 from backends.players.iplayer import IPlayer
 from backends.settings.language_info import LanguageInfo
 from backends.settings.validators import NumericValidator
+from backends.settings.voice_discovery_cache import VoiceDiscoveryCache
 from backends.transcoders.trans import TransCode
 from cache.cache_file_state import CacheFileState
 from cache.voicecache import VoiceCache
@@ -96,6 +100,8 @@ class ESpeakTTSBackend(SimpleTTSBackend):
     UTF_8: Final[str] = '1'
 
     voice_map: Dict[str, List[VoiceData]] = None
+    # Held while voice_map and the engine's LanguageInfo entries are replaced
+    _voices_lock: threading.RLock = threading.RLock()
     FILE_DIR_TO_REAL_DIR: Dict[str, str] = {'mb': 'mbrola'}
     _logger: BasicLogger = None
     _class_name: str = None
@@ -157,11 +163,41 @@ class ESpeakTTSBackend(SimpleTTSBackend):
     def init_voices(cls):
         """
         Discover the available voices
+
+        The voices found by the last discovery are used, if espeak-ng and its
+        data have not changed since. They are then checked in the background.
         """
         if cls.voice_map is not None:
             return
 
-        cls.voice_map = {}
+        voices: List[Dict[str, Any]] | None
+        voices = VoiceDiscoveryCache.load(cls.engine_id, cls.cmd_path,
+                                          cls.data_path)
+        if voices is None:
+            voices = cls.discover_voices()
+            if voices is None:
+                voices = []
+            else:
+                VoiceDiscoveryCache.save(cls.engine_id, cls.cmd_path,
+                                         cls.data_path, voices)
+            cls.apply_voices(voices)
+        else:
+            # Apply the cached voices first, so that they can not replace the
+            # voices found by revalidate
+            cls.apply_voices(voices)
+            VoiceDiscoveryCache.revalidate(cls.engine_id, cls.cmd_path,
+                                           cls.data_path, voices,
+                                           discover=cls.discover_voices,
+                                           on_change=cls.apply_voices)
+
+    @classmethod
+    def discover_voices(cls) -> List[Dict[str, Any]] | None:
+        """
+        Runs espeak-ng --voices and checks which of the voices are installed
+
+        :return: One json-compatible dict per voice, as stored by
+                 VoiceDiscoveryCache. None if espeak-ng could not be run
+        """
         env = os.environ.copy()
         args = [str(cls.cmd_path), '-b', cls.UTF_8, '--voices',
                 f'--path={str(cls.data_path)}']
@@ -248,9 +284,11 @@ class ESpeakTTSBackend(SimpleTTSBackend):
             del voices[0]
         except ProcessLookupError:
             MY_LOGGER.exception('')
-            rc = -1
+            return None
 
         # Read lines of voices, ignoring header
+        voice_data: List[VoiceData] = []
+        priorities: List[int] = []
         for voice in voices:
             fields = voice.split(maxsplit=5)
             if MY_LOGGER.isEnabledFor(DEBUG_V):
@@ -280,6 +318,7 @@ class ESpeakTTSBackend(SimpleTTSBackend):
                                        f'{langcodes_lang.display_name(langcodes_lang.language)}')
             except LanguageTagError:
                 MY_LOGGER.exception('')
+                continue
 
             age, gender = fields[2].split('/')
             if gender == 'M':
@@ -294,43 +333,75 @@ class ESpeakTTSBackend(SimpleTTSBackend):
             other_langs: str = ''
             if len(fields) > 5:
                 other_langs = fields[5]  # Fields 5 -> eol
-            entries: List[VoiceData] | None
-            entries = cls.voice_map.setdefault(langcodes_lang.language, [])
-            entries.append(VoiceData(lang_id, langcodes_lang, voice_name, voice_id,
-                                     gender))
+            voice_data.append(VoiceData(lang_id, langcodes_lang, voice_name,
+                                        voice_id, gender))
+            priorities.append(priority)
 
         # Discover the directories of voice files referenced by the list of voices
         voice_files_by_directory: Dict[str, Dict[str, None]] = {}
-        for lang, entries in cls.voice_map.items():
+        for entry in voice_data:
+            entry: VoiceData
+            if MY_LOGGER.isEnabledFor(DEBUG_V):
+                MY_LOGGER.debug_v(f'entry: {entry}')
+            voice_file_path: Path = Path(entry.voice_id)
+            subdir_name: str = str(voice_file_path.parent)
             if MY_LOGGER.isEnabledFor(DEBUG_V):
-                MY_LOGGER.debug_v(f'lang: {lang} entries: {entries}')
-            for entry in entries:
-                entry: VoiceData
+                MY_LOGGER.debug_v(f'subdir_name: {subdir_name}')
+            subdir_name = cls.FILE_DIR_TO_REAL_DIR.get(subdir_name)
+            if subdir_name is not None:
+                voices_in_subdir: Dict[str, None]  # used as a set
+                voices_in_subdir = voice_files_by_directory.setdefault(subdir_name, {})
+                # Only need to scan a subdir once to capture all voices in it
+                if len(voices_in_subdir) == 0:
+                    for voice_file in cls.get_installed_voice_files(subdir_name):
+                        voices_in_subdir[voice_file] = None
+                # Mark any entry that has its voice_file in the subdir
+                voice_file: str = str(voice_file_path.name)
+                if voice_file in voices_in_subdir:
+                    entry.available = True
+            else:
+                entry.available = True
+
+        discovered: List[Dict[str, Any]] = []
+        for entry, priority in zip(voice_data, priorities):
+            discovered.append({'lang_id': entry.lang_id,
+                               'lang': VoiceDiscoveryCache.language_to_json(
+                                       entry.langcodes_lang),
+                               'voice_name': entry.voice_name,
+                               'voice_id': entry.voice_id,
+                               'gender': entry.gender.value,
+                               'priority': priority,
+                               'available': entry.available})
+        return discovered
+
+    @classmethod
+    def apply_voices(cls, voices: List[Dict[str, Any]]) -> None:
+        """
+        Builds voice_map and reports the installed voices to LanguageInfo,
+        replacing any voices reported before. Also called by
+        VoiceDiscoveryCache, from another thread, when the voices change.
+
+        :param voices: As returned by discover_voices
+        """
+        voice_map: Dict[str, List[VoiceData]] = {}
+        with cls._voices_lock:
+            # Forget voices that are no longer installed
+            LanguageInfo.remove_engine(ESpeakTTSBackend.service_key)
+            for voice in voices:
+                langcodes_lang: langcodes.Language
+                langcodes_lang = VoiceDiscoveryCache.language_from_json(voice['lang'])
+                entry: VoiceData = VoiceData(voice['lang_id'], langcodes_lang,
+                                             voice['voice_name'], voice['voice_id'],
+                                             Genders(voice['gender']),
+                                             available=voice['available'])
+                entries: List[VoiceData]
+                entries = voice_map.setdefault(langcodes_lang.language, [])
+                entries.append(entry)
                 if MY_LOGGER.isEnabledFor(DEBUG_V):
                     MY_LOGGER.debug_v(f'entry: {entry}')
-                voice_file_path: Path = Path(entry.voice_id)
-                subdir_name: str = str(voice_file_path.parent)
-                if MY_LOGGER.isEnabledFor(DEBUG_V):
-                    MY_LOGGER.debug_v(f'subdir_name: {subdir_name}')
-                subdir_name = cls.FILE_DIR_TO_REAL_DIR.get(subdir_name)
-                if subdir_name is not None:
-                    voices_in_subdir: Dict[str, None]  # used as a set
-                    voices_in_subdir = voice_files_by_directory.setdefault(subdir_name, {})
-                    # Only need to scan a subdir once to capture all voices in it
-                    if len(voices_in_subdir) == 0:
-                        for voice_file in cls.get_installed_voice_files(subdir_name):
-                            voices_in_subdir[voice_file] = None
-                    # Mark any entry that has its voice_file in the subdir
-                    voice_file: str = str(voice_file_path.name)
-                    if voice_file in voices_in_subdir:
-                        entry.available = True
-                else:
-                    entry.available = True
 
                 if entry.available:
                     # NOTE: Omitting voices that are NOT installed
-
-                    langcodes_lang: langcodes.Language = entry.langcodes_lang
                     LanguageInfo.add_language(engine_key=ESpeakTTSBackend.service_key,
                                               language_id=langcodes_lang.language,
                                               country_id=langcodes_lang.territory,
@@ -342,9 +413,9 @@ class ESpeakTTSBackend(SimpleTTSBackend):
                                               engine_voice_id=entry.voice_id,
                                               engine_name_msg_id=MessageId.ENGINE_ESPEAK,
                                               engine_quality=3,
-                                              voice_quality=priority)
-
-        cls.initialized_static = True
+                                              voice_quality=voice['priority'])
+            cls.voice_map = voice_map
+            cls.initialized_static = True
 
     @classmethod
     def get_installed_voice_files(cls, subdir: str) -> List[str]:
@@ -397,6 +468,49 @@ class ESpeakTTSBackend(SimpleTTSBackend):
         if phrase:
             args.append(phrase.get_text())
 
+    def synthesize(self, phrase: Phrase) -> bytes | None:
+        """
+        Voices the phrase with the persistent ESpeakSynthesizer, using the same
+        settings as addCommonArgs.
+
+        :param phrase: text to voice
+        :return: Contents of a .wav file, or None if the synthesizer is not
+                 available or failed. Then the caller should run espeak-ng.
+        """
+        clz = type(self)
+        if not ESpeakSynthesizer.is_available():
+            return None
+        voice_id = Settings.get_voice(clz.service_key)
+        if voice_id is None or voice_id in ('unknown', ''):
+            voice_id = None
+        try:
+            return ESpeakSynthesizer.synthesize(phrase.get_text(), voice=voice_id,
+                                                rate=self.get_speed(),
+                                                pitch=self.get_pitch(),
+                                                volume=self.getVolume())
+        except AbortException:
+            reraise(*sys.exc_info())
+        except Exception:
+            MY_LOGGER.exception('')
+        return None
+
+    def synthesize_to_file(self, phrase: Phrase, voice_path: Path) -> bool:
+        """
+        Voices the phrase with the persistent ESpeakSynthesizer into voice_path.
+
+        :return: True if voice_path was written, otherwise False and the caller
+                 should run espeak-ng
+        """
+        wave_data: bytes | None = self.synthesize(phrase)
+        if wave_data is None:
+            return False
+        try:
+            voice_path.write_bytes(wave_data)
+            return True
+        except OSError:
+            MY_LOGGER.exception(f'Can not write: {voice_path}')
+        return False
+
     def get_player_mode(self) -> PlayerMode:
         clz = type(self)
         player: IPlayer = self.get_player(self.service_key)
@@ -463,6 +577,7 @@ class ESpeakTTSBackend(SimpleTTSBackend):
                                           output_path=mp3_file,
                                           remove_input=True)
             if success:
+                VoiceCache.record_cache_file(mp3_file)
                 phrase.text_exists(check_expired=False, active_engine=self)
             if MY_LOGGER.isEnabledFor(DEBUG):
                 MY_LOGGER.debug(f'success: {success} wave_file: {wave_file} mp3: '
@@ -520,30 +635,31 @@ class ESpeakTTSBackend(SimpleTTSBackend):
         self.addCommonArgs(args)
         try:
             self.init_utterance()
-            if Constants.PLATFORM_WINDOWS:
-                if MY_LOGGER.isEnabledFor(DEBUG_V):
-                    MY_LOGGER.debug_v(f'Running command: Windows: {args}')
-                self.process = subprocess.Popen(args, stdin=subprocess.PIPE,
-                                                stdout=subprocess.PIPE,
-                                                stderr=subprocess.STDOUT, shell=False,
-                                                text=True,
-                                                encoding='utf-8', env=env,
-                                                close_fds=True,
-                                                creationflags=subprocess.CREATE_NO_WINDOW)
-            else:
-                if MY_LOGGER.isEnabledFor(DEBUG_V):
-                    MY_LOGGER.debug_v(f'Running command: Linux: {args}')
-                self.process = subprocess.Popen(args, stdin=subprocess.PIPE,
-                                                stdout=subprocess.PIPE,
-                                                stderr=subprocess.STDOUT,
-                                                text=True,
-                                                shell=False,
-                                                encoding='utf-8',
-                                                close_fds=True,
-                                                env=env)
-            output: str  # Must have trailing space (truncates last char)
-            output, _ = self.process.communicate(input=f'{phrase.text} ')
-            self.process = None
+            if not self.synthesize_to_file(phrase, result.temp_voice_path):
+                if Constants.PLATFORM_WINDOWS:
+                    if MY_LOGGER.isEnabledFor(DEBUG_V):
+                        MY_LOGGER.debug_v(f'Running command: Windows: {args}')
+                    self.process = subprocess.Popen(args, stdin=subprocess.PIPE,
+                                                    stdout=subprocess.PIPE,
+                                                    stderr=subprocess.STDOUT, shell=False,
+                                                    text=True,
+                                                    encoding='utf-8', env=env,
+                                                    close_fds=True,
+                                                    creationflags=subprocess.CREATE_NO_WINDOW)
+                else:
+                    if MY_LOGGER.isEnabledFor(DEBUG_V):
+                        MY_LOGGER.debug_v(f'Running command: Linux: {args}')
+                    self.process = subprocess.Popen(args, stdin=subprocess.PIPE,
+                                                    stdout=subprocess.PIPE,
+                                                    stderr=subprocess.STDOUT,
+                                                    text=True,
+                                                    shell=False,
+                                                    encoding='utf-8',
+                                                    close_fds=True,
+                                                    env=env)
+                output: str  # Must have trailing space (truncates last char)
+                output, _ = self.process.communicate(input=f'{phrase.text} ')
+                self.process = None
             if not result.temp_voice_path.exists():
                 MY_LOGGER.info(f'voice file not created: {result.temp_voice_path}')
                 return None
@@ -557,6 +673,7 @@ class ESpeakTTSBackend(SimpleTTSBackend):
                 return None
             try:
                 result.temp_voice_path.rename(result.final_audio_path)
+                VoiceCache.record_cache_file(result.final_audio_path)
                 phrase.set_cache_path(cache_path=result.final_audio_path,
                                       text_exists=phrase.text_exists(check_expired=False,
                                                                      active_engine=self),
@@ -625,8 +742,11 @@ class ESpeakTTSBackend(SimpleTTSBackend):
             MY_LOGGER.exception('')
             return None
 
-    def runCommandAndPipe(self, phrase: Phrase) -> str | None:
+    def runCommandAndPipe(self, phrase: Phrase) -> BinaryIO | str | None:
         clz = type(self)
+        wave_data: bytes | None = self.synthesize(phrase)
+        if wave_data is not None:
+            return io.BytesIO(wave_data)
         env = os.environ.copy()
         args = [str(clz.cmd_path), '-b', clz.UTF_8, '--stdin', '--stdout',
                 f'--path={str(clz.data_path)}']
@@ -17,6 +17,7 @@ from backends.settings.setting_properties import SettingProp
 from backends.settings.settings_helper import SettingsHelper
 from cache.common_types import CacheEntryInfo
 from cache.cache_file_state import CacheFileState
+from cache.hot_audio_cache import HotAudioCache
 from cache.voicecache import VoiceCache
 from common import *
 from common.base_services import BaseServices
@@ -389,7 +390,7 @@ class GoogleTTSEngine(base.SimpleTTSBackend):
         if cache_file_state != CacheFileState.OK:
             return None
         byte_stream: BinaryIO | None = None
-        byte_stream = phrase.get_cache_path().open(mode='br')
+        byte_stream = HotAudioCache.open(phrase.get_cache_path())
         return byte_stream
 
         '''
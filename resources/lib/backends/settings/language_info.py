@@ -331,6 +331,23 @@ class LanguageInfo:
                      engine_quality,
                      voice_quality)
 
+    @classmethod
+    def remove_engine(cls, engine_key: ServiceID) -> None:
+        """
+        Forgets every language added for an engine, so that its languages can
+        be added again when its voices change.
+
+        :param engine_key: Specifies which engine's entries to remove
+        """
+        langs_for_an_engine: Dict[str, List[ForwardRef('LanguageInfo')]] | None
+        langs_for_an_engine = cls.entries_by_engine.pop(engine_key, None)
+        if langs_for_an_engine is None:
+            return
+        removed: int = sum(len(entries) for entries in langs_for_an_engine.values())
+        cls._number_of_entries -= removed
+        if MY_LOGGER.isEnabledFor(DEBUG):
+            MY_LOGGER.debug(f'engine: {engine_key} removed: {removed}')
+
     @classmethod
     def get_entry(cls,
                   engine_key: ServiceID | None = None,
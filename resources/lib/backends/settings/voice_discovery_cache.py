@@ -0,0 +1,225 @@
+# coding=utf-8
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import langcodes
+
+from common import *
+from common.constants import Constants
+from common.logger import *
+from common.worker_pool import WorkerPools
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class VoiceDiscoveryCache:
+    """
+    Remembers the voices (and languages) that an engine reported the last
+    time that they were discovered, so that service start does not have to
+    run the engine, parse its output and build langcodes.Language objects
+    each time.
+
+    Entries are kept per engine in a single json file in the addon profile.
+    Each entry is keyed by the path and mtime of the engine's binary and the
+    path and mtime of its data directory. An entry is only returned while
+    its key still matches. A returned entry may still be out of date (a
+    voice installed into a subdirectory of the data directory does not
+    change its mtime), so callers revalidate it in the background.
+
+    Voices are stored as lists of json-compatible dicts defined by each
+    engine. language_to_json and language_from_json convert
+    langcodes.Language objects without parsing tags.
+
+    Use:
+        voices = VoiceDiscoveryCache.load(engine_id, binary, data_path)
+        if voices is None:
+            voices = <discover>
+            VoiceDiscoveryCache.save(engine_id, binary, data_path, voices)
+        else:
+            VoiceDiscoveryCache.revalidate(engine_id, binary, data_path,
+                                           voices, <discover>, <apply>)
+        <apply>(voices)
+    """
+    # Change whenever the format of the file, or of an engine's voices, changes
+    VERSION: Final[int] = 1
+    FILE_NAME: Final[str] = 'voice_discovery.json'
+    REVALIDATE_DELAY_SECONDS: Final[float] = 30.0
+
+    _lock: threading.RLock = threading.RLock()
+    # engine_id -> {'key': {...}, 'voices': [...]}
+    _entries: Dict[str, Dict[str, Any]] | None = None
+
+    @classmethod
+    def load(cls, engine_id: str, binary: Path | None,
+             data_path: Path | None) -> List[Dict[str, Any]] | None:
+        """
+        :param engine_id: Engine that discovered the voices
+        :param binary: Path of the engine's executable or library, if any
+        :param data_path: Path of the engine's data directory, if any
+        :return: The voices saved for the engine, or None if there are none or
+                 the binary or data directory have changed since
+        """
+        key: Dict[str, Any] = cls.get_key(binary, data_path)
+        with cls._lock:
+            entry: Dict[str, Any] | None = cls._get_entries().get(engine_id)
+        if entry is None or entry.get('key') != key:
+            if MY_LOGGER.isEnabledFor(DEBUG):
+                MY_LOGGER.debug(f'No valid voices cached for {engine_id}')
+            return None
+        return entry.get('voices')
+
+    @classmethod
+    def save(cls, engine_id: str, binary: Path | None, data_path: Path | None,
+             voices: List[Dict[str, Any]]) -> None:
+        """
+        Replaces the voices saved for an engine.
+
+        :param engine_id: Engine that discovered the voices
+        :param binary: Path of the engine's executable or library, if any
+        :param data_path: Path of the engine's data directory, if any
+        :param voices: json-compatible description of each voice
+        """
+        key: Dict[str, Any] = cls.get_key(binary, data_path)
+        with cls._lock:
+            entries: Dict[str, Dict[str, Any]] = cls._get_entries()
+            entries[engine_id] = {'key': key, 'voices': voices}
+            cls._write(entries)
+
+    @classmethod
+    def revalidate(cls, engine_id: str, binary: Path | None,
+                   data_path: Path | None, voices: List[Dict[str, Any]],
+                   discover: Callable[[], List[Dict[str, Any]] | None],
+                   on_change: Callable[[List[Dict[str, Any]]], None]) -> None:
+        """
+        Discovers the voices again, in the background, once the service has
+        had time to start. If they differ from those returned by load, they
+        are saved and passed to on_change.
+
+        :param engine_id: As passed to load
+        :param binary: As passed to load
+        :param data_path: As passed to load
+        :param voices: As returned by load
+        :param discover: Discovers the engine's voices. Returns None on failure
+        :param on_change: Called with the newly discovered voices
+        """
+        from utils.util import run_in_pool
+        run_in_pool(WorkerPools.SUBPROCESS, cls._revalidate, name='vceRvld',
+                    delay=cls.REVALIDATE_DELAY_SECONDS, engine_id=engine_id,
+                    binary=binary, data_path=data_path, voices=voices,
+                    discover=discover, on_change=on_change)
+
+    @classmethod
+    def get_key(cls, binary: Path | None,
+                data_path: Path | None) -> Dict[str, Any]:
+        """
+        The mtime of the data directory is the latest of it and its immediate
+        subdirectories, since engines keep voices in per-language or
+        per-voice subdirectories.
+        """
+        data_mtime: float | None = cls._mtime(data_path)
+        if data_mtime is not None:
+            try:
+                with os.scandir(data_path) as scan:
+                    for dir_entry in scan:
+                        if dir_entry.is_dir(follow_symlinks=False):
+                            data_mtime = max(data_mtime,
+                                             dir_entry.stat().st_mtime)
+            except OSError:
+                pass
+        return {'version': cls.VERSION,
+                'binary': None if binary is None else str(binary),
+                'binary_mtime': cls._mtime(binary),
+                'data_path': None if data_path is None else str(data_path),
+                'data_mtime': data_mtime}
+
+    @staticmethod
+    def language_to_json(lang: langcodes.Language) -> Dict[str, Any]:
+        def as_list(values: Iterable[str] | None) -> List[str] | None:
+            return None if values is None else list(values)
+
+        return {'language': lang.language,
+                'extlangs': as_list(lang.extlangs),
+                'script': lang.script,
+                'territory': lang.territory,
+                'variants': as_list(lang.variants),
+                'extensions': as_list(lang.extensions),
+                'private': lang.private}
+
+    @staticmethod
+    def language_from_json(lang: Dict[str, Any]) -> langcodes.Language:
+        return langcodes.Language.make(**lang)
+
+    @classmethod
+    def _revalidate(cls, engine_id: str, binary: Path | None,
+                    data_path: Path | None, voices: List[Dict[str, Any]],
+                    discover: Callable[[], List[Dict[str, Any]] | None],
+                    on_change: Callable[[List[Dict[str, Any]]], None]) -> None:
+        try:
+            discovered: List[Dict[str, Any]] | None = discover()
+            if discovered is None:
+                return
+            if discovered == voices:
+                if MY_LOGGER.isEnabledFor(DEBUG):
+                    MY_LOGGER.debug(f'Cached voices for {engine_id} still valid')
+                return
+            MY_LOGGER.info(f'Voices for {engine_id} changed')
+            cls.save(engine_id, binary, data_path, discovered)
+            on_change(discovered)
+        except AbortException:
+            reraise(*sys.exc_info())
+        except Exception:
+            MY_LOGGER.exception('')
+
+    @classmethod
+    def _get_entries(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        Reads the file on first use. Must be called with the lock held.
+        """
+        if cls._entries is not None:
+            return cls._entries
+        cls._entries = {}
+        path: Path = cls._path()
+        try:
+            with path.open('r', encoding='utf-8') as cache_file:
+                contents: Dict[str, Any] = json.load(cache_file)
+            if contents.get('version') == cls.VERSION:
+                cls._entries = contents.get('engines', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError):
+            MY_LOGGER.exception(f'Ignoring damaged {path}')
+        return cls._entries
+
+    @classmethod
+    def _write(cls, entries: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Must be called with the lock held.
+        """
+        path: Path = cls._path()
+        tmp_path: Path = path.with_suffix('.tmp')
+        try:
+            path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
+            with tmp_path.open('w', encoding='utf-8') as cache_file:
+                json.dump({'version': cls.VERSION, 'engines': entries},
+                          cache_file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            MY_LOGGER.exception(f'Can not write {path}')
+
+    @classmethod
+    def _path(cls) -> Path:
+        return Path(Constants.PROFILE_PATH) / cls.FILE_NAME
+
+    @staticmethod
+    def _mtime(path: Path | None) -> float | None:
+        if path is None:
+            return None
+        try:
+            return path.stat().st_mtime
+        except OSError:
+            return None
@@ -2,10 +2,15 @@
 from __future__ import annotations
 
 import threading
-from typing import Dict
+from concurrent.futures import Future, wait
+from contextlib import contextmanager
+from pathlib import Path
 
+from cache.generation_scheduler import GenerationPriority, GenerationScheduler
+from common import *
+from common.constants import ReturnCode
 from common.logger import *
-from common.phrases import Phrase
+from common.monitor import Monitor
 
 MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
 
@@ -13,46 +18,108 @@ MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
 class CacheEntryMgr:
     """
     Provides methods to manage the state of generating voice files from text.
-    Prevents duplicate conversion of phrases to voice files
+    Prevents duplicate conversion of phrases to voice files, while allowing
+    different phrases to be converted independently. When they run is
+    decided by the GenerationScheduler.
 
     Use:
-
+        owner, future = CacheEntryMgr.start_work(cache_path, priority)
+        if not owner:
+            rc = CacheEntryMgr.wait_for_work(future)  # Someone else voices it
+        else:
+            rc = ReturnCode.CALL_FAILED
+            try:
+                with CacheEntryMgr.generation_slot(cache_path, priority):
+                    rc = <voice text into cache_path>
+            finally:
+                CacheEntryMgr.work_complete(cache_path, rc)
     """
     # Whenever a voicing is being created for text that is destined for the
-    # cache, there will be an entry in this table. The key is the md5 hash
-    # of the text. The table is protected by an RLock.
-    active_audio_creation: Dict[str, bool] = {}
+    # cache, there will be an entry in this table. The key is the path of the
+    # cache file. The value is a Future which receives the ReturnCode of the
+    # voicing. The table is protected by an RLock.
+    active_audio_creation: Dict[str, Future] = {}
     active_audio_lock: threading.RLock = threading.RLock()
 
     @classmethod
-    def start_work(cls, phrase: Phrase) -> bool:
+    def start_work(cls, cache_path: Path,
+                   priority: GenerationPriority = GenerationPriority.INTERACTIVE
+                   ) -> Tuple[bool, Future]:
         """
         Used to track when the text of a phrase is being converted to voice.
         Prevents multiple conversions for same phrase
 
-        :param phrase: Contains the text to convert to voice
-        :return: True if the given phrase was added to lock map by this call,
-                 otherwise False
+        :param cache_path: Path of the cache file to be created
+        :param priority: How urgently the caller needs the file. A conversion
+                         already in progress is boosted to this priority
+        :return: (True, future) if the caller is now responsible for creating
+                 the file and must call work_complete when done, otherwise
+                 (False, future of the conversion already in progress)
         """
+        key: str = str(cache_path)
         with cls.active_audio_lock:
-            if cls.active_audio_creation.get(phrase.text) is None:
-                cls.active_audio_creation[phrase.text] = True
-                return True
-            return False
+            future: Future | None = cls.active_audio_creation.get(key)
+            if future is not None:
+                GenerationScheduler.boost(key, priority)
+                return False, future
+            future = Future()
+            future.set_running_or_notify_cancel()
+            cls.active_audio_creation[key] = future
+            return True, future
 
     @classmethod
-    def is_working_on(cls, phrase: Phrase) -> bool:
+    def is_working_on(cls, cache_path: Path) -> bool:
         with cls.active_audio_lock:
-            result: bool | None = cls.active_audio_creation.get(phrase.text)
-            if result is None:
-                result = True
-            return result
+            return str(cache_path) in cls.active_audio_creation
 
     @classmethod
-    def work_complete(cls, phrase: Phrase) -> None:
+    def work_complete(cls, cache_path: Path, rc: ReturnCode) -> None:
+        """
+        Reports the result of a conversion begun by start_work to everyone
+        waiting for it.
+
+        :param cache_path: Path passed to start_work
+        :param rc: Result of the conversion
+        """
         with cls.active_audio_lock:
-            if cls.active_audio_creation.get(phrase.text) is None:
-                if MY_LOGGER.isEnabledFor(DEBUG):
-                    MY_LOGGER.debug(f'NOT LOCKED!!')
-            else:
-                del cls.active_audio_creation[phrase.text]
+            future: Future | None = cls.active_audio_creation.pop(str(cache_path),
+                                                                  None)
+        if future is None:
+            if MY_LOGGER.isEnabledFor(DEBUG):
+                MY_LOGGER.debug(f'NOT LOCKED!! {cache_path}')
+            return
+        future.set_result(rc)
+
+    @classmethod
+    def wait_for_work(cls, future: Future) -> ReturnCode:
+        """
+        Waits for a conversion started by another thread to complete.
+
+        :param future: As returned by start_work
+        :return: The ReturnCode reported to work_complete
+        :raises AbortException:
+        """
+        while not future.done():
+            wait([future], timeout=0.1)
+            Monitor.exception_on_abort()
+        return future.result()
+
+    @classmethod
+    @contextmanager
+    def generation_slot(cls, cache_path: Path,
+                        priority: GenerationPriority,
+                        is_stale: Callable[[], bool] | None = None
+                        ) -> Iterator[None]:
+        """
+        Waits until the GenerationScheduler allows the conversion to run
+        and holds a slot for the duration of the with block.
+
+        :param cache_path: Path passed to start_work
+        :param priority: Class of the conversion
+        :param is_stale: See GenerationScheduler.slot
+        :raises AbortException:
+        :raises ExpiredException: When dropped as stale
+        """
+        with GenerationScheduler.slot(priority, key=str(cache_path),
+                                      is_stale=is_stale):
+            yield
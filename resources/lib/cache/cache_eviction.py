@@ -0,0 +1,183 @@
+# coding=utf-8
+from __future__ import annotations
+
+import math
+import sys
+import threading
+import time
+from pathlib import Path
+
+from cache.voice_cache_index import VoiceCacheIndex
+from cache.voice_cache_manifest import ManifestEntry, VoiceCacheManifest
+from common import *
+from common.constants import Constants
+from common.logger import *
+from common.monitor import Monitor
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class CacheEvictor:
+    """
+    Keeps the voice cache within a byte budget and removes entries which
+    have not been used for cache_expiration_days.
+
+    An 'entry' is every file (audio files of any type plus the .txt file)
+    with the same md5 in the same shard. Entries are removed whole.
+
+    Candidates for removal are chosen from the VoiceCacheManifest using an
+    LRU/LFU hybrid: an entry's value is the time of its last hit plus
+    Constants.CACHE_HIT_WEIGHT_SECONDS for every doubling of its hit count.
+    The least valuable entries are removed first.
+
+    Eviction runs in its own thread in small batches. Before each file is
+    removed, the thread waits for any speech in progress to finish, so that
+    eviction never competes with voicing. The predefined "backup cache" used
+    by NoEngine and the SFX player is never touched.
+    """
+    _lock: threading.RLock = threading.RLock()
+    _wakeup: threading.Event = threading.Event()
+    _purge_requested: bool = False
+    _started: bool = False
+    evicted_files: int = 0
+    evicted_bytes: int = 0
+
+    @classmethod
+    def start(cls) -> None:
+        with cls._lock:
+            if cls._started:
+                return
+            cls._started = True
+        from utils.util import runInThread
+        runInThread(cls._evict_thread, name='cchEvct',
+                    delay=Constants.CACHE_EVICTION_START_DELAY_SECONDS)
+
+    @classmethod
+    def request_pass(cls, purge: bool = False) -> None:
+        """
+        Asks the eviction thread to run a pass as soon as possible. Does
+        not wait for the pass.
+
+        :param purge: When True, remove every (non-predefined) entry
+        """
+        with cls._lock:
+            cls._purge_requested = cls._purge_requested or purge
+        cls._wakeup.set()
+
+    @classmethod
+    def _evict_thread(cls) -> None:
+        try:
+            while True:
+                purge: bool
+                with cls._lock:
+                    purge = cls._purge_requested
+                    cls._purge_requested = False
+                    cls._wakeup.clear()
+                cls.evict_pass(purge=purge)
+                waited: float = 0.0
+                while (waited < Constants.CACHE_EVICTION_INTERVAL_SECONDS and
+                       not cls._wakeup.is_set()):
+                    Monitor.exception_on_abort(timeout=1.0)
+                    waited += 1.0
+        except AbortException:
+            return  # Let thread die
+        except Exception:
+            MY_LOGGER.exception('')
+
+    @classmethod
+    def evict_pass(cls, purge: bool = False) -> None:
+        """
+        Removes expired entries, then the least valuable entries until the
+        cache is below the low water mark of its budget.
+
+        :param purge: When True, remove every (non-predefined) entry
+        """
+        if not VoiceCacheManifest.is_available():
+            return
+        entries: Dict[Tuple[str, str], List[ManifestEntry]] = {}
+        protected: str | None = None
+        if Constants.PREDEFINED_CACHE is not None:
+            protected = str(Constants.PREDEFINED_CACHE)
+        total_bytes: int = 0
+        for entry in VoiceCacheManifest.get_entries():
+            entry: ManifestEntry
+            if protected is not None and entry.shard.startswith(protected):
+                continue
+            total_bytes += entry.size
+            entries.setdefault((entry.shard, entry.md5), []).append(entry)
+
+        now: float = time.time()
+        max_age_days: int = cls._get_max_age_days()
+        oldest_allowed: float = 0.0
+        if max_age_days > 0:
+            oldest_allowed = now - max_age_days * 24 * 60 * 60.0
+        low_water: int = int(Constants.CACHE_MAX_BYTES *
+                             Constants.CACHE_LOW_WATER_FRACTION)
+        over_budget: bool = total_bytes > Constants.CACHE_MAX_BYTES
+
+        # Least valuable first
+        ranked: List[Tuple[float, List[ManifestEntry]]] = []
+        for files in entries.values():
+            last_hit: float = max(file.last_hit for file in files)
+            hits: int = max(file.hit_count for file in files)
+            value: float = (last_hit + Constants.CACHE_HIT_WEIGHT_SECONDS *
+                            math.log2(1 + hits))
+            ranked.append((value, files))
+        ranked.sort(key=lambda item: item[0])
+
+        if MY_LOGGER.isEnabledFor(DEBUG):
+            MY_LOGGER.debug(f'entries: {len(ranked)} total_bytes: {total_bytes} '
+                            f'over_budget: {over_budget} purge: {purge}')
+        removed: int = 0
+        for value, files in ranked:
+            expired: bool = max(file.last_hit for file in files) < oldest_allowed
+            if not (purge or expired or (over_budget and total_bytes > low_water)):
+                continue
+            for file in files:
+                cls._yield_to_speech()
+                if cls._remove(file.path):
+                    total_bytes -= file.size
+                    cls.evicted_bytes += file.size
+                    cls.evicted_files += 1
+                    removed += 1
+                    if removed % Constants.CACHE_EVICTION_BATCH_SIZE == 0:
+                        Monitor.exception_on_abort(timeout=0.5)
+        if MY_LOGGER.isEnabledFor(DEBUG):
+            MY_LOGGER.debug(f'removed: {removed} total_bytes: {total_bytes} '
+                            f'evicted_files: {cls.evicted_files} '
+                            f'evicted_bytes: {cls.evicted_bytes}')
+
+    @classmethod
+    def _get_max_age_days(cls) -> int:
+        try:
+            from common.settings import Settings
+            return Settings.get_cache_expiration_days()
+        except AbortException:
+            reraise(*sys.exc_info())
+        except Exception:
+            MY_LOGGER.exception('')
+        return 0
+
+    @classmethod
+    def _yield_to_speech(cls) -> None:
+        """
+        Waits while anything is being spoken, or waiting to be spoken.
+        """
+        from backends.base import EngineQueue
+        Monitor.exception_on_abort(timeout=0.0)
+        if EngineQueue._instance is None:
+            return
+        while EngineQueue.isSpeaking():
+            Monitor.exception_on_abort(timeout=0.25)
+
+    @classmethod
+    def _remove(cls, path: Path) -> bool:
+        try:
+            path.unlink(missing_ok=True)
+            VoiceCacheIndex.discard_file(path)
+            if MY_LOGGER.isEnabledFor(DEBUG_V):
+                MY_LOGGER.debug_v(f'evicted: {path}')
+            return True
+        except Exception:
+            MY_LOGGER.exception(f'Can not delete: {path}')
+        return False
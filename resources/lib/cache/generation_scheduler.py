@@ -0,0 +1,281 @@
+# coding=utf-8
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+
+from common import *
+from common.constants import Constants
+from common.exceptions import ExpiredException
+from common.logger import *
+from common.monitor import Monitor
+from common.worker_pool import WorkerPools
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class GenerationPriority(IntEnum):
+    """
+    Classes of speech generation work. Lower values are more urgent.
+    """
+    # Text the user is waiting to hear (the focused control, etc.)
+    INTERACTIVE = 0
+    # Text that the user will probably want to hear soon
+    PREFETCH = 1
+    # Filling the cache from .txt files, the movie library, etc.
+    BULK = 2
+
+
+class GenerationScheduler:
+    """
+    Decides when speech generation may run, so that voicing the control the
+    user just focused is never stuck behind background work competing for
+    the same engine, network and disk.
+
+    Work runs inside slot(priority). Per-class limits cap how much work of
+    each class is in flight. INTERACTIVE work is only limited by its own cap.
+    Lower classes must also fit within VOICE_GENERATION_MAX_CONCURRENT, wait
+    for every more urgent waiter, and are paused while any INTERACTIVE work is
+    waiting, running, or was requested within the last
+    GENERATION_INTERACTIVE_QUIET_SECONDS.
+
+    Long running background work calls pause_point between steps (each
+    chunk, file or movie) so that it yields as soon as interactive work
+    arrives, rather than only when it finishes.
+
+    When interactive work needs the same cache entry that background work is
+    already producing, boost raises the priority of the background work
+    so that it is not paused.
+
+    The priority of work begun on a thread defaults to INTERACTIVE.
+    Background threads declare themselves with set_priority. Those whose work
+    can become unwanted (ListPrefetcher) also set_stale_check, so that such
+    work is dropped rather than left waiting for a slot.
+    """
+    _cond: threading.Condition = threading.Condition(threading.RLock())
+    # key -> priority of the work waiting for, or holding, a slot
+    _waiting: Dict[str, GenerationPriority] = {}
+    _running: Dict[str, GenerationPriority] = {}
+    _last_interactive: float = 0.0
+    _local: threading.local = threading.local()
+    _serial: int = 0
+    limits: Dict[GenerationPriority, int] = {
+        GenerationPriority.INTERACTIVE: Constants.GENERATION_MAX_INTERACTIVE,
+        GenerationPriority.PREFETCH: Constants.GENERATION_MAX_PREFETCH,
+        GenerationPriority.BULK: Constants.GENERATION_MAX_BULK
+    }
+    pauses: int = 0
+    dropped: int = 0
+
+    @classmethod
+    def get_priority(cls) -> GenerationPriority:
+        """
+        :return: The priority of work begun by the current thread
+        """
+        return getattr(cls._local, 'priority', GenerationPriority.INTERACTIVE)
+
+    @classmethod
+    def set_priority(cls, priority: GenerationPriority) -> None:
+        """
+        Sets the priority of work begun by the current thread
+        """
+        cls._local.priority = priority
+
+    @classmethod
+    def get_stale_check(cls) -> Callable[[], bool] | None:
+        """
+        :return: The stale check of work begun by the current thread
+        """
+        return getattr(cls._local, 'stale_check', None)
+
+    @classmethod
+    def set_stale_check(cls, is_stale: Callable[[], bool] | None) -> None:
+        """
+        Sets the stale check of work begun by the current thread. See slot
+        """
+        cls._local.stale_check = is_stale
+
+    @classmethod
+    def clear_thread_state(cls) -> None:
+        """
+        Returns the priority and stale check of the current thread to their
+        defaults. WorkerPools calls this around each task
+        """
+        cls._local.__dict__.clear()
+
+    @classmethod
+    def note_interactive(cls) -> None:
+        """
+        Called whenever the user asks for something to be voiced. Background
+        work is paused for a short time even if the text is already cached,
+        since the user is likely to ask for more.
+        """
+        with cls._cond:
+            cls._last_interactive = time.monotonic()
+
+    @classmethod
+    @contextmanager
+    def slot(cls, priority: GenerationPriority,
+             key: str | None = None,
+             is_stale: Callable[[], bool] | None = None) -> Iterator[None]:
+        """
+        Waits until work of the given priority may run and holds a slot for
+        the duration of the with block.
+
+        :param priority: Class of the work
+        :param key: Identifies the work (normally the cache path) so that it
+                    can be boosted. Need not be unique.
+        :param is_stale: Returns True once the work is no longer wanted. Such
+                         work is dropped while waiting, unless boosted to
+                         INTERACTIVE
+        :raises AbortException:
+        :raises ExpiredException: When dropped
+        """
+        with cls._cond:
+            cls._serial += 1
+            slot_key: str = f'{key}#{cls._serial}'
+            cls._waiting[slot_key] = priority
+            if priority == GenerationPriority.INTERACTIVE:
+                cls._last_interactive = time.monotonic()
+        try:
+            while True:
+                if is_stale is not None and is_stale():
+                    with cls._cond:
+                        if (cls._waiting[slot_key] !=
+                                GenerationPriority.INTERACTIVE):
+                            cls.dropped += 1
+                            raise ExpiredException(f'stale: {key}')
+                with cls._cond:
+                    if cls._can_run(slot_key):
+                        cls._running[slot_key] = cls._waiting.pop(slot_key)
+                        break
+                    cls._cond.wait(timeout=0.1)
+                Monitor.exception_on_abort()
+        except BaseException:
+            with cls._cond:
+                cls._waiting.pop(slot_key, None)
+                cls._cond.notify_all()
+            raise
+        try:
+            yield
+        finally:
+            with cls._cond:
+                cls._running.pop(slot_key, None)
+                cls._cond.notify_all()
+
+    @classmethod
+    def pause_point(cls, priority: GenerationPriority,
+                    key: str | None = None) -> None:
+        """
+        Called by background work between steps. Waits while interactive
+        work is waiting, running, or recently requested.
+
+        :param priority: Class of the caller's work
+        :param key: As passed to slot. Lets the caller run on when boosted.
+        :raises AbortException:
+        """
+        if priority == GenerationPriority.INTERACTIVE:
+            return
+        paused: bool = False
+        while True:
+            with cls._cond:
+                if (cls._effective_priority(key, priority) ==
+                        GenerationPriority.INTERACTIVE or
+                        not cls._interactive_active()):
+                    break
+                if not paused:
+                    paused = True
+                    cls.pauses += 1
+                cls._cond.wait(timeout=0.1)
+            Monitor.exception_on_abort()
+        if paused and MY_LOGGER.isEnabledFor(DEBUG_V):
+            MY_LOGGER.debug_v(f'resumed {priority.name} {key}')
+
+    @classmethod
+    def boost(cls, key: str, priority: GenerationPriority) -> None:
+        """
+        Raises the priority of waiting or running work with the given key to
+        at least priority. Used when more urgent work needs the result of
+        work already in progress.
+        """
+        prefix: str = f'{key}#'
+        with cls._cond:
+            for table in (cls._waiting, cls._running):
+                for slot_key, current in table.items():
+                    if slot_key.startswith(prefix) and priority < current:
+                        table[slot_key] = priority
+            cls._cond.notify_all()
+
+    @classmethod
+    def has_work(cls, priority: GenerationPriority) -> bool:
+        """
+        :return: True if any work of the given priority is waiting for, or
+                 holding, a slot
+        """
+        with cls._cond:
+            return (priority in cls._waiting.values() or
+                    priority in cls._running.values())
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int]:
+        with cls._cond:
+            stats: Dict[str, int] = {'pauses': cls.pauses,
+                                     'dropped': cls.dropped}
+            for priority in GenerationPriority:
+                priority: GenerationPriority
+                name: str = priority.name.lower()
+                stats[f'{name}_waiting'] = cls._count(cls._waiting, priority)
+                stats[f'{name}_running'] = cls._count(cls._running, priority)
+            return stats
+
+    @classmethod
+    def _can_run(cls, slot_key: str) -> bool:
+        """
+        Must be called with the lock held.
+        """
+        priority: GenerationPriority = cls._waiting[slot_key]
+        if cls._count(cls._running, priority) >= cls.limits[priority]:
+            return False
+        if priority == GenerationPriority.INTERACTIVE:
+            return True
+        for waiter in cls._waiting.values():
+            if waiter < priority:
+                return False
+        if cls._interactive_active():
+            return False
+        return len(cls._running) < Constants.VOICE_GENERATION_MAX_CONCURRENT
+
+    @classmethod
+    def _interactive_active(cls) -> bool:
+        """
+        Must be called with the lock held.
+        """
+        if (GenerationPriority.INTERACTIVE in cls._waiting.values() or
+                GenerationPriority.INTERACTIVE in cls._running.values()):
+            return True
+        return (time.monotonic() - cls._last_interactive <
+                Constants.GENERATION_INTERACTIVE_QUIET_SECONDS)
+
+    @classmethod
+    def _effective_priority(cls, key: str | None,
+                            priority: GenerationPriority) -> GenerationPriority:
+        """
+        Must be called with the lock held.
+        """
+        if key is None:
+            return priority
+        prefix: str = f'{key}#'
+        for slot_key, current in cls._running.items():
+            if slot_key.startswith(prefix):
+                priority = min(priority, current)
+        return priority
+
+    @staticmethod
+    def _count(table: Dict[str, GenerationPriority],
+               priority: GenerationPriority) -> int:
+        return sum(1 for value in table.values() if value == priority)
+
+
+WorkerPools.register_thread_state_reset(GenerationScheduler.clear_thread_state)
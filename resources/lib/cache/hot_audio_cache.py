@@ -0,0 +1,137 @@
+# coding=utf-8
+from __future__ import annotations
+
+import io
+import threading
+from pathlib import Path
+
+from common import *
+from common.constants import Constants
+from common.logger import *
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class HotAudioCache:
+    """
+    Small in-memory tier in front of the voice cache holding the encoded audio
+    of the most frequently spoken phrases ("OK", "Cancel", list positions,
+    etc.) so that they can be piped to a player without touching the disk.
+
+    Entries are keyed by the path of the audio file in the voice cache. Since
+    the path includes the engine, language, voice and md5 of the text, the
+    same text voiced differently is held separately.
+
+    Every open of a cached audio file is counted. A file is admitted once it
+    has been opened Constants.HOT_AUDIO_ADMIT_HITS times. When either the
+    byte or entry limit is exceeded, the entries with the fewest opens (the
+    least recently used among equals) are dropped. Counts are halved
+    whenever too many files are being tracked, so that old popularity fades.
+    """
+    _lock: threading.RLock = threading.RLock()
+    # path -> audio bytes. Ordered from least to most recently used
+    _entries: Dict[str, bytes] = {}
+    # path -> number of opens
+    _counts: Dict[str, int] = {}
+    _total_bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+
+    @classmethod
+    def open(cls, path: Path) -> BinaryIO:
+        """
+        Opens a cached audio file for reading, from memory when possible.
+
+        :param path: Path of audio file in the voice cache
+        :return: a binary stream positioned at the start of the audio
+        :raises OSError: if the file is not in memory and can not be read
+        """
+        data: bytes | None = cls.get(path)
+        if data is not None:
+            return io.BytesIO(data)
+        key: str = str(path)
+        with cls._lock:
+            admit: bool = cls._counts.get(key, 0) >= Constants.HOT_AUDIO_ADMIT_HITS
+        if not admit:
+            return path.open(mode='rb')
+        data = path.read_bytes()
+        cls.put(path, data)
+        return io.BytesIO(data)
+
+    @classmethod
+    def get(cls, path: Path) -> bytes | None:
+        """
+        :param path: Path of audio file in the voice cache
+        :return: The audio, if held in memory, otherwise None
+        """
+        key: str = str(path)
+        with cls._lock:
+            cls._counts[key] = cls._counts.get(key, 0) + 1
+            if len(cls._counts) > Constants.HOT_AUDIO_MAX_ENTRIES * 4:
+                cls._age_counts()
+            data: bytes | None = cls._entries.pop(key, None)
+            if data is None:
+                cls.misses += 1
+                return None
+            cls._entries[key] = data  # Now most recently used
+            cls.hits += 1
+            return data
+
+    @classmethod
+    def put(cls, path: Path, data: bytes) -> None:
+        """
+        Holds the audio for path in memory, subject to the limits.
+        """
+        if len(data) > Constants.HOT_AUDIO_MAX_ENTRY_BYTES:
+            return
+        key: str = str(path)
+        with cls._lock:
+            previous: bytes | None = cls._entries.pop(key, None)
+            if previous is not None:
+                cls._total_bytes -= len(previous)
+            cls._entries[key] = data
+            cls._total_bytes += len(data)
+            while (cls._total_bytes > Constants.HOT_AUDIO_MAX_BYTES or
+                   len(cls._entries) > Constants.HOT_AUDIO_MAX_ENTRIES):
+                # Never the entry just added, which may have fewer opens than
+                # those it displaces
+                victim: str | None = min((k for k in cls._entries if k != key),
+                                         key=lambda k: cls._counts.get(k, 0),
+                                         default=None)
+                if victim is None:
+                    break
+                cls._total_bytes -= len(cls._entries.pop(victim))
+        if MY_LOGGER.isEnabledFor(DEBUG_V):
+            MY_LOGGER.debug_v(f'hot: {path} size: {len(data)}')
+
+    @classmethod
+    def discard(cls, path: Path) -> None:
+        """
+        Forgets the audio for path. Called whenever the file changes or is
+        removed from the voice cache.
+        """
+        key: str = str(path)
+        with cls._lock:
+            data: bytes | None = cls._entries.pop(key, None)
+            if data is not None:
+                cls._total_bytes -= len(data)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            return {'entries': len(cls._entries),
+                    'bytes': cls._total_bytes,
+                    'hits': cls.hits,
+                    'misses': cls.misses}
+
+    @classmethod
+    def _age_counts(cls) -> None:
+        """
+        Halves every count, forgetting files which drop to zero. Must be
+        called with the lock held.
+        """
+        aged: Dict[str, int] = {}
+        for key, count in cls._counts.items():
+            if count > 1 or key in cls._entries:
+                aged[key] = max(1, count // 2)
+        cls._counts = aged
@@ -7,6 +7,7 @@ from backends.settings.service_types import ServiceID
 from common import *
 
 from backends.audio.sound_capabilities import SoundCapabilities
+from cache.generation_scheduler import GenerationPriority, GenerationScheduler
 from cache.prefetch_movie_data.db_access import DBAccess
 from cache.prefetch_movie_data.parse_library import ParseLibrary
 from cache.voicecache import VoiceCache
@@ -40,7 +41,7 @@ class SeedCache:
         :return:
         """
         try:
-
+            GenerationScheduler.set_priority(GenerationPriority.BULK)
             cls.voice_cache_instance = VoiceCache(engine_key)
 
             query: str = DBAccess.create_details_query()
@@ -61,6 +62,7 @@ class SeedCache:
                     timeout: float
                     timeout = Constants.SEED_CACHE_MOVIE_INFO_DELAY_BETWEEN_QUERY_SECONDS
                     Monitor.exception_on_abort(timeout=timeout)
+                    GenerationScheduler.pause_point(GenerationPriority.BULK)
                     movie = ParseLibrary.parse_movie(is_sparse=False,
                                                      raw_movie=raw_movie)
                     '''
@@ -0,0 +1,182 @@
+# coding=utf-8
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+from cache.hot_audio_cache import HotAudioCache
+from cache.voice_cache_manifest import VoiceCacheManifest
+from common import *
+from common.logger import *
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class VoiceCacheIndex:
+    """
+    In-memory index of the files in the voice cache. Avoids probing the
+    filesystem (exists, stat, glob, access) each time a phrase is looked up.
+
+    Cache files are organized:
+      <cache_path>/<engine_code>/<lang>/<territory>/<voice>/<xx>/<md5>.<suffix>
+
+    A 'shard' is the <xx> directory. The path of a shard uniquely identifies
+    (engine cache suffix, lang, territory, voice) so that the index is keyed by
+    (shard directory, md5). Each entry maps the suffixes present for the md5
+    (audio suffixes as well as '.txt') to the size of the file.
+
+    A shard is read from disk (with a single scandir) the first time that any
+    entry in it is referenced. Afterward, it is kept up to date by the code
+    which writes or deletes cache files, through record_file and discard_file,
+    which also maintain the persistent VoiceCacheManifest.
+    """
+    # Key is full path of shard directory. Value is map of md5 ->
+    # {suffix: file size}
+    _shards: Dict[str, Dict[str, Dict[str, int]]] = {}
+    _lock: threading.RLock = threading.RLock()
+    hits: int = 0
+    misses: int = 0
+
+    @classmethod
+    def lookup(cls, shard_dir: Path, md5: str) -> Dict[str, int]:
+        """
+        Returns the files present in the cache for the given md5.
+
+        :param shard_dir: <cache_path>/<engine_code>/<lang>/<territory>/<voice>/<xx>
+        :param md5: hash of the text of the phrase
+        :return: A copy of the map of suffix -> file size for every file
+                 in the shard with the given md5 name. An empty map is returned
+                 when no files exist.
+        """
+        with cls._lock:
+            shard: Dict[str, Dict[str, int]] | None = cls._shards.get(str(shard_dir))
+            if shard is None:
+                cls.misses += 1
+                shard = cls._load_shard(shard_dir)
+            else:
+                cls.hits += 1
+            return dict(shard.get(md5, {}))
+
+    @classmethod
+    def record_file(cls, path: Path, size: int | None = None,
+                    text_len: int = 0) -> None:
+        """
+        Notes that a cache file has been written. Called by code which creates
+        audio or text files in the cache. The file is also recorded in the
+        persistent VoiceCacheManifest.
+
+        :param path: Path of the newly written file
+        :param size: Size of the file. If None, then stat is used to get the size
+        :param text_len: Length of the voiced text, when known
+        """
+        md5, suffix = cls._split_name(path)
+        if md5 is None:
+            return
+        HotAudioCache.discard(path)
+        try:
+            if size is None:
+                size = path.stat().st_size
+        except OSError:
+            cls.discard_file(path)
+            return
+        with cls._lock:
+            shard: Dict[str, Dict[str, int]] | None
+            shard = cls._shards.get(str(path.parent))
+            # When the shard is not yet known it will be read from disk on
+            # first reference
+            if shard is not None:
+                shard.setdefault(md5, {})[suffix] = size
+        VoiceCacheManifest.record(path, size, text_len=text_len)
+        if MY_LOGGER.isEnabledFor(DEBUG_V):
+            MY_LOGGER.debug_v(f'recorded: {path} size: {size}')
+
+    @classmethod
+    def discard_file(cls, path: Path) -> None:
+        """
+        Notes that a cache file has been deleted.
+
+        :param path: Path of the deleted file
+        """
+        md5, suffix = cls._split_name(path)
+        if md5 is None:
+            return
+        with cls._lock:
+            shard: Dict[str, Dict[str, int]] | None
+            shard = cls._shards.get(str(path.parent))
+            if shard is not None:
+                entry: Dict[str, int] | None = shard.get(md5)
+                if entry is not None:
+                    entry.pop(suffix, None)
+                    if len(entry) == 0:
+                        del shard[md5]
+        HotAudioCache.discard(path)
+        VoiceCacheManifest.discard(path)
+
+    @classmethod
+    def invalidate(cls, shard_dir: Path | None = None) -> None:
+        """
+        Forgets what is known about a shard (or every shard) so that it will be
+        re-read from disk on next reference.
+
+        :param shard_dir: shard to forget. If None, then forget all shards
+        """
+        with cls._lock:
+            if shard_dir is None:
+                cls._shards.clear()
+            else:
+                cls._shards.pop(str(shard_dir), None)
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            return {'shards': len(cls._shards),
+                    'hits': cls.hits,
+                    'misses': cls.misses}
+
+    @classmethod
+    def _split_name(cls, path: Path) -> Tuple[str | None, str | None]:
+        """
+        See VoiceCacheManifest.split_name
+        """
+        return VoiceCacheManifest.split_name(path.name)
+
+    @classmethod
+    def _load_shard(cls, shard_dir: Path) -> Dict[str, Dict[str, int]]:
+        """
+        Reads a shard directory from disk. Creates the directory if it
+        does not exist. Must be called with the lock held.
+
+        :param shard_dir:
+        :return:
+        """
+        shard: Dict[str, Dict[str, int]] = {}
+        try:
+            shard_dir.mkdir(mode=0o777, exist_ok=True, parents=True)
+        except Exception:
+            MY_LOGGER.error(f'Can not create directory: {shard_dir}')
+            return shard
+        try:
+            with os.scandir(shard_dir) as it:
+                for dir_entry in it:
+                    dir_entry: os.DirEntry
+                    md5, suffix = cls._split_name(Path(dir_entry.name))
+                    if md5 is None:
+                        continue
+                    if dir_entry.is_dir():
+                        msg = (f'Ignoring cached voice file: {dir_entry.path}. It is'
+                               f' a directory.')
+                        MY_LOGGER.showNotification(msg)
+                        continue
+                    if not os.access(dir_entry.path, os.R_OK):
+                        msg = (f'Ignoring cached voice file: {dir_entry.path}. No'
+                               f' read access.')
+                        MY_LOGGER.showNotification(msg)
+                        continue
+                    shard.setdefault(md5, {})[suffix] = dir_entry.stat().st_size
+        except OSError:
+            MY_LOGGER.exception(f'Can not read directory: {shard_dir}')
+        cls._shards[str(shard_dir)] = shard
+        if MY_LOGGER.isEnabledFor(DEBUG_V):
+            MY_LOGGER.debug_v(f'loaded shard: {shard_dir} entries: {len(shard)}')
+        return shard
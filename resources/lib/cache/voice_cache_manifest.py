@@ -0,0 +1,417 @@
+# coding=utf-8
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from common import *
+from common.logger import *
+from common.monitor import Monitor
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class ManifestEntry(NamedTuple):
+    shard: str
+    md5: str
+    suffix: str
+    size: int
+    text_len: int
+    created: float
+    last_hit: float
+    hit_count: int
+
+    @property
+    def path(self) -> Path:
+        return Path(self.shard) / f'{self.md5}{self.suffix}'
+
+
+class VoiceCacheManifest:
+    """
+    Persistent record of every file in the voice cache, kept in a single
+    SQLite (WAL mode) database alongside the cache.
+
+    Cache files are organized:
+      <cache_path>/<engine_code>/<lang>/<territory>/<voice>/<xx>/<md5>.<suffix>
+
+    One row is kept per file. A row records the shard (the full path of the
+    <xx> directory), md5, suffix (audio format, or '.txt'), size in bytes,
+    length of the text that was voiced, creation and last-hit times and the
+    number of hits. Queries against the manifest replace walking the cache
+    tree.
+
+    Hits are frequent, so they are accumulated in memory and written in
+    batches by a background thread.
+    """
+    SCHEMA_VERSION: Final[int] = 1
+    FLUSH_SECONDS: Final[float] = 30.0
+    MANIFEST_NAME: Final[str] = 'voice_cache_manifest.sqlite'
+
+    _db_path: Path | None = None
+    _connection: sqlite3.Connection | None = None
+    _lock: threading.RLock = threading.RLock()
+    # (shard, md5, suffix) -> [hit count, time of last hit]
+    _pending_hits: Dict[Tuple[str, str, str], List[float]] = {}
+    _scanning_roots: Dict[str, None] = {}  # Acts as a set
+    _failed: bool = False
+    _HEX_DIGITS: Final[str] = '0123456789abcdef'
+
+    @classmethod
+    def class_init(cls, cache_top: Path) -> None:
+        """
+        Opens (creating if needed) the manifest in the given directory and
+        starts the thread which flushes hit statistics.
+
+        :param cache_top: Directory containing the manifest, normally the
+                          top of the cache
+        """
+        with cls._lock:
+            if cls._connection is not None or cls._failed:
+                return
+            try:
+                cache_top.mkdir(mode=0o777, parents=True, exist_ok=True)
+                cls._db_path = cache_top / cls.MANIFEST_NAME
+                connection: sqlite3.Connection
+                connection = sqlite3.connect(str(cls._db_path),
+                                             check_same_thread=False,
+                                             isolation_level=None)
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('PRAGMA synchronous=NORMAL')
+                version: int = connection.execute('PRAGMA user_version').fetchone()[0]
+                if version != cls.SCHEMA_VERSION:
+                    connection.execute('DROP TABLE IF EXISTS entries')
+                    connection.execute('DROP TABLE IF EXISTS scanned_roots')
+                    connection.execute(
+                        'CREATE TABLE entries ('
+                        ' shard TEXT NOT NULL,'
+                        ' md5 TEXT NOT NULL,'
+                        ' suffix TEXT NOT NULL,'
+                        ' size INTEGER NOT NULL DEFAULT 0,'
+                        ' text_len INTEGER NOT NULL DEFAULT 0,'
+                        ' created REAL NOT NULL,'
+                        ' last_hit REAL NOT NULL,'
+                        ' hit_count INTEGER NOT NULL DEFAULT 0,'
+                        ' PRIMARY KEY (shard, md5, suffix))')
+                    connection.execute('CREATE INDEX entries_last_hit'
+                                       ' ON entries (last_hit)')
+                    connection.execute('CREATE TABLE scanned_roots ('
+                                       ' root TEXT PRIMARY KEY, scanned REAL)')
+                    connection.execute(f'PRAGMA user_version={cls.SCHEMA_VERSION}')
+                cls._connection = connection
+            except Exception:
+                MY_LOGGER.exception(f'Can not open voice cache manifest: '
+                                    f'{cls._db_path}')
+                cls._failed = True
+                return
+        from utils.util import runInThread
+        runInThread(cls._flush_thread, name='mnfstFlsh', delay=0.0)
+
+    @classmethod
+    def split_name(cls, name: str) -> Tuple[str | None, str | None]:
+        """
+        Splits the name of a cache file into its md5 and suffix.
+
+        Temp files (<md5>.tmp.<suffix>) and anything else not of the form
+        <md5>.<suffix> are rejected.
+
+        :return: md5, suffix (including the leading '.'), or None, None
+        """
+        parts: List[str] = name.split('.')
+        if (len(parts) != 2 or len(parts[0]) != 32 or parts[1] == ''
+                or not all(c in cls._HEX_DIGITS for c in parts[0])):
+            return None, None
+        return parts[0], f'.{parts[1]}'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return cls._connection is not None
+
+    @classmethod
+    def is_scanned(cls, top: Path) -> bool:
+        """
+        :param top: Directory of the cache tree (any level)
+        :return: True if the manifest is complete for top: the scan of the
+                 root containing top has finished. Until then, queries
+                 return only what has been recorded so far.
+        """
+        if not cls.is_available():
+            return False
+        top_str: str = str(top)
+        try:
+            with cls._lock:
+                rows = cls._connection.execute(
+                        'SELECT root FROM scanned_roots').fetchall()
+        except sqlite3.Error:
+            MY_LOGGER.exception(f'top: {top}')
+            return False
+        for (root,) in rows:
+            if top_str == root or top_str.startswith(f'{root}{os.sep}'):
+                return True
+        return False
+
+    @classmethod
+    def ensure_scanned(cls, root: Path) -> None:
+        """
+        Populates the manifest with the contents of an existing cache tree
+        the first time that the tree is seen. The walk is done once, in
+        the background. Afterward the manifest is maintained incrementally.
+
+        :param root: top of an engine's cache (<cache_path>/<engine_code>)
+        """
+        if not cls.is_available():
+            return
+        root_str: str = str(root)
+        with cls._lock:
+            if root_str in cls._scanning_roots:
+                return
+            cls._scanning_roots[root_str] = None
+            row = cls._connection.execute(
+                    'SELECT scanned FROM scanned_roots WHERE root = ?',
+                    (root_str,)).fetchone()
+            if row is not None:
+                return
+        from utils.util import run_in_pool
+        from common.worker_pool import WorkerPools
+        run_in_pool(WorkerPools.IO, cls._scan_root, name='mnfstScn', root=root)
+
+    @classmethod
+    def record(cls, path: Path, size: int, text_len: int = 0) -> None:
+        """
+        Records that a cache file has been written.
+
+        :param path: Path of file in cache
+        :param size: Size of the file in bytes
+        :param text_len: Length of the text that was voiced, when known
+        """
+        if not cls.is_available():
+            return
+        now: float = time.time()
+        try:
+            with cls._lock:
+                cls._connection.execute(
+                    'INSERT INTO entries (shard, md5, suffix, size, text_len,'
+                    ' created, last_hit, hit_count)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, 0)'
+                    ' ON CONFLICT (shard, md5, suffix) DO UPDATE SET'
+                    ' size = excluded.size,'
+                    ' text_len = MAX(entries.text_len, excluded.text_len),'
+                    ' created = excluded.created',
+                    (str(path.parent), path.stem, path.suffix, size, text_len,
+                     now, now))
+        except sqlite3.Error:
+            MY_LOGGER.exception(f'path: {path}')
+
+    @classmethod
+    def discard(cls, path: Path) -> None:
+        """
+        Records that a cache file has been removed.
+
+        :param path: Path of file that is no longer in the cache
+        """
+        if not cls.is_available():
+            return
+        try:
+            with cls._lock:
+                cls._pending_hits.pop((str(path.parent), path.stem, path.suffix),
+                                      None)
+                cls._connection.execute(
+                    'DELETE FROM entries WHERE shard = ? AND md5 = ? AND suffix = ?',
+                    (str(path.parent), path.stem, path.suffix))
+        except sqlite3.Error:
+            MY_LOGGER.exception(f'path: {path}')
+
+    @classmethod
+    def note_hit(cls, shard_dir: Path, md5: str, suffix: str) -> None:
+        """
+        Records that a cache entry was used. The hit is written to the
+        database later.
+        """
+        if not cls.is_available():
+            return
+        key: Tuple[str, str, str] = (str(shard_dir), md5, suffix)
+        with cls._lock:
+            hit: List[float] | None = cls._pending_hits.get(key)
+            if hit is None:
+                cls._pending_hits[key] = [1, time.time()]
+            else:
+                hit[0] += 1
+                hit[1] = time.time()
+
+    @classmethod
+    def find_unvoiced(cls, top: Path, audio_suffix: str) -> List[Path]:
+        """
+        Finds the .txt files under top which do not have a corresponding
+        audio file of the given type.
+
+        :param top: Directory to search (any level of the cache tree)
+        :param audio_suffix: ex. '.mp3'
+        :return: Paths to the .txt files
+        """
+        if not cls.is_available():
+            return []
+        top_str: str = str(top)
+        try:
+            with cls._lock:
+                rows = cls._connection.execute(
+                    'SELECT t.shard, t.md5 FROM entries t'
+                    ' WHERE t.suffix = \'.txt\' AND t.size > 0'
+                    ' AND (t.shard = ? OR t.shard LIKE ? ESCAPE \'\\\')'
+                    ' AND NOT EXISTS (SELECT 1 FROM entries a'
+                    '  WHERE a.shard = t.shard AND a.md5 = t.md5'
+                    '  AND a.suffix = ?)',
+                    (top_str, cls._like_prefix(top_str), audio_suffix)).fetchall()
+        except sqlite3.Error:
+            MY_LOGGER.exception(f'top: {top}')
+            return []
+        return [Path(shard) / f'{md5}.txt' for shard, md5 in rows]
+
+    @classmethod
+    def get_entries(cls, top: Path | None = None,
+                    order_by: str = 'last_hit') -> List[ManifestEntry]:
+        """
+        Returns the manifest entries under top, ordered by the given column.
+
+        :param top: Directory to search. If None, then all entries
+        :param order_by: one of the column names of ManifestEntry
+        :return:
+        """
+        if not cls.is_available():
+            return []
+        assert order_by in ManifestEntry._fields, f'bad column: {order_by}'
+        cls.flush()
+        query: str = ('SELECT shard, md5, suffix, size, text_len, created,'
+                      ' last_hit, hit_count FROM entries')
+        args: Tuple = ()
+        if top is not None:
+            query += ' WHERE shard = ? OR shard LIKE ? ESCAPE \'\\\''
+            args = (str(top), cls._like_prefix(str(top)))
+        query += f' ORDER BY {order_by}'
+        try:
+            with cls._lock:
+                rows = cls._connection.execute(query, args).fetchall()
+        except sqlite3.Error:
+            MY_LOGGER.exception('')
+            return []
+        return [ManifestEntry(*row) for row in rows]
+
+    @classmethod
+    def get_totals(cls) -> Tuple[int, int]:
+        """
+        :return: number of files and total bytes recorded in the manifest
+        """
+        if not cls.is_available():
+            return 0, 0
+        with cls._lock:
+            count, total = cls._connection.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return count, total
+
+    @classmethod
+    def flush(cls) -> None:
+        """
+        Writes accumulated hit statistics to the database.
+        """
+        if not cls.is_available():
+            return
+        with cls._lock:
+            if len(cls._pending_hits) == 0:
+                return
+            hits = [(count, last_hit, shard, md5, suffix)
+                    for (shard, md5, suffix), (count, last_hit)
+                    in cls._pending_hits.items()]
+            cls._pending_hits.clear()
+            try:
+                cls._connection.execute('BEGIN')
+                cls._connection.executemany(
+                    'UPDATE entries SET hit_count = hit_count + ?, last_hit = ?'
+                    ' WHERE shard = ? AND md5 = ? AND suffix = ?', hits)
+                cls._connection.execute('COMMIT')
+            except sqlite3.Error:
+                MY_LOGGER.exception('')
+                try:
+                    cls._connection.execute('ROLLBACK')
+                except sqlite3.Error:
+                    pass
+
+    @classmethod
+    def _like_prefix(cls, top: str) -> str:
+        """
+        :return: LIKE pattern matching every path below the directory top
+        """
+        escaped: str = (f'{top}{os.sep}'.replace('\\', '\\\\')
+                        .replace('%', '\\%').replace('_', '\\_'))
+        return f'{escaped}%'
+
+    @classmethod
+    def _flush_thread(cls) -> None:
+        try:
+            while not Monitor.wait_for_abort(cls.FLUSH_SECONDS):
+                cls.flush()
+        finally:
+            cls.flush()
+
+    @classmethod
+    def _scan_root(cls, root: Path) -> None:
+        """
+        Walks an existing cache tree once, recording every file found.
+        """
+        if MY_LOGGER.isEnabledFor(DEBUG):
+            MY_LOGGER.debug(f'Scanning cache: {root}')
+        rows: List[Tuple[str, str, str, int, float, float]] = []
+        try:
+            for dir_path, _, files in os.walk(root):
+                Monitor.exception_on_abort(timeout=0.0)
+                for file in files:
+                    md5, suffix = cls.split_name(file)
+                    if md5 is None:  # Skip temp files and strays
+                        continue
+                    try:
+                        stat_result: os.stat_result = os.stat(os.path.join(dir_path,
+                                                                           file))
+                    except OSError:
+                        continue
+                    rows.append((dir_path, md5, suffix,
+                                 stat_result.st_size, stat_result.st_mtime,
+                                 stat_result.st_atime))
+                if len(rows) > 1000:
+                    cls._insert_scanned(rows)
+                    rows = []
+            cls._insert_scanned(rows)
+            with cls._lock:
+                cls._connection.execute(
+                        'INSERT OR REPLACE INTO scanned_roots (root, scanned)'
+                        ' VALUES (?, ?)', (str(root), time.time()))
+        except AbortException:
+            reraise(*sys.exc_info())
+        except Exception:
+            MY_LOGGER.exception(f'root: {root}')
+        finally:
+            with cls._lock:
+                cls._scanning_roots.pop(str(root), None)
+
+    @classmethod
+    def _insert_scanned(cls, rows: List[Tuple[str, str, str, int, float, float]]
+                        ) -> None:
+        if len(rows) == 0:
+            return
+        with cls._lock:
+            cls._connection.execute('BEGIN')
+            try:
+                # Entries already recorded (by a writer racing the scan) are kept
+                cls._connection.executemany(
+                    'INSERT OR IGNORE INTO entries (shard, md5, suffix, size,'
+                    ' created, last_hit) VALUES (?, ?, ?, ?, ?, ?)', rows)
+                cls._connection.execute('COMMIT')
+            except sqlite3.Error:
+                # Leave no transaction open, or every later BEGIN fails.
+                # The scan fails and the root is scanned again next time
+                try:
+                    cls._connection.execute('ROLLBACK')
+                except sqlite3.Error:
+                    pass
+                reraise(*sys.exc_info())
@@ -18,7 +18,10 @@ import xbmcvfs
 
 from backends.settings.service_types import (MyType, ServiceID, ServiceKey, ServiceType,
                                              TTS_Type)
+from cache.cache_eviction import CacheEvictor
 from cache.common_types import CacheEntryInfo
+from cache.voice_cache_index import VoiceCacheIndex
+from cache.voice_cache_manifest import VoiceCacheManifest
 from common import *
 from common.constants import Constants
 from common.exceptions import ExpiredException
@@ -53,6 +56,8 @@ class VoiceCache:
 
     @classmethod
     def init_thread(cls):
+        VoiceCacheManifest.class_init(Constants.DEFAULT_CACHE_DIRECTORY)
+        CacheEvictor.start()
         runInThread(cls.rotate_tmp_dir_thrd, args=[], name='cln_tmp_dir')
 
     def __init__(self, service_key: ServiceID, reset_engine_each_call=False):
@@ -102,6 +107,7 @@ class VoiceCache:
         except Exception as e:
             MY_LOGGER.exception('')
         self._top_of_engine_cache = Path(cache_directory)
+        VoiceCacheManifest.ensure_scanned(self._top_of_engine_cache)
         return
 
     @classmethod
@@ -327,67 +333,36 @@ class VoiceCache:
             final_audio_path = cache_path.with_suffix(self.audio_suffix)
             if MY_LOGGER.isEnabledFor(DEBUG):
                 MY_LOGGER.debug(f'final_audio_path: {final_audio_path}')
-            audio_exists = final_audio_path.exists()
-            if audio_exists:
-                if final_audio_path.stat().st_size < 1000:
-                    audio_exists = False
-                    try:
-                        final_audio_path.unlink(missing_ok=True)
-                    except Exception:
-                        MY_LOGGER.exception('')
             phrase.set_audio_type(self.audio_type)
-            if not cache_dir.exists():
-                try:
-                    if MY_LOGGER.isEnabledFor(DEBUG_V):
-                        MY_LOGGER.debug_v(f'mkdir: {cache_dir}')
-                    cache_dir.mkdir(mode=0o777, exist_ok=True, parents=True)
-                except Exception:
-                    MY_LOGGER.error(f'Can not create directory: {cache_dir}')
-                    return CacheEntryInfo(final_audio_path=None,
-                                          use_cache=use_cache,
-                                          temp_voice_path=None,
-                                          audio_exists=False,
-                                          text_exists=None,
-                                          audio_suffixes=audio_suffixes)
-            #  MY_LOGGER.debug(f'cache_dir: {cache_dir}')
-            for file in cache_dir.glob(f'{filename}.*'):
-                file: Path
-                if file.is_dir():
-                    msg = (f'Ignoring cached voice file: {file}. It is'
-                           f' a directory.')
-                    MY_LOGGER.showNotification(msg)
-                    continue
-                if not os.access(file, os.R_OK):
-                    msg = (f'Ignoring cached voice file: {file}. No read'
-                           f' access.')
-                    MY_LOGGER.showNotification(msg)
-                    continue
 
-                suffix: str = file.suffix
+            # The index reads the shard directory on first reference and is
+            # kept current by the writers of cache files. No filesystem access
+            # is needed once the shard is known.
+            files: Dict[str, int] = VoiceCacheIndex.lookup(cache_dir, filename)
+            for suffix, size in files.items():
                 if suffix == '.txt':
-                    if file.stat().st_size > 0:
+                    if size > 0:
                         text_exists = True
                     else:
                         if MY_LOGGER.isEnabledFor(DEBUG):
-                            MY_LOGGER.debug(f'Text file empty: {file}')
-                else:
-                    audio_suffixes.append(suffix)
-                    if suffix == self.audio_suffix:
-                        audio_exists = file.exists()
-                        audio_good: bool
-                        if audio_exists:
-                            audio_good = file.stat().st_size > 1000
-                            if not audio_good:
-                                try:
-                                    file.unlink(missing_ok=True)
-                                    audio_exists = False
-                                except PermissionError:
-                                    if MY_LOGGER.isEnabledFor(DEBUG):
-                                        MY_LOGGER.debug(f'Can not delete {file} '
-                                                        f'due to permissions')
-                                except:
-                                    MY_LOGGER.exception('Error deleting: '
-                                                        f'{file}')
+                            MY_LOGGER.debug(f'Text file empty: {filename}{suffix}')
+                    continue
+                if suffix == self.audio_suffix and size <= 1000:
+                    try:
+                        final_audio_path.unlink(missing_ok=True)
+                        VoiceCacheIndex.discard_file(final_audio_path)
+                    except PermissionError:
+                        if MY_LOGGER.isEnabledFor(DEBUG):
+                            MY_LOGGER.debug(f'Can not delete {final_audio_path} '
+                                            f'due to permissions')
+                    except:
+                        MY_LOGGER.exception('Error deleting: '
+                                            f'{final_audio_path}')
+                    continue
+                audio_suffixes.append(suffix)
+                if suffix == self.audio_suffix:
+                    audio_exists = True
+                    VoiceCacheManifest.note_hit(cache_dir, filename, suffix)
             if not audio_exists:
                 rc, temp_voice_path, _ = self.create_tmp_sound_file(
                         final_audio_path, delete_if_exists=True)
@@ -509,37 +484,36 @@ class VoiceCache:
             MY_LOGGER.exception('')
         return use_cache
 
+    @classmethod
+    def record_cache_file(cls, path: Path, text_len: int = 0) -> None:
+        """
+        Informs the cache that a file has been written into it, so that
+        future lookups do not need to go to the filesystem and so that the
+        manifest knows about it.
+
+        :param path: Path of the audio or text file just written
+        :param text_len: Length of the text voiced, when known
+        """
+        if not cls.is_tmp_file(path):
+            VoiceCacheIndex.record_file(path, text_len=text_len)
+
     @classmethod
     def get_hash(cls, text_to_voice: str) -> str:
         hash_value: str = hashlib.md5(
                 text_to_voice.encode('UTF-8')).hexdigest()
         return hash_value
 
-    def clean_cache(self, purge: bool = False) -> None:
-        clz = type(self)
-        return
-    '''
-        try:
-            dummy_cached_file: str = self.get_path_to_voice_file('', '')
-            cache_directory, _ = os.path.split(dummy_cached_file)
-            expiration_time = time.time() - \
-                              Settings.getSetting(
-                                      SettingProp.CACHE_EXPIRATION_DAYS,
-                                      SettingProp.TTS_SERVICE, 30) * 86400
-            for root, dirs, files in os.walk(cache_directory, topdown=False):
-                for file in files:
-                    try:
-                        path = os.path.join(root, file)
-                        if purge or os.stat(path).st_mtime < expiration_time:
-                            MY_LOGGER.debug_v('Deleting: {}'.format(path))
-                            os.remove(path)
-                    except Exception as e:
-                        pass
-        except AbortException:
-            reraise(*sys.exc_info())
-        except Exception as e:
-            MY_LOGGER.exception('')
-    '''
+    @classmethod
+    def clean_cache(cls, purge: bool = False) -> None:
+        """
+        Requests that the cache be trimmed to its size budget and that
+        expired entries be removed. The work is done by CacheEvictor in the
+        background; this call does not wait.
+
+        :param purge: When True, empty the cache (except for the predefined
+                      cache)
+        """
+        CacheEvictor.request_pass(purge=purge)
 
     def seed_text_cache(self, phrases: PhraseList) -> None:
         """
@@ -591,15 +565,22 @@ class VoiceCache:
             if MY_LOGGER.isEnabledFor(DEBUG):
                 MY_LOGGER.debug(f'text_file path: {text_file}')
             try:
-                if not text_file.is_file():
-                    with text_file.open('wt', encoding='utf-8') as f:
-                        f.write(text)
+                text_size: int | None = None
+                if VoiceCache.is_tmp_file(text_file):
+                    if text_file.is_file():
+                        text_size = text_file.stat().st_size
                 else:
-                    if text_file.stat().st_size < len(phrase.text):
-                        text_file.unlink(missing_ok=True)
-                if not text_file.is_file():
+                    files: Dict[str, int]
+                    files = VoiceCacheIndex.lookup(text_file.parent, text_file.stem)
+                    text_size = files.get('.txt')
+                if text_size is not None and text_size < len(phrase.text):
+                    text_file.unlink(missing_ok=True)
+                    VoiceCacheIndex.discard_file(text_file)
+                    text_size = None
+                if text_size is None:
                     with text_file.open('wt', encoding='utf-8') as f:
                         f.write(text)
+                    VoiceCache.record_cache_file(text_file, text_len=len(text))
             except Exception as e:
                 if MY_LOGGER.isEnabledFor(ERROR):
                     MY_LOGGER.error(
@@ -94,6 +94,83 @@ class Constants:
     # Don't voice while video is playing
     STOP_ON_PLAY: bool = True
 
+    # Voice cache eviction. Entries unused for longer than the
+    # cache_expiration_days setting are removed. Additionally, the least
+    # valuable entries are removed until the cache fits within
+    # CACHE_MAX_BYTES * CACHE_LOW_WATER_FRACTION. Value is a blend of recency
+    # and hit count: each doubling of hits is worth CACHE_HIT_WEIGHT_SECONDS
+    # of recency.
+    CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    CACHE_LOW_WATER_FRACTION: float = 0.9
+    CACHE_HIT_WEIGHT_SECONDS: float = 7 * 24 * 60 * 60.0
+    CACHE_EVICTION_START_DELAY_SECONDS: float = 10 * 60.0
+    CACHE_EVICTION_INTERVAL_SECONDS: float = 60 * 60.0
+    CACHE_EVICTION_BATCH_SIZE: int = 50
+
+    # In-memory tier for the audio of the most frequently spoken phrases.
+    # See HotAudioCache
+    HOT_AUDIO_MAX_BYTES: int = 8 * 1024 * 1024
+    HOT_AUDIO_MAX_ENTRIES: int = 256
+    HOT_AUDIO_MAX_ENTRY_BYTES: int = 256 * 1024
+    HOT_AUDIO_ADMIT_HITS: int = 3
+
+    # Chunks of a long phrase are downloaded from Google concurrently by at
+    # most this many threads sharing one keep-alive session. See DownloadPool
+    GOOGLE_DOWNLOAD_WORKERS: int = 4
+    # Seconds to wait for Google to connect or to send data
+    GOOGLE_DOWNLOAD_TIMEOUT_SECONDS: float = 20.0
+    # Maximum number of different phrases being voiced into the cache at the
+    # same time by background work (prefetch and bulk). Interactive work is
+    # only limited by GENERATION_MAX_INTERACTIVE. See GenerationScheduler
+    VOICE_GENERATION_MAX_CONCURRENT: int = 3
+    GENERATION_MAX_INTERACTIVE: int = 3
+    GENERATION_MAX_PREFETCH: int = 2
+    GENERATION_MAX_BULK: int = 1
+    # Background work is paused for this long after the user last asked for
+    # something to be voiced
+    GENERATION_INTERACTIVE_QUIET_SECONDS: float = 2.0
+    # Longest wait for the persistent eSpeak synthesizer to voice a phrase
+    # before running espeak-ng instead. See ESpeakSynthesizer
+    ESPEAK_SYNTH_TIMEOUT_SECONDS: float = 30.0
+    # Maximum number of windows kept parsed and include-expanded. See
+    # WindowParserCache
+    WINDOW_PARSER_CACHE_ENTRIES: int = 16
+    # Shortly after start, the most visited windows missing from the
+    # SkinModelStore are parsed and stored in the background
+    SKIN_PRECOMPILE_DELAY_SECONDS: float = 60.0
+    SKIN_PRECOMPILE_WINDOWS: int = 12
+    # WindowStateMonitor checks the GUI at once when Kodi or a keymap sends a
+    # notification. Otherwise it polls, every GUI_POLL_MIN_SECONDS just after
+    # a change, slowing by GUI_POLL_BACKOFF per idle poll to at most
+    # GUI_POLL_MAX_SECONDS
+    GUI_POLL_MIN_SECONDS: float = 0.05
+    GUI_POLL_MAX_SECONDS: float = 0.4
+    GUI_POLL_BACKOFF: float = 1.5
+    # Once focus has stayed on an item of a list for LIST_PREFETCH_SETTLE_SECONDS,
+    # the items near it are voiced in the background. Enough items are voiced
+    # to cover LIST_PREFETCH_HORIZON_SECONDS of scrolling at the recent speed.
+    # See ListPrefetcher
+    LIST_PREFETCH_SETTLE_SECONDS: float = 0.3
+    LIST_PREFETCH_HORIZON_SECONDS: float = 2.0
+    LIST_PREFETCH_MIN_DEPTH: int = 1
+    LIST_PREFETCH_MAX_DEPTH: int = 6
+    # Most threads of each WorkerPools pool, by pool name. Idle workers end
+    # after WORKER_POOL_IDLE_SECONDS
+    WORKER_POOL_THREADS: Dict[str, int] = {'io': 3,
+                                           'cpu': 2,
+                                           'subprocess': 3}
+    WORKER_POOL_IDLE_SECONDS: float = 30.0
+    # Record where each Phrase was created, for Phrase.get_debug_info. Can be
+    # changed at run time with PhraseProvenance.set_enabled
+    PHRASE_PROVENANCE: bool = True
+    # Most recent events kept by each Phrase (see Phrase.add_event). Can be
+    # changed at run time with Phrase.set_event_capacity
+    PHRASE_EVENT_CAPACITY: int = 8
+    # Most texts, and longest text, whose markup-free form is remembered by
+    # Phrase.clean_phrase_text
+    PHRASE_CLEAN_MEMO_ENTRIES: int = 4096
+    PHRASE_CLEAN_MEMO_MAX_LENGTH: int = 200
+
     SEED_CACHE_WITH_EXPIRED_PHRASES: bool = False
     # Maximum number of directories to search for un-voiced text files
     SEED_CACHE_DIR_LIMIT: int = 10
@@ -95,6 +95,12 @@ class Delay:
 
 
 class FindTextToVoice:
+    """
+    Finds .txt files in the cache which do not have a corresponding .mp3 file.
+
+    The VoiceCacheManifest is queried once it has finished scanning the
+    cache tree containing top. Until then, the tree is walked.
+    """
 
     _logger: BasicLogger = None
 
@@ -102,7 +108,12 @@ class FindTextToVoice:
         self.unvoiced_files: queue.Queue = queue.Queue(maxsize=200)
         self.glob_pattern: str = '**/*.txt'
         #  MY_LOGGER.debug(f'Configuring find files top: {top} pattern: {self.glob_pattern}')
-        self.finder: FindFiles = FindFiles(top, self.glob_pattern)
+        self.finder: Iterable[Path]
+        from cache.voice_cache_manifest import VoiceCacheManifest
+        if VoiceCacheManifest.is_scanned(top):
+            self.finder = VoiceCacheManifest.find_unvoiced(top, '.mp3')
+        else:
+            self.finder = FindFiles(top, self.glob_pattern)
         self.worker = threading.Thread
         self.worker = threading.Thread(target=self.find_thread,
                                        name='fndtxt2vce', args=(), kwargs={}, daemon=None)
@@ -16,9 +16,11 @@ import sys
 import threading
 import traceback
 import warnings
+from collections import deque
 from io import StringIO
 from logging import *
 from pathlib import Path
+from typing import Deque
 
 import xbmc
 import xbmcaddon
@@ -697,7 +699,35 @@ BasicLogger._class_init_()
 class KodiHandler(logging.Handler):
     """
       Defines a handler for writing to Kodi's logging system.
+
+      emit merges the record's args into its message, so that later changes
+      to the args do not change what is logged, then queues the record. A
+      single writer thread, shared by every KodiHandler, formats queued
+      records and writes them to Kodi's log, so that threads which log do
+      not wait on formatting or on xbmc.log. Each record is written by its
+      own call to xbmc.log, so that each gets Kodi's timestamp and level.
+
+      At most QUEUE_LIMIT records are queued. Further records are dropped
+      and counted, and the count is written to the log once there is room.
+      flush writes everything queued before returning. Once Kodi asks the
+      addon to abort, write_synchronously is called: what is queued is
+      written, the writer thread ends and every later record is written by
+      the thread that logs it.
     """
+    QUEUE_LIMIT: Final[int] = 4096
+    BATCH_LIMIT: Final[int] = 64
+
+    _cond: threading.Condition = threading.Condition()
+    # Held while writing, so that records are written in the order queued
+    _write_lock: threading.RLock = threading.RLock()
+    _pending: Deque[Tuple[ForwardRef('KodiHandler'), LogRecord]] = deque()
+    _writer: threading.Thread | None = None
+    _synchronous: bool = False
+    _unreported_drops: int = 0
+    queued: int = 0
+    dropped: int = 0
+    written: int = 0
+    batches: int = 0
 
     def __init__(self, level: int = logging.NOTSET,
                  trace: Set[str] = None) -> None:
@@ -721,11 +751,123 @@ class KodiHandler(logging.Handler):
 
     def emit(self, record: logging.LogRecord) -> None:
         """
+        Queues the record to be written by the writer thread
 
         :param record:
         :return:
         """
+        clz = KodiHandler
+        if clz._synchronous:
+            clz._write_records([(self, record)])
+            return
+        try:
+            if record.args:
+                record.msg = record.getMessage()
+                record.args = None
+        except Exception:
+            self.handleError(record)
+            return
+        with clz._cond:
+            if len(clz._pending) >= clz.QUEUE_LIMIT:
+                clz.dropped += 1
+                clz._unreported_drops += 1
+                return
+            clz._pending.append((self, record))
+            clz.queued += 1
+            if clz._writer is None:
+                clz._writer = threading.Thread(target=clz._write_queued,
+                                               name='logWrtr', daemon=True)
+                clz._writer.start()
+            clz._cond.notify()
+
+    def flush(self) -> None:
+        """
+        Writes every queued record before returning
+        """
+        clz = KodiHandler
+        while clz._write_batch():
+            pass
+
+    @classmethod
+    def write_synchronously(cls) -> None:
+        """
+        Writes every queued record and stops the writer thread. Records
+        logged afterward are written by the thread that logs them. Called
+        once Kodi asks the addon to abort.
+        """
+        with cls._cond:
+            cls._synchronous = True
+            cls._cond.notify_all()
+        while cls._write_batch():
+            pass
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int]:
+        with cls._cond:
+            return {'queued': cls.queued,
+                    'pending': len(cls._pending),
+                    'dropped': cls.dropped,
+                    'written': cls.written,
+                    'batches': cls.batches}
 
+    @classmethod
+    def _write_queued(cls) -> None:
+        """
+        Body of the writer thread
+        """
+        while True:
+            with cls._cond:
+                while len(cls._pending) == 0:
+                    if cls._synchronous:
+                        cls._writer = None
+                        return
+                    cls._cond.wait()
+            cls._write_batch()
+
+    @classmethod
+    def _write_batch(cls) -> bool:
+        """
+        Writes up to BATCH_LIMIT queued records
+
+        :return: False if nothing was queued
+        """
+        with cls._write_lock:
+            with cls._cond:
+                if len(cls._pending) == 0 and cls._unreported_drops == 0:
+                    return False
+                batch: List[Tuple[KodiHandler, LogRecord]] = []
+                while len(cls._pending) > 0 and len(batch) < cls.BATCH_LIMIT:
+                    batch.append(cls._pending.popleft())
+                drops: int = cls._unreported_drops
+                cls._unreported_drops = 0
+            if drops > 0:
+                xbmc.log(f'{ADDON_ID}: {drops} log messages dropped, too many '
+                         f'queued', xbmc.LOGWARNING)
+            cls._write_records(batch)
+            return True
+
+    @classmethod
+    def _write_records(cls,
+                       records: List[Tuple[ForwardRef('KodiHandler'),
+                                           LogRecord]]) -> None:
+        with cls._write_lock:
+            for handler, record in records:
+                msg: str | None = handler.format_record(record)
+                if msg is None:
+                    continue
+                xbmc.log(msg, get_kodi_level(record.levelno))
+            with cls._cond:
+                cls.written += len(records)
+                cls.batches += 1
+
+    def format_record(self, record: logging.LogRecord) -> str | None:
+        """
+        Formats a record, showing a notification if it asks for one
+
+        :param record:
+        :return: The text to write, or None if the record can not be
+                 formatted
+        """
         try:
             if record.exc_info is not None:
                 self._ignore_frames = record.__dict__.get('ignore_frames', 0) + 4
@@ -734,10 +876,10 @@ class KodiHandler(logging.Handler):
             msg = self.formatter.format(record)
             if record.__dict__.get('notify', False):
                 self.showNotification(msg)
-            kodi_level = get_kodi_level(record.levelno)
-            xbmc.log(msg, kodi_level)
+            return msg
         except Exception as e:
             self.handleError(record)
+        return None
 
     def showNotification(self, message, time_ms=3000, icon_path=None,
                          header=CriticalSettings.ADDON_ID):
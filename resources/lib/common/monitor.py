@@ -13,7 +13,9 @@ Created on Feb 19, 2019
 """
 
 import copy
+import queue
 import threading
+from functools import partial
 
 import xbmc
 
@@ -22,6 +24,7 @@ from common import *
 from common.constants import Constants
 from common.critical_settings import CriticalSettings
 from common.logger import *
+from common.logger import KodiHandler
 from common.minimal_monitor import MinimalMonitor
 
 MY_LOGGER = BasicLogger.get_logger(__name__)
@@ -36,6 +39,12 @@ class Monitor(MinimalMonitor):
         at startup.
     """
     FOREVER = 24 * 60 * 60 * 365  # A year, in seconds
+    # Placed into queues registered with register_abort_queue to wake their
+    # consumers on abort
+    ABORT_SENTINEL: Final[object] = object()
+    # Consumers blocked in get_or_abort also check for abort this often, in
+    # case the sentinel was lost
+    QUEUE_ABORT_CHECK_SECONDS: float = 5.0
 
     # Give unique name to notification thread so that garbage collector can be
     # happier
@@ -524,6 +533,8 @@ class Monitor(MinimalMonitor):
 
         if DEBUG_LOG:
             xbmc.log(f'SHUTDOWN finished informing threads of shutdown')
+        # Write queued log messages now. The addon may be killed at any time
+        KodiHandler.write_synchronously()
         cls.startup_complete_event.set()
         if DEBUG_LOG:
             xbmc.log(f'SHUTDOWN startup_complete_event.set')
@@ -677,6 +688,9 @@ class Monitor(MinimalMonitor):
                                       f' method: {method} data: {data}')
         for listener, listener_name in listeners_copy.items():
             try:
+                # A thread for each listener, not a pool: listeners such as
+                # process_command can be slow, and must not hold up the
+                # notifications queued behind them
                 cls.runInThread(listener, [], name=listener_name,
                                 **{'sender': sender, 'method': method, 'data': data})
             except Exception as e:
@@ -755,6 +769,66 @@ class Monitor(MinimalMonitor):
         """
         return cls._abort_received.is_set()
 
+    @classmethod
+    def register_abort_queue(cls, abort_queue: queue.Queue, name: str) -> None:
+        """
+        Arranges for ABORT_SENTINEL to be put into the given queue on abort,
+        so that a consumer blocked in get_or_abort wakes immediately, without
+        having to poll for abort.
+
+        :param abort_queue: queue to wake
+        :param name: name for the abort listener
+        :raises AbortException: if abort has already occurred
+        """
+        cls.register_abort_listener(partial(cls._put_abort_sentinel, abort_queue),
+                                    name=name)
+
+    @classmethod
+    def get_or_abort(cls, abort_queue: queue.Queue, block: bool = True) -> Any:
+        """
+        Gets the next item from a queue registered with register_abort_queue.
+        Blocks until there is an item, or abort.
+
+        :param abort_queue: queue to get from
+        :param block: When False, raise queue.Empty rather than wait for an item
+        :return: next item in queue
+        :raises AbortException: on abort. The sentinel is left in the queue so
+                that every consumer sees it
+        :raises queue.Empty: when block is False and the queue is empty
+        """
+        while True:
+            cls.exception_on_abort()
+            try:
+                if block:
+                    item: Any = abort_queue.get(timeout=cls.QUEUE_ABORT_CHECK_SECONDS)
+                else:
+                    item: Any = abort_queue.get_nowait()
+            except queue.Empty:
+                if block:
+                    continue
+                raise
+            if item is cls.ABORT_SENTINEL:
+                abort_queue.task_done()
+                cls._put_abort_sentinel(abort_queue)
+                raise AbortException()
+            return item
+
+    @classmethod
+    def _put_abort_sentinel(cls, abort_queue: queue.Queue) -> None:
+        """
+        Puts ABORT_SENTINEL into the queue, making room if it is full.
+        """
+        while True:
+            try:
+                abort_queue.put_nowait(cls.ABORT_SENTINEL)
+                return
+            except queue.Full:
+                try:
+                    abort_queue.get_nowait()
+                    abort_queue.task_done()
+                except queue.Empty:
+                    pass
+
     @classmethod
     def set_startup_complete(cls) -> None:
         """
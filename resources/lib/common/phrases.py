@@ -2,19 +2,22 @@
 
 from __future__ import annotations  # For union operator |
 
-from datetime import datetime, timedelta
 import hashlib
-import inspect
 #  TODO: change to regex
 import pathlib
 import re
 import sys
+import threading
+import time
+from array import array
 from collections import UserList
 from pathlib import Path
+from types import CodeType
 
 from backends.settings.service_types import ServiceID
 from cache.common_types import CacheEntryInfo
 from cache.cache_file_state import CacheFileState
+from cache.voice_cache_index import VoiceCacheIndex
 from common.setting_constants import AudioType
 
 try:
@@ -37,28 +40,98 @@ MY_LOGGER = BasicLogger.get_logger(__name__)
 class MyEncoder(JSONEncoder):
     def default(self, o):
         if isinstance(o, Phrase):
-            value: Dict[str, Dict[str, Any]] = {'phrase': o.__dict__}
+            value: Dict[str, Dict[str, Any]] = o.to_dict()
             return value
         return JSONEncoder.default(self, o)
 
 
 class PhraseEvent:
+    __slots__ = ('_event', '_ts')
 
-    def __init__(self, event: str) -> None:
+    def __init__(self, event: str, ts: float | None = None) -> None:
+        """
+        :param event: What happened
+        :param ts: time.monotonic() when it happened. Now, when None
+        """
         self._event: str = event
-        self._ts: datetime = datetime.now()
+        if ts is None:
+            ts = time.monotonic()
+        self._ts: float = ts
+
+    @property
+    def detail(self) -> str:
+        return self._event
+
+    @property
+    def ts(self) -> float:
+        return self._ts
 
     @property
     def event(self) -> str:
-        now: datetime = datetime.now()
-        elapsed: timedelta = now - self._ts
-        milliseconds: int = int(elapsed.microseconds / 1000)
+        milliseconds: int = int((time.monotonic() - self._ts) * 1000.0)
         return f'{self._event} elapsed: {milliseconds}ms'
 
     def __str__(self) -> str:
         return f'{self.event}'
 
 
+class PhraseProvenance:
+    """
+    Records where a Phrase was created, for Phrase.get_debug_info.
+
+    Only the caller's code object and line number are kept, taken from
+    sys._getframe; they are formatted only when the debug info is read.
+    (inspect.stack(), formerly used, builds every frame of the stack along
+    with its source lines, on every Phrase created.)
+    """
+    enabled: bool = Constants.PHRASE_PROVENANCE
+
+    @classmethod
+    def set_enabled(cls, enabled: bool) -> None:
+        """
+        When disabled, Phrases created afterward have no provenance
+        """
+        cls.enabled = enabled
+
+    @classmethod
+    def capture(cls, depth: int = 1) -> Tuple[CodeType, int] | None:
+        """
+        :param depth: Frames to skip above the caller of capture. With 1, the
+                      caller of the function calling capture is recorded
+        :return: Code object and line number of the frame, or None when
+                 disabled
+        """
+        if not cls.enabled:
+            return None
+        try:
+            frame = sys._getframe(depth + 1)
+        except ValueError:  # Stack is not that deep
+            return None
+        return frame.f_code, frame.f_lineno
+
+    @staticmethod
+    def format(origin: Tuple[CodeType, int]) -> str:
+        code, lineno = origin
+        return (f'file {Path(code.co_filename).name} func: {code.co_name} '
+                f'line: {lineno}')
+
+
+class PhraseExpiration:
+    """
+    The serial number and expiration checking of a Phrase. A PhraseList and
+    the Phrases in it share one PhraseExpiration, so that changing the list's
+    serial number or expiration checking changes its Phrases' as well.
+
+    Setting the serial_number or check_expired of a single Phrase gives that
+    Phrase a PhraseExpiration of its own.
+    """
+    __slots__ = ('serial_number', 'check_expired')
+
+    def __init__(self, serial_number: int, check_expired: bool) -> None:
+        self.serial_number: int = serial_number
+        self.check_expired: bool = check_expired
+
+
 class Phrase:
     """
     A Phrase is a series of words that may be a subset of the complete text to
@@ -70,7 +143,20 @@ class Phrase:
 
     When caching is not used, then phrases can be merged with other non-interrupting
     phrases.
+
+    Many thousands of Phrases can wait in the background seeding queues, so
+    Phrases are kept small: attributes are in __slots__ rather than a
+    __dict__, the strings naming a language, voice, etc. are interned and
+    only the most recent event_capacity events are kept.
     """
+    __slots__ = ('text', '_start_of_phrase_list', 'cache_path',
+                 'download_pending', '_cache_file_state', '_engine_key',
+                 '_event_details', '_event_times', '_event_count',
+                 '_events_shared', '_text_exists', '_temp', '_interrupt',
+                 'pre_pause_ms', 'post_pause_ms', 'preload_cache',
+                 '_expiration', '_speak_over_kodi', 'audio_type', 'language',
+                 'gender', 'voice', 'lang_dir', 'territory_dir', 'debug_info',
+                 '_origin', 'text_id')
     # Units in milliseconds
     # MP3 has some timeing error, due to the format. It is okay
     # after 500 ms
@@ -103,6 +189,13 @@ class Phrase:
         r'(^|\W|\s)OK($|\s|\W)')  # Prevents saying Oklahoma
     _hyphen_prefix: Final[regex.Pattern] = regex.compile(r'(:?(-\[)([^[]*)(]))')
     _pauseRE: Final[regex.Pattern] = regex.compile(Constants.PAUSE_INSERT)
+    event_capacity: int = Constants.PHRASE_EVENT_CAPACITY
+    # text -> text with markup removed by _clean_markup. Ordered from least to
+    # most recently used. See clean_phrase_text
+    _clean_lock: threading.Lock = threading.Lock()
+    _cleaned: Dict[str, str] = {}
+    clean_hits: int = 0
+    clean_misses: int = 0
 
     def __init__(self,
                  text: str = '',
@@ -167,10 +260,10 @@ class Phrase:
         :param debug_context: A debug string can be associated with a phrase to
                              aid in tracking down where originally generated
         :param engine_key: ServiceID of the engine that this phrase is to voiced
+        :param events: Events to copy into this phrase's history
         """
         clz = type(self)
         Monitor.exception_on_abort()
-        debug_context += 1
         self.text: str = clz.clean_phrase_text(text)
         # if self.text == '':
         #     MY_LOGGER.debug(f'empty text')
@@ -182,7 +275,14 @@ class Phrase:
         self.download_pending: bool = False
         self._cache_file_state: CacheFileState = CacheFileState.UNKNOWN
         self._engine_key: ServiceID = engine_key
-        self._events: List[PhraseEvent] = []
+        # Ring of the most recent events, held as the detail and time of each
+        # rather than as PhraseEvents. Created on the first event
+        self._event_details: List[str] | None = None
+        self._event_times: array | None = None
+        self._event_count: int = 0
+        # True while the event ring is shared with a clone. Copied before
+        # an event is added
+        self._events_shared: bool = False
         self._text_exists: bool = text_exists
         self._temp: bool = temp
         self._interrupt: bool = False
@@ -193,33 +293,35 @@ class Phrase:
             post_pause_ms = clz.PAUSE_DEFAULT
         self.post_pause_ms: int = post_pause_ms
         self.preload_cache: bool = preload_cache
-        self.serial_number: int
-        if serial_number is not None:
-            self.serial_number = serial_number
-        else:
-            self.serial_number = PhraseList.global_serial_number
+        if serial_number is None:
+            serial_number = PhraseList.global_serial_number
+        self._expiration: PhraseExpiration = PhraseExpiration(serial_number,
+                                                              check_expired)
         self._speak_over_kodi: bool = speak_over_kodi
 
         # PhraseList can disable expiration checking when you explicitly
         # make an unchecked clone. Useful for seeding a cache for the future
 
         self.audio_type: AudioType | None = None
-        self.language: str | None = language
-        self.gender: str | None = gender
-        self.voice: str | None = voice
-        self.lang_dir: str | None = lang_dir
-        self.territory_dir: str | None = territory_dir
+        self.language: str | None = clz._intern(language)
+        self.gender: str | None = clz._intern(gender)
+        self.voice: str | None = clz._intern(voice)
+        self.lang_dir: str | None = clz._intern(lang_dir)
+        self.territory_dir: str | None = clz._intern(territory_dir)
         if debug_info is None:
             debug_info = ''
         self.debug_info: str | None = debug_info
-        self.set_debug_info(debug_info, context=debug_context)
+        self._origin: Tuple[CodeType, int] | None
+        self._origin = PhraseProvenance.capture(debug_context)
         if text_id is None:
             text_id = text
         self.text_id: str | None = None
         self.set_text_id(text_id)  # Keeps md5
-        # Set interrupt and expired at the end
-        self.check_expired: bool = check_expired
+        # Set interrupt at the end
         self.interrupt = interrupt
+        if events:
+            for event in events:
+                self._add_event(event.detail, event.ts)
 
     @property
     def start_of_phrase_list(self) -> bool:
@@ -303,28 +405,49 @@ class Phrase:
         :param check_expired:
         :return:
         """
-        phrase: Phrase
-        phrase = Phrase(text=self.text,
-                        start_of_phrase_list=self.start_of_phrase_list,
-                        check_expired=check_expired,
-                        interrupt=self.interrupt,
-                        pre_pause_ms=self.pre_pause_ms,
-                        post_pause_ms=self.post_pause_ms,
-                        cache_path=self.cache_path,
-                        text_exists=self._text_exists,
-                        temp=self._temp,
-                        preload_cache=self.preload_cache,
-                        speak_over_kodi=self._speak_over_kodi,
-                        debug_info=self.debug_info,
-                        # text_id=self.text_id,
-                        language=self.language,
-                        gender=self.gender,
-                        voice=self.voice,
-                        lang_dir=self.lang_dir,
-                        territory_dir=self.territory_dir,
-                        events=self._events,
-                        engine_key=self._engine_key
-                        )
+        Monitor.exception_on_abort()
+        return self._clone(PhraseExpiration(PhraseList.global_serial_number,
+                                            check_expired))
+
+    def _clone(self, expiration: PhraseExpiration) -> 'Phrase':
+        """
+        Copies this Phrase without running __init__. The text, paths, etc.
+        are immutable and are shared with the clone rather than cleaned,
+        hashed and interned again. The event ring is shared until either
+        Phrase adds an event. As before, the clone's download and cache file
+        state start afresh.
+
+        :param expiration: The clone's serial number and expiration checking
+        """
+        phrase: Phrase = Phrase.__new__(Phrase)
+        phrase.text = self.text
+        phrase._start_of_phrase_list = self._start_of_phrase_list
+        phrase.cache_path = self.cache_path
+        phrase.download_pending = False
+        phrase._cache_file_state = CacheFileState.UNKNOWN
+        phrase._engine_key = self._engine_key
+        phrase._event_details = self._event_details
+        phrase._event_times = self._event_times
+        phrase._event_count = self._event_count
+        if self._event_details is not None:
+            self._events_shared = True
+        phrase._events_shared = self._events_shared
+        phrase._text_exists = self._text_exists
+        phrase._temp = self._temp
+        phrase._interrupt = self._interrupt
+        phrase.pre_pause_ms = self.pre_pause_ms
+        phrase.post_pause_ms = self.post_pause_ms
+        phrase.preload_cache = self.preload_cache
+        phrase._expiration = expiration
+        phrase._speak_over_kodi = self._speak_over_kodi
+        phrase.audio_type = None
+        phrase.language = self.language
+        phrase.gender = self.gender
+        phrase.voice = self.voice
+        phrase.lang_dir = self.lang_dir
+        phrase.territory_dir = self.territory_dir
+        phrase.debug_info = self.debug_info
+        phrase._origin = self._origin
         phrase.text_id = self.text_id
         return phrase
 
@@ -350,6 +473,8 @@ class Phrase:
             'speak_over_kodi': self._speak_over_kodi,
             'check_expired'  : self.check_expired,
             'text_id'        : self.text_id,
+            # Not get_debug_info: the provenance is recorded again where
+            # the phrase is recreated
             'debug_info'     : self.debug_info
         }}
         return tmp
@@ -408,34 +533,100 @@ class Phrase:
         return other_text_id == self.text_id
 
     def get_debug_info(self) -> str:
-        return self.debug_info
+        if self._origin is None:
+            return self.debug_info
+        origin: str = PhraseProvenance.format(self._origin)
+        if self.debug_info:
+            return f'{self.debug_info} {origin}'
+        return origin
 
     def set_debug_info(self, debug_info: str | None = None, context: int = 1) -> None:
-        clz = type(self)
-        # self.debug_info = debug_info
-        try:
-            stack_trace: List[Tuple[inspect.FrameInfo]] = inspect.stack()
-            caller_frame: inspect.FrameInfo = stack_trace[context]
-            filename = Path(caller_frame.filename).name
-            lineno = caller_frame.lineno
-            function = caller_frame.function
-            self.debug_info = f'file {filename} func: {function} line: {lineno}'
-        except Exception as e:
-            MY_LOGGER.exception('')
+        """
+        Records the caller as the origin of this phrase
+
+        :param debug_info: Replaces the debug text, when not None
+        :param context: Frames above the caller of set_debug_info to record
+        """
+        if debug_info is not None:
+            self.debug_info = debug_info
+        self._origin = PhraseProvenance.capture(context)
 
     def debug_data(self) -> str:
         return f'{self.serial_number:d}_{self.text:20} expired: {self.is_expired()}' \
                f' expires: {self.check_expired}'
 
+    @classmethod
+    def set_event_capacity(cls, capacity: int) -> None:
+        """
+        Sets the number of events kept by each Phrase. Phrases which already
+        have more keep them.
+        """
+        cls.event_capacity = max(0, capacity)
+
+    @staticmethod
+    def _intern(value: str | None) -> str | None:
+        """
+        The few distinct languages, voices, etc. are shared by every Phrase
+        """
+        if value is None:
+            return None
+        return sys.intern(value)
+
     def add_event(self, detail: str) -> None:
-        self._events.append(PhraseEvent(detail))
+        self._add_event(detail, time.monotonic())
+
+    def _add_event(self, detail: str, ts: float) -> None:
+        """
+        Adds an event to the ring of recent events, replacing the oldest once
+        the ring is full
+        """
+        if self._event_details is None:
+            if Phrase.event_capacity == 0:
+                return
+            self._event_details = []
+            self._event_times = array('d')
+        elif self._events_shared:
+            self._event_details = list(self._event_details)
+            self._event_times = array('d', self._event_times)
+            self._events_shared = False
+        if len(self._event_details) < Phrase.event_capacity:
+            self._event_details.append(detail)
+            self._event_times.append(ts)
+        else:
+            index: int = self._event_count % len(self._event_details)
+            self._event_details[index] = detail
+            self._event_times[index] = ts
+        self._event_count += 1
+
+    def _get_events(self) -> List[PhraseEvent]:
+        """
+        :return: Recent events, oldest first
+        """
+        if not self._event_details:
+            return []
+        size: int = len(self._event_details)
+        oldest: int = self._event_count % size
+        return [PhraseEvent(self._event_details[index % size],
+                            self._event_times[index % size])
+                for index in range(oldest, oldest + size)]
 
     def get_last_event(self) -> str:
-        return f'{self._events[-1]}'
+        if not self._event_details:
+            return ''
+        index: int = (self._event_count - 1) % len(self._event_details)
+        return f'{PhraseEvent(self._event_details[index], self._event_times[index])}'
 
     def get_recent_events(self, limit: int = 0) -> str:
+        """
+        :param limit: Most events to include. 0 includes all that are kept
+        :return: Recent events, newest first
+        """
+        events: List[PhraseEvent] = self._get_events()
+        events.reverse()
+        if limit > 0:
+            events = events[:limit]
         result: str = ''
-        for event in reversed(self._events):
+        for event in events:
             result = f'{result} {event}'
         return result
     def history(self) -> str:
@@ -554,6 +745,7 @@ class Phrase:
                 self._cache_file_state = CacheFileState.BAD
                 try:
                     self.cache_path.unlink()
+                    VoiceCacheIndex.discard_file(self.cache_path)
                     self._cache_file_state = CacheFileState.DOES_NOT_EXIST
                 except exception:
                     if MY_LOGGER.isEnabledFor(DEBUG):
@@ -685,7 +877,7 @@ class Phrase:
         return True
 
     def set_voice(self, voice: str) -> None:
-        self.voice = voice
+        self.voice = Phrase._intern(voice)
 
     def get_voice(self) -> str:
         return self.voice
@@ -707,29 +899,46 @@ class Phrase:
 
     def set_lang_dir(self, lang_dir: str, override: bool = False) -> None:
         if override or self.lang_dir is None:
-            self.lang_dir = lang_dir
+            self.lang_dir = Phrase._intern(lang_dir)
 
     def set_territory_dir(self, territory_dir: str, override: bool = False) -> None:
         if override or self.territory_dir is None:
-            self.territory_dir = territory_dir
+            self.territory_dir = Phrase._intern(territory_dir)
 
     @classmethod
     def clean_phrase_text(cls, text: str) -> str:
-        text = text.strip()
-        text = cls._remove_multiple_whitespace_re.sub('', text)
-        text = cls._formatTagRE.sub('', text)
-        text = cls._colorTagRE.sub('', text)
-        # Some speech engines say OK as Oklahoma
-        text = cls._okTagRE.sub(r'\1O K\2', text)
-
-        # getLabel() on lists wrapped in [] and some speech engines have
-        # problems with text starting with -
-        text = regex.sub(cls._hyphen_prefix, r'\g<2>', text)
-        text = text.replace('XBMC', r'Kodi')
+        """
+        Removes Kodi markup and excess whitespace from text and rewords what
+        speech engines say poorly.
+
+        The same labels are cleaned over and over, so the result of
+        _clean_markup is remembered for the most recently cleaned
+        PHRASE_CLEAN_MEMO_ENTRIES texts (those no longer than
+        PHRASE_CLEAN_MEMO_MAX_LENGTH). The rest of the cleaning depends on the
+        messages of the current language and is always done.
+        """
+        cleaned: str | None = None
+        if len(text) <= Constants.PHRASE_CLEAN_MEMO_MAX_LENGTH:
+            with cls._clean_lock:
+                cleaned = cls._cleaned.pop(text, None)
+                if cleaned is not None:
+                    cls._cleaned[text] = cleaned  # Now most recently used
+                    cls.clean_hits += 1
+                else:
+                    cls.clean_misses += 1
+            if cleaned is None:
+                cleaned = cls._clean_markup(text)
+                with cls._clean_lock:
+                    cls._cleaned[text] = cleaned
+                    while len(cls._cleaned) > Constants.PHRASE_CLEAN_MEMO_ENTRIES:
+                        del cls._cleaned[next(iter(cls._cleaned))]
+        else:
+            cleaned = cls._clean_markup(text)
+        text = cleaned
         if text == '..':
             text = Messages.get_msg(Messages.PARENT_DIRECTORY)
-        if text.endswith(')'):  # Skip this most of the time
-            # For boolean settings
+        # For boolean settings. format_boolean changes only '( )' and '(*)'
+        if text.endswith(')') and ('(*)' in text or '( )' in text):
             new_text: str
             new_text = Messages.format_boolean(text,
                                                enabled_msgid=Messages.ENABLED.get_msg_id(),
@@ -739,6 +948,30 @@ class Phrase:
             text = new_text
         return text
 
+    @classmethod
+    def _clean_markup(cls, text: str) -> str:
+        """
+        The part of clean_phrase_text which depends only on text
+        """
+        text = text.strip()
+        text = cls._remove_multiple_whitespace_re.sub('', text)
+        text = cls._formatTagRE.sub('', text)
+        text = cls._colorTagRE.sub('', text)
+        # Some speech engines say OK as Oklahoma
+        text = cls._okTagRE.sub(r'\1O K\2', text)
+
+        # getLabel() on lists wrapped in [] and some speech engines have
+        # problems with text starting with -
+        text = cls._hyphen_prefix.sub(r'\g<2>', text)
+        return text.replace('XBMC', r'Kodi')
+
+    @classmethod
+    def get_clean_stats(cls) -> Dict[str, int]:
+        with cls._clean_lock:
+            return {'entries': len(cls._cleaned),
+                    'hits': cls.clean_hits,
+                    'misses': cls.clean_misses}
+
     @classmethod
     def from_json(cls, json_object: Any):
         if isinstance(json_object, dict):
@@ -775,6 +1008,41 @@ class Phrase:
             MY_LOGGER.debug(f'EXPIRED: {phrase_or_list.debug_data()} '
                             f'serial: {PhraseList.expired_serial_number}')
 
+    @property
+    def serial_number(self) -> int:
+        return self._expiration.serial_number
+
+    @serial_number.setter
+    def serial_number(self, serial_number: int) -> None:
+        """
+        Gives this Phrase its own PhraseExpiration, unless unchanged
+        """
+        expiration: PhraseExpiration = self._expiration
+        if expiration.serial_number != serial_number:
+            self._expiration = PhraseExpiration(serial_number,
+                                                expiration.check_expired)
+
+    @property
+    def check_expired(self) -> bool:
+        return self._expiration.check_expired
+
+    @check_expired.setter
+    def check_expired(self, check_expired: bool) -> None:
+        """
+        Gives this Phrase its own PhraseExpiration, unless unchanged
+        """
+        expiration: PhraseExpiration = self._expiration
+        if expiration.check_expired != check_expired:
+            self._expiration = PhraseExpiration(expiration.serial_number,
+                                                check_expired)
+
+    def _set_expiration(self, expiration: PhraseExpiration) -> None:
+        """
+        Makes this Phrase share the serial number and expiration checking of
+        a PhraseList
+        """
+        self._expiration = expiration
+
     def is_expired(self) -> bool:
         """
         Checks for expiration without throwing an ExpiredException.
@@ -782,10 +1050,10 @@ class Phrase:
         See test_expired, which does throw an exception
         :return:
         """
-        clz = type(self)
-        if not self.check_expired:
+        expiration: PhraseExpiration = self._expiration
+        if not expiration.check_expired:
             return False
-        if PhraseList.expired_serial_number >= self.serial_number:
+        if PhraseList.expired_serial_number >= expiration.serial_number:
             return True
         return False
 
@@ -832,6 +1100,10 @@ class PhraseList(UserList):
       changing UI, every PhraseList has a serial number. Each Phrase in that
       PhraseList is assigned the PhraseList's serial number. This makes it
       easy to say "reject every phrase before this serial number"
+
+      The serial number and expiration checking are kept in a
+      PhraseExpiration shared by the list and its Phrases, so changing either
+      does not visit every Phrase.
     """
     global_serial_number: int = 1
     expired_serial_number: int = 0
@@ -841,8 +1113,24 @@ class PhraseList(UserList):
         clz = type(self)
         Monitor.exception_on_abort()
         clz.global_serial_number += 1
-        self.serial_number: int = clz.global_serial_number
-        self.check_expired = check_expired
+        self._expiration: PhraseExpiration = PhraseExpiration(
+                clz.global_serial_number, check_expired)
+
+    @property
+    def serial_number(self) -> int:
+        return self._expiration.serial_number
+
+    @serial_number.setter
+    def serial_number(self, serial_number: int) -> None:
+        self._expiration.serial_number = serial_number
+
+    @property
+    def check_expired(self) -> bool:
+        return self._expiration.check_expired
+
+    @check_expired.setter
+    def check_expired(self, check_expired: bool) -> None:
+        self._expiration.check_expired = check_expired
 
     @classmethod
     def create(cls, texts: str | List[str], interrupt: bool = False,
@@ -1032,11 +1320,20 @@ class PhraseList(UserList):
         return text
 
     def clone(self, check_expired: bool = True) -> 'PhraseList':
+        """
+        Produces a copy of this list with a new serial number. The Phrases are
+        cloned as by Phrase.clone, sharing their text, paths, etc. with the
+        originals.
+
+        :param check_expired: Whether the copy checks for expiration
+        """
         phrases: PhraseList = PhraseList(check_expired=check_expired)
+        expiration: PhraseExpiration = phrases._expiration
         phrase: Phrase
         for phrase in self.data:
-            new_phrase: Phrase = phrase.clone(check_expired=check_expired)
-            phrases.append(new_phrase)
+            phrases.data.append(phrase._clone(expiration))
+        if len(phrases.data) > 0:
+            phrases.data[0].start_of_phrase_list = True
         return phrases
 
     def compact_phrase(self, start_index: int = None) -> Phrase:
@@ -1143,15 +1440,16 @@ class PhraseList(UserList):
         self.set_check_expired(True)
 
     def set_check_expired(self, check_expired: bool):
-        p: Phrase
-        for p in self.data:
-            p.check_expired = check_expired
+        """
+        Also applies to the Phrases of this list, except any given a serial
+        number or expiration checking of their own after being added.
+        """
         self.check_expired = check_expired
 
     def _reset_serial_number(self) -> None:
         clz = type(self)
         clz.global_serial_number += 1
-        self.serial_number: int = clz.global_serial_number
+        self.serial_number = clz.global_serial_number
 
     def set_all_preload_cache(self, preload: bool) -> None:
         p: Phrase
@@ -1192,10 +1490,10 @@ class PhraseList(UserList):
                     clz.global_serial_number = PhraseList.expired_serial_number + 1
 
     def is_expired(self) -> bool:
-        clz = type(self)
-        if not self.check_expired:
+        expiration: PhraseExpiration = self._expiration
+        if not expiration.check_expired:
             return False
-        return PhraseList.expired_serial_number >= self.serial_number
+        return PhraseList.expired_serial_number >= expiration.serial_number
 
     def set_speak_over_kodi(self, speak_over_kodi: bool) -> None:
         if len(self.data) > 0:
@@ -1413,8 +1711,7 @@ class PhraseList(UserList):
             raise ExpiredException()
         if item.is_expired():
             raise ExpiredException()
-        item.check_expired = self.check_expired
-        item.serial_number = self.serial_number
+        item._set_expiration(self._expiration)
         self.data.append(item)
         if len(self.data) > 0:
             self.data[0].start_of_phrase_list = True
@@ -1424,8 +1721,7 @@ class PhraseList(UserList):
             raise TypeError('Expected a Phrase')
         if self.is_expired() and self.check_expired:
             raise ExpiredException()
-        item.check_expired = self.check_expired
-        item.serial_number = self.serial_number
+        item._set_expiration(self._expiration)
         return super().insert(i, item)
 
     def pop(self, i: int = ...) -> Phrase:
@@ -1486,9 +1782,7 @@ class PhraseList(UserList):
         if check and self.is_expired() and self.check_expired:
             raise ExpiredException()
         for phrase in other:
-            new_phrase: Phrase = phrase.clone(self.check_expired)
-            phrase.check_expired = self.check_expired
-            phrase.serial_number = self.serial_number
+            phrase._set_expiration(self._expiration)
         return self.data.extend(other)
 
     def is_empty(self) -> bool:
@@ -421,6 +421,17 @@ class Settings(SettingsLowLevel):
             MY_LOGGER.debug_xv(f'use_cache: {cache_speech_key} {use_cache}')
         return use_cache
 
+    @classmethod
+    def get_cache_expiration_days(cls) -> int:
+        """
+        :return: Number of days that an unused voice file is kept in the cache.
+                 0 means no limit
+        """
+        value: int = SettingsLowLevel.get_setting_int(
+                ServiceKey.CACHE_EXPIRATION_DAYS,
+                default_value=SettingProp.CACHE_EXPIRATION_DEFAULT)
+        return value
+
     @classmethod
     def set_use_cache(cls, use_cache: bool | None,
                       engine_key: ServiceID | None = None) -> None:
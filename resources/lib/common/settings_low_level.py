@@ -4,7 +4,7 @@ from __future__ import annotations  # For union operator |
 import copy
 import threading
 import time
-from contextlib import AbstractContextManager
+from contextlib import AbstractContextManager, contextmanager
 
 import xbmcaddon
 
@@ -42,11 +42,50 @@ class CachedSettings:
 
 
 class SettingsManager:
+    """
+    Stack of CachedSettings frames. The top frame holds the settings in
+    effect.
+
+    Settings are read far more often than they are changed, so reads do not
+    lock. They are served from _snapshot, a copy of the top frame's
+    settings which is never modified, only replaced. Every change to the
+    stack is made within updating(), which holds the lock and publishes a new
+    snapshot when the outermost update ends. Readers therefore see every
+    change made by an update (commit_settings, restore_settings, etc.) or
+    none of them. Until then, even the updating thread reads the previous
+    snapshot.
+    """
 
     # Initialize with one frame
 
     _settings_lock: threading.RLock = threading.RLock()
     _settings_stack: List[CachedSettings] = [CachedSettings(settings_to_copy={})]
+    # Settings of the top frame as of the end of the last update
+    _snapshot: Dict[str, Any] = {}
+    _update_depth: int = 0
+
+    @classmethod
+    @contextmanager
+    def updating(cls) -> Iterator[None]:
+        """
+        Holds the lock while the stack is changed. Updates may nest. When the
+        outermost ends, a snapshot of the top frame is published to readers.
+        """
+        with cls._settings_lock:
+            cls._update_depth += 1
+            try:
+                yield
+            finally:
+                cls._update_depth -= 1
+                if cls._update_depth == 0:
+                    cls._snapshot = dict(cls._settings_stack[-1].settings)
+
+    @classmethod
+    def get_snapshot(cls) -> Dict[str, Any]:
+        """
+        :return: The settings in effect. Must not be modified
+        """
+        return cls._snapshot
 
     @classmethod
     def get_lock(cls) -> threading.RLock:
@@ -69,7 +108,7 @@ class SettingsManager:
         :param value: value of the setting
         :return:
         """
-        with cls._settings_lock:
+        with cls.updating():
             if MY_LOGGER.isEnabledFor(DEBUG_XV):
                 MY_LOGGER.debug_xv(f'setting_id: {setting_id} value: {value}')
             changed: bool = False
@@ -92,7 +131,7 @@ class SettingsManager:
         :param value: value of the setting
         :return:
         """
-        with cls._settings_lock:
+        with cls.updating():
             if MY_LOGGER.isEnabledFor(DEBUG_XV):
                 MY_LOGGER.debug_xv(f'setting_id: {setting_id} value: {value} depth: '
                                    f'{cls.get_stack_depth()}')
@@ -118,8 +157,9 @@ class SettingsManager:
     @classmethod
     def set_settings(cls,
                      settings_to_update: Dict[ServiceID, int | str | bool | None]) -> None:
-        for service_key, value in settings_to_update.items():
-            cls.set_setting(service_key.short_key, value)
+        with cls.updating():
+            for service_key, value in settings_to_update.items():
+                cls.set_setting(service_key.short_key, value)
 
     @classmethod
     def load_settings(cls,
@@ -133,7 +173,7 @@ class SettingsManager:
         """
 
         new_frame: CachedSettings = CachedSettings(settings_to_backup)
-        with cls._settings_lock:
+        with cls.updating():
             cls._settings_stack.append(new_frame)
             if MY_LOGGER.isEnabledFor(DEBUG_V):
                 MY_LOGGER.debug_v(
@@ -142,7 +182,7 @@ class SettingsManager:
 
     @classmethod
     def clear_settings(cls) -> None:
-        with cls._settings_lock:
+        with cls.updating():
             del cls._settings_stack[0:-1]
 
     @classmethod
@@ -154,7 +194,7 @@ class SettingsManager:
 
          :return:
          """
-        with cls._settings_lock:
+        with cls.updating():
             current_settings: Dict[str, int | str | bool | None]
             current_settings = cls._settings_stack[-1].settings
             new_frame: CachedSettings = CachedSettings(current_settings)
@@ -180,7 +220,7 @@ class SettingsManager:
             MY_LOGGER.debug_v(f'restore_settings stack_depth: {stack_depth} '
                               f'len(_settings_stack): {cls.get_stack_depth()}')
         old_top_frame: CachedSettings
-        with cls._settings_lock:
+        with cls.updating():
             if stack_depth is not None:
                 while stack_depth < cls.get_stack_depth():
                     if MY_LOGGER.isEnabledFor(DEBUG_V):
@@ -210,26 +250,31 @@ class SettingsManager:
 
     @classmethod
     def is_in_cache(cls, setting_id: str) -> bool:
-        with cls._settings_lock:
-            '''
-            MY_LOGGER.debug(f'setting_id: {setting_id} '
-                            f'{setting_id in cls._settings_stack[-1].settings.keys()} \n'
-                            f'depth: {len(cls._settings_stack)}\n keys: '
-                            f'{cls._settings_stack[-1].settings.keys()}')
-            '''
-            return setting_id in cls._settings_stack[-1].settings.keys()
+        '''
+        MY_LOGGER.debug(f'setting_id: {setting_id} '
+                        f'{setting_id in cls._snapshot} \n'
+                        f'depth: {len(cls._settings_stack)}\n keys: '
+                        f'{cls._snapshot.keys()}')
+        '''
+        return setting_id in cls._snapshot
 
     @classmethod
-    def get_setting(cls, setting_id: str, default_value: Any) -> Any:
+    def get_setting(cls, setting_id: str, default_value: Any,
+                    snapshot: Dict[str, Any] | None = None) -> Any:
         """
         throws KeyError
+
+        :param setting_id: full setting name ex. speed.google
+        :param default_value: Returned when the setting has no value
+        :param snapshot: As returned by get_snapshot. Defaults to the current
+                         snapshot
         """
-        with cls._settings_lock:
-            value = cls._settings_stack[-1].settings.get(setting_id)
-            if value is None:
-                if MY_LOGGER.isEnabledFor(DEBUG_XV):
-                    MY_LOGGER.debug_xv(f'setting_id: {setting_id} cls._settings_stack[-1]'
-                                       f' {cls._settings_stack[-1]} ')
+        if snapshot is None:
+            snapshot = cls._snapshot
+        value = snapshot.get(setting_id)
+        if value is None:
+            if MY_LOGGER.isEnabledFor(DEBUG_XV):
+                MY_LOGGER.debug_xv(f'setting_id: {setting_id} not in snapshot')
         if value is None or (isinstance(value, str) and value == ''):
             # MY_LOGGER.debug(f'Using default value {setting_id} {default}')
             value = default_value
@@ -259,8 +304,7 @@ class SettingsManager:
 
     @classmethod
     def is_empty(cls) -> bool:
-        with cls._settings_lock:
-            return not cls._settings_stack[-1].settings
+        return not cls._snapshot
 
 
 class SettingsContext(AbstractContextManager):
@@ -1292,6 +1336,23 @@ class SettingsLowLevel:
                 if MY_LOGGER.isEnabledFor(DEBUG):
                     MY_LOGGER.debug(f'FAILED to add {service_key} value: {value}')
 
+    @classmethod
+    def load_service_settings(cls, service_key: ServiceID) -> None:
+        """
+        Loads every setting of a service (such as an engine) which is not yet
+        in the cache, in one update. Otherwise, each would be loaded on
+        demand by _getSetting, publishing a new snapshot for every setting.
+
+        :param service_key: Identifies the service to load
+        """
+        new_settings: Dict[ServiceID, Any] = {}
+        cls._load_settings(new_settings, service_key, service_key.setting_id)
+        with SettingsManager.updating():
+            for setting_key, value in new_settings.items():
+                if not cls.is_in_cache(setting_key):
+                    SettingsManager.load_setting_to_all_frames(
+                            setting_key.short_key, value)
+
     @classmethod
     def load_setting(cls, service_key: ServiceID) -> Any | None:
         """
@@ -1534,7 +1595,7 @@ class SettingsLowLevel:
         #  MY_LOGGER.debug('TRACE commit_settings')
         addon: xbmcaddon = xbmcaddon.Addon(Constants.ADDON_ID)
 
-        with SettingsManager._settings_lock:
+        with SettingsManager.updating():
             # Copy the settings from stack_frame at final_stack_depth to
             # a map.
             # Apply settings_changes to the copied settings from previous step
@@ -1715,6 +1776,12 @@ class SettingsLowLevel:
         """
         value: Any = None
 
+        # Nearly always cached. Read without checking for a reload, since the
+        # snapshot is not empty
+        snapshot: Dict[str, Any] = SettingsManager.get_snapshot()
+        if service_key.short_key in snapshot:
+            return SettingsManager.get_setting(service_key.short_key,
+                                               default_value, snapshot)
         cls.check_reload()
         load_on_demand = True
         if MY_LOGGER.isEnabledFor(DEBUG_V):
@@ -43,9 +43,14 @@ words_per_interval: float = (float(AVERAGE_ENGLISH_WORDS_PER_MINUTE) /
 chars_per_interval: float = words_per_interval * float(AVERAGE_ENGLISH_CHARS_PER_WORD)
 # Approx characters to have queued in player to achieve ~ 10 seconds of speech.
 TARGET_PLAYER_CHAR_LIMIT: int = int(chars_per_interval + 0.5)
+# While the player is not hungry, process_phrase_queue sleeps until mpv reports
+# progress, a phrase is added, or this many seconds pass.
+PLAYER_STATE_WAIT_SECONDS: float = 1.0
 
 
 class PhraseQueueEntry:
+    __slots__ = ('_phrase', '_volume', '_speed', 'data')
+
     def __init__(self, phrase: Phrase, volume: float, speed: float):
         self._phrase: Phrase = phrase
         self._volume: float = volume
@@ -297,8 +302,12 @@ class SlaveCommunication:
         self.observer_sequence_number: int = 0
         # Request_id of most recent completed item from mpv
         self._previous_entry: PhraseQueueEntry | None = None
+        # Set whenever something happens that may make the player hungry
+        self._player_state_changed: threading.Event = threading.Event()
 
         Monitor.register_abort_listener(self.abort_listener, name=self.thread_name)
+        Monitor.register_abort_queue(self.phrase_queue,
+                                     name=f'{self.thread_name}_queue')
         # clz.get.debug(f'Starting slave player args: {args}')
         if self.idle_on_play_video:
             KodiPlayerMonitor.register_player_status_listener(
@@ -479,6 +488,7 @@ class SlaveCommunication:
                                 f' < RUNNING.value: {RunState.RUNNING.value}')
             entry: PhraseQueueEntry = PhraseQueueEntry(phrase, volume, speed)
             self.phrase_queue.put(entry)
+            self._player_state_changed.set()
         except AbortException:
             reraise(*sys.exc_info())
         except:
@@ -500,7 +510,7 @@ class SlaveCommunication:
                 if entry is not None and entry.phrase.is_expired():
                     if MY_LOGGER.isEnabledFor(DEBUG):
                         MY_LOGGER.debug(f'EXPIRED: {entry.phrase.short_text()}')
-                entry = self.phrase_queue.get_nowait()
+                entry = Monitor.get_or_abort(self.phrase_queue, block=False)
                 self._previous_entry = entry
             except queue.Empty:
                 self._previous_entry = None
@@ -520,21 +530,26 @@ class SlaveCommunication:
         """
         clz = SlaveCommunication
         try:
-            while not Monitor.exception_on_abort(0.1):
+            while not Monitor.exception_on_abort():
                 try:
                     #  If there is no previous entry, or if it is expired,
                     # then get another one.
                     entry: PhraseQueueEntry | None = self.get_valid_entry()
                     if entry is None:
+                        # Sleep until a phrase arrives, or abort
+                        self._previous_entry = Monitor.get_or_abort(self.phrase_queue)
                         continue
                     # Now that there is a usable entry, see if it is needed
                     # or if we should wait until the player needs it.
                     # Keep PhraseLists together.
+                    # Clear before checking so that no change is missed
+                    self._player_state_changed.clear()
                     if (not self._player_state.is_player_hungry() and
                             self._player_state.is_phraselist_complete(entry.phrase)):
                         if MY_LOGGER.isEnabledFor(DEBUG_V):
                             MY_LOGGER.debug_v(f'Not hungry')
                         # Usable or None  phrase kept in self._previous_entry
+                        self._player_state_changed.wait(timeout=PLAYER_STATE_WAIT_SECONDS)
                         continue
                     self.play_phrase(entry.phrase, entry.volume, entry.speed)
                     entry = None
@@ -553,8 +568,8 @@ class SlaveCommunication:
         """
         while not self.phrase_queue.empty():
             try:
-                self.phrase_queue.get(block=False, timeout=0.01)
-            except queue.Empty:
+                Monitor.get_or_abort(self.phrase_queue, block=False)
+            except (queue.Empty, AbortException):
                 break
 
     def play_phrase(self, phrase: Phrase, volume: float | None,
@@ -791,6 +806,7 @@ class SlaveCommunication:
         return self.run_state
 
     def abort_listener(self) -> None:
+        self._player_state_changed.set()
         # Shut down mpv
         #  Debug.dump_all_threads()
         self.destroy()
@@ -911,6 +927,7 @@ class SlaveCommunication:
                 try:
                     if line and len(line) > 0:
                         self._player_state.update_data(line)
+                        self._player_state_changed.set()
                 except AbortException:
                     reraise(*sys.exc_info())
                 except Exception as e:
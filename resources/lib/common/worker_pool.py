@@ -0,0 +1,281 @@
+# coding=utf-8
+from __future__ import annotations
+
+import heapq
+import threading
+import time
+from collections import deque
+from typing import Deque, NamedTuple
+
+from common import *
+from common.constants import Constants
+from common.logger import *
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class PoolTask(NamedTuple):
+    # time.monotonic() at which the task may run
+    due: float
+    # Orders tasks due at the same time
+    serial: int
+    func: Callable
+    args: List[Any]
+    kwargs: Dict[str, Any]
+    name: str
+
+
+class WorkerPool:
+    """
+    Runs short-lived tasks on at most max_workers threads, instead of
+    starting a thread for each task. Tasks wait in a queue while every
+    worker is busy.
+
+    Each task is run as utils.util.thread_wrapper runs a thread's target: an
+    AbortException ends the worker, any other exception is logged. A task
+    submitted with a delay waits in the pool, not on a worker, until it is
+    due. Thread-local state registered with
+    WorkerPools.register_thread_state_reset is reset before and after each
+    task, so that a task does not see what an earlier one left on the
+    worker. Workers are started as needed and end after
+    WORKER_POOL_IDLE_SECONDS without work. Once shut down (on abort),
+    queued tasks are dropped and workers end after their current task.
+
+    Use WorkerPools.submit rather than creating a WorkerPool.
+    """
+
+    def __init__(self, name: str, max_workers: int) -> None:
+        self.name: str = name
+        self.max_workers: int = max_workers
+        self._cond: threading.Condition = threading.Condition()
+        self._ready: Deque[PoolTask] = deque()
+        # Heap of tasks waiting for their delay to pass
+        self._delayed: List[PoolTask] = []
+        self._serial: int = 0
+        self._workers: int = 0
+        self._idle: int = 0
+        self._active: int = 0
+        self._shutdown: bool = False
+        self.submitted: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.dropped: int = 0
+        self.threads_started: int = 0
+        self.max_queued: int = 0
+
+    def submit(self, func: Callable, args: List[Any] | None = None,
+               name: str = '?', delay: float = 0.0, **kwargs) -> None:
+        """
+        Queues func(*args, **kwargs) to run on a worker of this pool
+
+        :param func: function to run
+        :param args: args for function
+        :param name: names the worker while it runs func
+        :param delay: Seconds to delay before running
+        :param kwargs: More args for function
+        """
+        start_worker: bool = False
+        with self._cond:
+            if self._shutdown:
+                self.dropped += 1
+                return
+            self._serial += 1
+            due: float = time.monotonic() + (delay or 0.0)
+            task: PoolTask = PoolTask(due, self._serial, func,
+                                      [] if args is None else args, kwargs, name)
+            if delay:
+                heapq.heappush(self._delayed, task)
+            else:
+                self._ready.append(task)
+            self.submitted += 1
+            queued: int = len(self._ready) + len(self._delayed)
+            self.max_queued = max(self.max_queued, queued)
+            if self._workers == 0 or (len(self._ready) > self._idle
+                                      and self._workers < self.max_workers):
+                self._workers += 1
+                self.threads_started += 1
+                start_worker = True
+            self._cond.notify()
+        if start_worker:
+            worker: threading.Thread = threading.Thread(
+                    target=self._work,
+                    name=f'{self.name}Pool_{self.threads_started}')
+            worker.start()
+            from common.garbage_collector import GarbageCollector
+            GarbageCollector.add_thread(worker)
+
+    def shutdown(self) -> None:
+        """
+        Drops queued tasks. Workers end once their current task is done.
+        """
+        with self._cond:
+            self._shutdown = True
+            self.dropped += len(self._ready) + len(self._delayed)
+            self._ready.clear()
+            self._delayed.clear()
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {'queued': len(self._ready),
+                    'delayed': len(self._delayed),
+                    'max_queued': self.max_queued,
+                    'workers': self._workers,
+                    'active': self._active,
+                    'threads_started': self.threads_started,
+                    'submitted': self.submitted,
+                    'completed': self.completed,
+                    'failed': self.failed,
+                    'dropped': self.dropped}
+
+    def _work(self) -> None:
+        """
+        Body of each worker thread
+        """
+        thread: threading.Thread = threading.current_thread()
+        worker_name: str = thread.name
+        while True:
+            task: PoolTask | None = self._next_task()
+            if task is None:
+                return
+            thread.name = f'{worker_name}:{task.name}'
+            aborted: bool = False
+            failed: bool = False
+            try:
+                WorkerPools.reset_thread_state()
+                task.func(*task.args, **task.kwargs)
+            except AbortException:
+                aborted = True  # Let thread die
+            except Exception:
+                failed = True
+                MY_LOGGER.exception(f'task: {task.name}')
+            finally:
+                WorkerPools.reset_thread_state()
+            thread.name = worker_name
+            with self._cond:
+                self._active -= 1
+                self.completed += 1
+                if failed:
+                    self.failed += 1
+                if aborted:
+                    self._workers -= 1
+                    return
+
+    def _next_task(self) -> PoolTask | None:
+        """
+        Waits for a task to be due.
+
+        :return: The task, or None when the worker is to end
+        """
+        idle_since: float = time.monotonic()
+        with self._cond:
+            while not self._shutdown:
+                now: float = time.monotonic()
+                while len(self._delayed) > 0 and self._delayed[0].due <= now:
+                    self._ready.append(heapq.heappop(self._delayed))
+                if len(self._ready) > 0:
+                    self._active += 1
+                    return self._ready.popleft()
+                idle: float = now - idle_since
+                if (idle >= Constants.WORKER_POOL_IDLE_SECONDS and
+                        (len(self._delayed) == 0 or self._idle > 0)):
+                    break
+                timeout: float = Constants.WORKER_POOL_IDLE_SECONDS - idle
+                if len(self._delayed) > 0:
+                    timeout = self._delayed[0].due - now
+                self._idle += 1
+                self._cond.wait(timeout=timeout)
+                self._idle -= 1
+            self._workers -= 1
+            return None
+
+
+class WorkerPools:
+    """
+    The pools shared by the addon, one for each kind of work, so that slow
+    work of one kind does not hold up another:
+
+        IO: file and database reads and writes
+        CPU: parsing and other computation
+        SUBPROCESS: running and waiting on external programs
+
+    Tasks are run in the order submitted. Work which can wait a long time
+    for something other than its own IO (such as speech generation waiting
+    on GenerationScheduler, or Monitor's notification listeners) does not
+    belong in a pool, since it would hold a worker that more urgent work
+    queued behind it needs.
+
+    Every pool is shut down when Kodi asks the addon to abort.
+
+    Use:
+        WorkerPools.submit(WorkerPools.IO, func, name='abc', x=1)
+    """
+    IO: Final[str] = 'io'
+    CPU: Final[str] = 'cpu'
+    SUBPROCESS: Final[str] = 'subprocess'
+
+    _lock: threading.RLock = threading.RLock()
+    _pools: Dict[str, WorkerPool] = {}
+    _abort_registered: bool = False
+    # Called on each worker before and after every task
+    _thread_state_resets: List[Callable[[], None]] = []
+
+    @classmethod
+    def get_pool(cls, pool_name: str) -> WorkerPool:
+        with cls._lock:
+            pool: WorkerPool | None = cls._pools.get(pool_name)
+            if pool is not None:
+                return pool
+            max_workers: int = Constants.WORKER_POOL_THREADS[pool_name]
+            pool = WorkerPool(pool_name, max_workers)
+            cls._pools[pool_name] = pool
+            if not cls._abort_registered:
+                cls._abort_registered = True
+                from common.monitor import Monitor
+                Monitor.register_abort_listener(cls.shutdown,
+                                                name='wrkrPlsAbrt')
+            return pool
+
+    @classmethod
+    def submit(cls, pool_name: str, func: Callable,
+               args: List[Any] | None = None, name: str = '?',
+               delay: float = 0.0, **kwargs) -> None:
+        """
+        Runs func(*args, **kwargs) on a worker of the named pool. See
+        WorkerPool.submit
+        """
+        cls.get_pool(pool_name).submit(func, args, name=name, delay=delay,
+                                       **kwargs)
+
+    @classmethod
+    def register_thread_state_reset(cls, reset: Callable[[], None]) -> None:
+        """
+        Registers a function which clears thread-local state (such as
+        GenerationScheduler's priority) of the calling thread. Workers call
+        it before and after every task.
+        """
+        with cls._lock:
+            if reset not in cls._thread_state_resets:
+                cls._thread_state_resets.append(reset)
+
+    @classmethod
+    def reset_thread_state(cls) -> None:
+        resets: List[Callable[[], None]] = cls._thread_state_resets
+        for reset in resets:
+            try:
+                reset()
+            except Exception:
+                MY_LOGGER.exception(f'reset: {reset}')
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            pools: List[WorkerPool] = list(cls._pools.values())
+        for pool in pools:
+            pool.shutdown()
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, int]]:
+        with cls._lock:
+            pools: List[WorkerPool] = list(cls._pools.values())
+        return {pool.name: pool.get_stats() for pool in pools}
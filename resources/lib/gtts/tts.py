@@ -76,6 +76,13 @@ class gTTS:
         timeout (float or tuple, optional): Seconds to wait for the server to
             send data before giving up, as a float, or a ``(connect timeout,
             read timeout)`` tuple. ``None`` will wait forever (default).
+        session (requests.Session, optional): Session used to send the
+            request(s). Sharing one session between instances reuses its
+            keep-alive connections. ``None`` creates a new session for
+            every request (default).
+        translate_url (string, optional): URL to send the request(s) to
+            instead of the Google Translate host selected by ``tld``.
+            Mostly useful for testing against a local server.
 
     See Also:
         :doc:`Pre-processing and tokenizing <tokenizer>`
@@ -116,6 +123,8 @@ class gTTS:
             ]
         ).run,
         timeout=None,
+        session=None,
+        translate_url=None,
     ):
 
         if len(pre_processor_funcs) == 0:
@@ -165,6 +174,8 @@ class gTTS:
         self.tokenizer_func = tokenizer_func
 
         self.timeout = timeout
+        self.session = session
+        self.translate_url = translate_url
 
     def _tokenize(self, text):
         # Pre-clean
@@ -202,9 +213,11 @@ class gTTS:
             list: ``requests.PreparedRequests_``. <https://2.python-requests.org/en/master/api/#requests.PreparedRequest>`_``.
         """
         # TTS API URL
-        translate_url = _translate_url(
-            tld=self.tld, path="_/TranslateWebserverUi/data/batchexecute"
-        )
+        translate_url = self.translate_url
+        if translate_url is None:
+            translate_url = _translate_url(
+                tld=self.tld, path="_/TranslateWebserverUi/data/batchexecute"
+            )
 
         text_parts = self._tokenize(self.text)
         log.debug("text_parts: %s", str(text_parts))
@@ -265,14 +278,22 @@ class gTTS:
         prepared_requests = self._prepare_requests()
         for idx, pr in enumerate(prepared_requests):
             try:
-                with requests.Session() as s:
-                    # Send request
-                    r = s.send(
+                if self.session is not None:
+                    r = self.session.send(
                         request=pr,
                         verify=False,
                         proxies=urllib.request.getproxies(),
                         timeout=self.timeout,
                     )
+                else:
+                    with requests.Session() as s:
+                        # Send request
+                        r = s.send(
+                            request=pr,
+                            verify=False,
+                            proxies=urllib.request.getproxies(),
+                            timeout=self.timeout,
+                        )
 
                 log.debug("headers-%i: %s", idx, r.request.headers)
                 log.debug("url-%i: %s", idx, r.request.url)
@@ -5,7 +5,6 @@ import xml.etree.ElementTree as ET
 from pathlib import Path
 from typing import Dict, ForwardRef, List, Tuple
 
-import xbmc
 import xbmcgui
 
 from common.logger import BasicLogger
@@ -16,6 +15,7 @@ from gui.base_tags import control_elements, ControlElement, Item, WindowType
 
 from gui.base_parser import BaseParser
 from gui.base_tags import ElementKeywords as EK
+from gui.info_snapshot import InfoSnapshot
 from gui.statements import Statements
 from utils import util
 from windows.ui_constants import UIConstants
@@ -71,9 +71,9 @@ class BaseLabelModel(BaseModel):
         if text is None or text == '-':
             # Perhaps an info label
             if hasattr(self, 'info_expr') and self.info_expr != '':
-                text = xbmc.getInfoLabel(f'{self.info_expr}')
+                text = InfoSnapshot.get_info_label(f'{self.info_expr}')
             if text is None or text == '-':
-                text = xbmc.getInfoLabel(f'Control.getLabel({self.control_id})')
+                text = InfoSnapshot.get_info_label(f'Control.getLabel({self.control_id})')
         if text == '' or text == '-':
             clz._logger.debug(f'text is None')
             success = False
@@ -129,7 +129,7 @@ class BaseLabelModel(BaseModel):
             if not success:
                 try:
                     query: str = f'Control.GetLabel({control_id})'
-                    text: str = xbmc.getInfoLabel(query)
+                    text: str = InfoSnapshot.get_info_label(query)
                     clz._logger.debug(f'Text: {text}')
                     if text != '':
                         stmts.last.phrases.append(Phrase(text=text, check_expired=False))
@@ -151,7 +151,7 @@ class BaseLabelModel(BaseModel):
         if self.control_id != -1:
             try:
                 query: str = f'Control.GetLabel({control_id}).index(1)'
-                text: str = xbmc.getInfoLabel(query)
+                text: str = InfoSnapshot.get_info_label(query)
                 clz._logger.debug(f'Text: {text}')
                 if text != '':
                     stmts.last.phrases.append(Phrase(text=text, check_expired=False))
@@ -16,6 +16,7 @@ from gui.base_tags import ControlElement, Requires, WindowType
 
 from gui.base_parser import BaseParser
 from gui.i_model import IModel
+from gui.info_snapshot import InfoSnapshot
 from gui.interfaces import IWindowStructure
 from gui.statements import Statement, Statements, StatementType
 from utils import util
@@ -564,7 +565,7 @@ class BaseModel(IModel):
         if self.control_id != -1:
             try:
                 query: str = f'Control.GetLabel({control_id}.index(1))'
-                text: str = xbmc.getInfoLabel(query)
+                text: str = InfoSnapshot.get_info_label(query)
                 if MY_LOGGER.isEnabledFor(DEBUG):
                     MY_LOGGER.debug(f'Text: {text}')
                 if text != '':
@@ -630,7 +631,7 @@ class BaseModel(IModel):
         if self.control_id != -1:
             try:
                 query: str = f'Control.GetLabel({control_id}.index(1))'
-                text: str = xbmc.getInfoLabel(query)
+                text: str = InfoSnapshot.get_info_label(query)
                 bool_text: str = ''
                 if MY_LOGGER.isEnabledFor(DEBUG):
                     MY_LOGGER.debug(f'Text: {text}')
@@ -689,7 +690,8 @@ class BaseModel(IModel):
             return -1
         # Can specify the control_id, but assume we have focus
         container_id: str = f'{self.control_id}'
-        num_items_str: str = xbmc.getInfoLabel(f'Container({container_id}).NumItems')
+        num_items_str: str = InfoSnapshot.get_info_label(
+                f'Container({container_id}).NumItems')
         #  MY_LOGGER.debug(f'num_items_str: {num_items_str}')
         if num_items_str.isdigit():
             return int(num_items_str)
@@ -724,7 +726,7 @@ class BaseModel(IModel):
         if label_expr.startswith('$INFO['):
             label_expr = label_expr[6:-1]
         try:
-            text = xbmc.getInfoLabel(f'{label_expr}')
+            text = InfoSnapshot.get_info_label(f'{label_expr}')
             if MY_LOGGER.isEnabledFor(DEBUG):
                 MY_LOGGER.debug(f'label_expr: {label_expr} = {text}')
         except ValueError as e:
@@ -807,7 +809,8 @@ class BaseModel(IModel):
             # window id using CondVisibility. Grrr
 
             #  MY_LOGGER.debug(f'is_visible control_id: {self.control_id}')
-            return xbmc.getCondVisibility(f'Control.IsVisible({self.control_id})')
+            return InfoSnapshot.get_cond_visibility(
+                    f'Control.IsVisible({self.control_id})')
 
             # Can not use this on all control types (GroupList is one that blows up)
             # return WindowStateMonitor.is_visible(self.control_id,
@@ -960,7 +963,7 @@ class BaseModel(IModel):
         :param clean_string if True then 'clean' the string using
         :return:
         """
-        text = xbmc.getInfoLabel('System.CurrentControl')
+        text = InfoSnapshot.get_info_label('System.CurrentControl')
 
         return False
 
@@ -1076,16 +1079,17 @@ class BaseModel(IModel):
             query_1 = f'Window().Property({info})'
         if query_1 != '' and label_1:
             try:
-                text_1 = xbmc.getInfoLabel(f'{query_1}')  # TODO: May require post-processing
+                text_1 = InfoSnapshot.get_info_label(f'{query_1}')  # TODO: May require post-processing
                 text_1 = text_1.strip()
-                visible: bool = xbmc.getCondVisibility(f'Control.IsVisible({control_id})')
+                visible: bool = InfoSnapshot.get_cond_visibility(
+                        f'Control.IsVisible({control_id})')
                 MY_LOGGER.debug(f'query_1: {query_1} text_1: {text_1} visible {visible}')
                 MY_LOGGER.debug(f'text_2: {text_2}')
             except:
                 MY_LOGGER.exception(f'control_expr: {query_1} label_1')
         if query_2 != '' and label_2:
             try:
-                text_2 = xbmc.getInfoLabel(query_2)  # TODO: May require post-processing
+                text_2 = InfoSnapshot.get_info_label(query_2)  # TODO: May require post-processing
                 text_2 = text_2.strip()
             except:
                 MY_LOGGER.exception(f'control_expr: {query_2} label_1')
@@ -1105,7 +1109,7 @@ class BaseModel(IModel):
         clz = BaseModel
         if query != '':
             try:
-                text: str = xbmc.getInfoLabel(query)  # TODO: May require post-processing
+                text: str = InfoSnapshot.get_info_label(query)  # TODO: May require post-processing
                 text = text.strip()
                 if text != '':
                     stmts.append(Statement(PhraseList.create(texts=text,
@@ -3,7 +3,6 @@ from __future__ import annotations
 
 from typing import Callable, List
 
-import xbmc
 import xbmcgui
 
 from common.logger import BasicLogger
@@ -14,6 +13,7 @@ from gui.base_parser import BaseParser
 from gui.base_tags import control_elements, ControlElement, Item
 from gui.button_topic_model import ButtonTopicModel
 from gui.element_parser import ElementHandler
+from gui.info_snapshot import InfoSnapshot
 from gui.no_topic_models import NoButtonTopicModel
 from gui.parser.parse_button import ParseButton
 from gui.topic_model import TopicModel
@@ -156,7 +156,7 @@ class ButtonModel(BaseLabelModel):
             if not success:
                 try:
                     query: str = f'Control.GetLabel({control_id})'
-                    text: str = xbmc.getInfoLabel(query)
+                    text: str = InfoSnapshot.get_info_label(query)
                     clz._logger.debug(f'Text: {text}')
                     if text != '':
                         phrases.append(Phrase(text=text, check_expired=False))
@@ -16,6 +16,7 @@ from gui.base_tags import control_elements, ControlElement, Item
 from gui.control_relationships import Topic
 from gui.element_parser import (ElementHandler)
 from gui.group_list_topic_model import GroupListTopicModel
+from gui.info_snapshot import InfoSnapshot
 from gui.no_topic_models import NoGroupListTopicModel
 from gui.parser.parse_group_list import ParseGroupList
 from gui.statements import Statements
@@ -349,12 +350,15 @@ class GroupListModel(BaseModel):
             #     the control. Here we are getting it from the container without giving
             #     the control the ability to customize
 
-            num_items: str = xbmc.getInfoLabel(f'Container({container_id}).NumItems')
-            item_num: str = xbmc.getInfoLabel(f'Container({container_id}).CurrentItem')
-            content: str = xbmc.getInfoLabel(f'Container({container_id}).Content')
+            num_items: str = InfoSnapshot.get_info_label(
+                    f'Container({container_id}).NumItems')
+            item_num: str = InfoSnapshot.get_info_label(
+                    f'Container({container_id}).CurrentItem')
+            content: str = InfoSnapshot.get_info_label(
+                    f'Container({container_id}).Content')
             # value: str = xbmc.getInfoLabel(
             #         f'Container(container_id).ListItemPosition(0).Label')
-            value: str = xbmc.getInfoLabel('ListItem.Label')
+            value: str = InfoSnapshot.get_info_label('ListItem.Label')
             control_type: ControlElement = ControlElement.UNKNOWN
             if clz._logger.isEnabledFor(DEBUG_V):
                 clz._logger.debug_v(f'item_num: {item_num} control_type: {control_type} '
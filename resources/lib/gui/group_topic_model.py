@@ -2,6 +2,7 @@
 
 from common.logger import BasicLogger, DEBUG_V, DISABLED
 from gui.base_model import BaseModel
+from gui.info_snapshot import InfoSnapshot
 from gui.parser.parse_topic import ParseTopic
 from gui.topic_model import TopicModel
 from windows.window_state_monitor import WinDialogState
@@ -138,10 +139,10 @@ class GroupTopicModel(TopicModel):
         info: str = ''
         if self.labeled_by_expr.startswith('$INFO['):
             info: str = self.labeled_by_expr[6:-1]
-            label: str = xbmc.getInfoLabel(info)
+            label: str = InfoSnapshot.get_info_label(info)
         elif self.labeled_by_expr.startswith('$PROP['):
             info: str = self.labeled_by_expr[6:-1]
-            label: str = xbmc.getInfoLabel(f'Window().Property({info})')
+            label: str = InfoSnapshot.get_info_label(f'Window().Property({info})')
         if label is not None and label != '':
             phrases.add_text(texts=label)
             return True
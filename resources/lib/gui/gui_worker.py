@@ -3,13 +3,14 @@ from __future__ import annotations
 
 import queue
 import threading
-from typing import ForwardRef, List
+from typing import Dict, ForwardRef, List
 
 from common import AbortException
 from common.garbage_collector import GarbageCollector
 from common.logger import *
 from common.monitor import Monitor
 from gui.gui_globals import GuiGlobals
+from gui.info_snapshot import InfoSnapshot
 from gui.statements import Statements
 from gui.topic_model import TopicModel
 from gui.window_model import WindowModel
@@ -33,19 +34,22 @@ class GuiWorkerQueue:
 
     sequence_number: int = 0
     canceled_sequence_number: int = -1
+    # Number of states dropped because a newer state for the same window
+    # arrived before they were processed
+    coalesced: int = 0
     _instance: 'GuiWorkerQueue' = None
 
-    class QueueItem:
-
-        def __init__(self, windialog_state: WinDialogState):
-            self.windialog_state: WinDialogState = windialog_state
-
     def __init__(self):
         clz = GuiWorkerQueue
 
         # active_queue is True as long as there is a configured active_queue engine
         self.active_queue: bool = False
+        # Holds the id of each window with a pending state, in the order that
+        # they were first queued. The state itself is in pending_states.
         self.topics_queue = queue.Queue(50)
+        # window id -> newest state not yet processed
+        self.pending_states: Dict[int, WinDialogState] = {}
+        self.pending_lock: threading.Lock = threading.Lock()
         self.queue_processor: threading.Thread | None = None
 
     @classmethod
@@ -57,6 +61,8 @@ class GuiWorkerQueue:
         if cls._instance is None:
             cls._instance = GuiWorkerQueue()
             cls._instance.active_queue = True
+            Monitor.register_abort_queue(cls._instance.topics_queue,
+                                         name='GuiWrkrQAbrt')
         if cls._instance.queue_processor is None:
             cls._instance.queue_processor = threading.Thread(
                     target=cls._instance._handleQueue, name=f'GuiWrkrQ')
@@ -81,14 +87,25 @@ class GuiWorkerQueue:
         if MY_LOGGER.isEnabledFor(DEBUG):
             MY_LOGGER.debug_v(f'Threaded GuiWorkerQueue started')
         try:
-            while self.active_queue and not Monitor.wait_for_abort(timeout=0.1):
-                item: GuiWorkerQueue.QueueItem | None = None
+            while self.active_queue:
                 try:
-                    item = self.topics_queue.get(timeout=0.0)
+                    # Sleeps until there is a change to triage, or abort
+                    window_id: int = Monitor.get_or_abort(self.topics_queue)
                     self.topics_queue.task_done()
+                    with self.pending_lock:
+                        windialog_state: WinDialogState | None
+                        windialog_state = self.pending_states.pop(window_id, None)
+                    if windialog_state is None:
+                        continue  # Emptied by empty_queue
                     clz.sequence_number += 1
-                    GuiWorker.process_queue(item.windialog_state,
-                                            clz.sequence_number)
+                    # Kodi is asked for each InfoLabel and condition at most
+                    # once while voicing this change
+                    InfoSnapshot.begin(clz.sequence_number)
+                    try:
+                        GuiWorker.process_queue(windialog_state,
+                                                clz.sequence_number)
+                    finally:
+                        InfoSnapshot.end()
                 except queue.Empty:
                     # MY_LOGGER.debug_v('queue empty')
                     pass
@@ -103,16 +120,25 @@ class GuiWorkerQueue:
 
         self.active_queue = False
 
+    @classmethod
+    def cancel_active(cls):
+        """
+        Abandons voicing of the state being processed, if any.
+        """
+        cls.canceled_sequence_number = cls.sequence_number
+
     @classmethod
     def empty_queue(cls):
         #  MY_LOGGER.debug(f'empty_queue')
-        try:
-            while True:
-                cls.canceled_sequence_number = cls.sequence_number
-                cls._instance.topics_queue.get_nowait()
-                cls._instance.topics_queue.task_done()
-        except queue.Empty:
-            return
+        cls.canceled_sequence_number = cls.sequence_number
+        with cls._instance.pending_lock:
+            cls._instance.pending_states.clear()
+            try:
+                while True:
+                    Monitor.get_or_abort(cls._instance.topics_queue, block=False)
+                    cls._instance.topics_queue.task_done()
+            except (queue.Empty, AbortException):
+                return
 
     @classmethod
     def add_task(cls, windialog_state: WinDialogState):
@@ -150,8 +176,28 @@ class GuiWorkerQueue:
                 #  focused_topic = window_model.topic_by_tree_id.get(str(focus_id))
                 topic_str: str = ''
         """
-        cls._instance.topics_queue.put_nowait(
-                GuiWorkerQueue.QueueItem(windialog_state))
+        # Only the newest state of a window is voiced. A state replaced before
+        # it is processed passes on the changes that it reports (window
+        # changed, etc.), since they have not been voiced either.
+        with cls._instance.pending_lock:
+            superseded: WinDialogState | None
+            superseded = cls._instance.pending_states.pop(current_windialog_id,
+                                                          None)
+            if superseded is not None:
+                windialog_state = windialog_state.coalesce(superseded)
+                cls.coalesced += 1
+            cls._instance.pending_states[current_windialog_id] = windialog_state
+            if superseded is None:
+                cls._instance.topics_queue.put_nowait(current_windialog_id)
+        if superseded is not None and MY_LOGGER.isEnabledFor(DEBUG_V):
+            MY_LOGGER.debug_v(f'Coalesced {superseded.succinct} '
+                              f'coalesced: {cls.coalesced}')
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int]:
+        return {'sequence_number': cls.sequence_number,
+                'coalesced': cls.coalesced,
+                'queued': cls._instance.topics_queue.qsize()}
 
 
 class GuiWorker:
@@ -242,11 +288,12 @@ class GuiWorker:
                 GuiWorker.previous_topic_chain.clear()
                 GuiWorkerQueue.empty_queue()
             elif windialog_state.focus_changed:
-                MY_LOGGER.debug(f'CLEAR QUEUE focus changed changed')
-                GuiWorkerQueue.empty_queue()
+                # Any state pending for the window is replaced by add_task
+                MY_LOGGER.debug(f'CANCEL ACTIVE focus changed changed')
+                GuiWorkerQueue.cancel_active()
             elif windialog_state.visibility_changed:
-                MY_LOGGER.debug(f'CLEAR QUEUE visibility changed')
-                GuiWorkerQueue.empty_queue()
+                MY_LOGGER.debug(f'CANCEL ACTIVE visibility changed')
+                GuiWorkerQueue.cancel_active()
 
             #  MY_LOGGER.debug(f'Calling add_task')
             GuiWorkerQueue.add_task(windialog_state)
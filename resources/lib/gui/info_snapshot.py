@@ -0,0 +1,136 @@
+# coding=utf-8
+from __future__ import annotations
+
+import threading
+import time
+
+import xbmc
+
+from common import *
+from common.logger import *
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class InfoSnapshot:
+    """
+    Caches InfoLabels and visibility conditions for the duration of one
+    voicing transaction of the GuiWorkerQueue (one sequence number), so
+    that each is evaluated by Kodi at most once per transaction. Voicing a
+    focus change typically asks for the same label, or visibility of the
+    same control, several times.
+
+    A snapshot belongs to the thread that begins it. Other threads, and
+    calls made outside of a transaction, always ask Kodi.
+
+    Use:
+        InfoSnapshot.begin(sequence_number)
+        try:
+            <voice>  # Use get_info_label and get_cond_visibility
+        finally:
+            InfoSnapshot.end()
+    """
+    _lock: threading.RLock = threading.RLock()
+    # Holds the snapshot of the thread running a transaction: sequence_number,
+    # labels, conditions, hits, calls and kodi_seconds
+    _local: threading.local = threading.local()
+    # Totals over every transaction (and calls outside of any)
+    hits: int = 0
+    calls: int = 0
+    kodi_seconds: float = 0.0
+    transactions: int = 0
+
+    @classmethod
+    def begin(cls, sequence_number: int) -> None:
+        """
+        Starts a snapshot for the current thread, discarding any earlier one.
+
+        :param sequence_number: GuiWorkerQueue sequence number of the
+                                transaction
+        """
+        local: threading.local = cls._local
+        local.sequence_number = sequence_number
+        local.labels = {}
+        local.conditions = {}
+        local.hits = 0
+        local.calls = 0
+        local.kodi_seconds = 0.0
+
+    @classmethod
+    def end(cls) -> None:
+        """
+        Ends the snapshot of the current thread and adds its counts to the
+        totals.
+        """
+        local: threading.local = cls._local
+        sequence_number: int | None = getattr(local, 'sequence_number', None)
+        if sequence_number is None:
+            return
+        local.sequence_number = None
+        local.labels = None
+        local.conditions = None
+        with cls._lock:
+            cls.hits += local.hits
+            cls.calls += local.calls
+            cls.kodi_seconds += local.kodi_seconds
+            cls.transactions += 1
+        if MY_LOGGER.isEnabledFor(DEBUG):
+            MY_LOGGER.debug(f'sequence #: {sequence_number} '
+                            f'Kodi calls: {local.calls} hits: {local.hits} '
+                            f'ms in Kodi: {local.kodi_seconds * 1000.0:.1f}')
+
+    @classmethod
+    def get_info_label(cls, label: str) -> str:
+        """
+        Same as xbmc.getInfoLabel, but evaluated at most once per transaction
+        """
+        labels: Dict[str, str] | None = getattr(cls._local, 'labels', None)
+        if labels is not None:
+            value: str | None = labels.get(label)
+            if value is not None:
+                cls._local.hits += 1
+                return value
+        start: float = time.perf_counter()
+        value = xbmc.getInfoLabel(label)
+        cls._count_call(time.perf_counter() - start, labels is not None)
+        if labels is not None:
+            labels[label] = value
+        return value
+
+    @classmethod
+    def get_cond_visibility(cls, condition: str) -> bool:
+        """
+        Same as xbmc.getCondVisibility, but evaluated at most once per
+        transaction
+        """
+        conditions: Dict[str, bool] | None = getattr(cls._local, 'conditions',
+                                                     None)
+        if conditions is not None:
+            value: bool | None = conditions.get(condition)
+            if value is not None:
+                cls._local.hits += 1
+                return value
+        start: float = time.perf_counter()
+        value = xbmc.getCondVisibility(condition)
+        cls._count_call(time.perf_counter() - start, conditions is not None)
+        if conditions is not None:
+            conditions[condition] = value
+        return value
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int | float]:
+        with cls._lock:
+            return {'transactions': cls.transactions,
+                    'hits': cls.hits,
+                    'calls': cls.calls,
+                    'kodi_ms': cls.kodi_seconds * 1000.0}
+
+    @classmethod
+    def _count_call(cls, seconds: float, in_transaction: bool) -> None:
+        if in_transaction:
+            cls._local.calls += 1
+            cls._local.kodi_seconds += seconds
+            return
+        with cls._lock:
+            cls.calls += 1
+            cls.kodi_seconds += seconds
@@ -14,6 +14,7 @@ from gui.base_parser import BaseParser
 from gui.base_tags import (control_elements, ControlElement, Item)
 from gui.element_parser import (ElementHandler)
 from gui.focused_layout_model import FocusedLayoutModel
+from gui.info_snapshot import InfoSnapshot
 from gui.item_layout_model import ItemLayoutModel
 from gui.list_topic_model import ListTopicModel
 from gui.no_topic_models import NoListTopicModel
@@ -209,7 +210,8 @@ class ListModel(BaseModel):
             # pos: int = util.get_non_negative_int(pos_str)
             # pos += 1  # Convert to one-based item #
             # MY_LOGGER.debug(f'container position: {pos} container_id: {container_id}')
-            current_item: str = xbmc.getInfoLabel(f'Container({container_id}).CurrentItem')
+            current_item: str = InfoSnapshot.get_info_label(
+                    f'Container({container_id}).CurrentItem')
             MY_LOGGER.debug(f'current_item: {current_item}')
             stmts.last.phrases.append(Phrase(text=f'Item: {current_item}',
                                              check_expired=False))
@@ -236,7 +238,7 @@ class ListModel(BaseModel):
         #        get the item number of the VISIBLE items in whatever space is
         #        the list allows. Useless for my purpose.
         container_id = self.control_id
-        pos_str: str = xbmc.getInfoLabel(f'Container({container_id}).Position')
+        pos_str: str = InfoSnapshot.get_info_label(f'Container({container_id}).Position')
         # num_all_items: str = xbmc.getInfoLabel(f'Container({container_id}).NumAllItems')
         # num_items: str = xbmc.getInfoLabel(f'Container({container_id}).NumItems')
         # num_pages: str = xbmc.getInfoLabel(f'Container({container_id}).NumPages')
@@ -302,11 +304,37 @@ class ListModel(BaseModel):
           This will be a bit of an adventure.
         """
 
+        MY_LOGGER.debug(f'In get_working_value')
+        focused_info_labels: List[str] = self.get_focused_info_labels()
+        # MY_LOGGER.debug(f'# info_labels: {len(info_labels)} '
+        #                  f'# focused_info_labels: {len(focused_info_labels)}')
+
+        values: List[str] = []
+        '''
+        for info_label in info_labels:
+            MY_LOGGER.debug(f'info_label: {info_label}')
+            query: str
+            query = (f'Container({self.control_id}).ListItemAbsolute({position}).'
+                     f'[{info_label}]')
+            value: str = self.get_info_label(query)
+            MY_LOGGER.debug(f'query: {query}  value: {value}')
+            values.append(value)
+        '''
+        for info_label in focused_info_labels:
+            value: str | None = self.get_info_label(info_label)
+            MY_LOGGER.debug(f'info_label: {info_label} value: {value}')
+            if value is not None:
+                values.append(value)
+        return values
+
+    def get_focused_info_labels(self) -> List[str]:
+        """
+        :return: The info labels of the focused layout currently in effect
+        """
         # First, find the 'active' "item_layout" and "focused_Layout"
         # using the associated condition. The first found that passes
         # the condition wins.
 
-        MY_LOGGER.debug(f'In get_working_value')
         # active_item_layout: ItemLayoutModel | None = None
         active_focused_layout: FocusedLayoutModel | None = None
         # winner: int = -1
@@ -321,7 +349,7 @@ class ListModel(BaseModel):
             MY_LOGGER.debug(f'layout_item: {layout_item} \n query: {query}')
             if query == '':   # Passes
                 break
-            if xbmc.getCondVisibility(query):
+            if InfoSnapshot.get_cond_visibility(query):
                 MY_LOGGER.debug('query passed')
                 break
 
@@ -340,7 +368,7 @@ class ListModel(BaseModel):
             if query == '':
                 failed = False
                 break  # Passes
-            if xbmc.getCondVisibility(query):
+            if InfoSnapshot.get_cond_visibility(query):
                 failed = False
                 break
 
@@ -350,27 +378,7 @@ class ListModel(BaseModel):
             MY_LOGGER.debug('All focused layouts FAILED the condition')
 
         #  info_labels: List[str] = active_item_layout.get_info_labels()
-        focused_info_labels: List[str] = active_focused_layout.get_info_labels()
-        # MY_LOGGER.debug(f'# info_labels: {len(info_labels)} '
-        #                  f'# focused_info_labels: {len(focused_info_labels)}')
-
-        values: List[str] = []
-        '''
-        for info_label in info_labels:
-            MY_LOGGER.debug(f'info_label: {info_label}')
-            query: str
-            query = (f'Container({self.control_id}).ListItemAbsolute({position}).'
-                     f'[{info_label}]')
-            value: str = self.get_info_label(query)
-            MY_LOGGER.debug(f'query: {query}  value: {value}')
-            values.append(value)
-        '''
-        for info_label in focused_info_labels:
-            value: str | None = self.get_info_label(info_label)
-            MY_LOGGER.debug(f'info_label: {info_label} value: {value}')
-            if value is not None:
-                values.append(value)
-        return values
+        return active_focused_layout.get_info_labels()
 
     def __repr__(self) -> str:
         return self.to_string(include_children=False)
@@ -0,0 +1,318 @@
+# coding=utf-8
+from __future__ import annotations
+
+import re
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+from cache.generation_scheduler import GenerationPriority, GenerationScheduler
+from common import *
+from common.constants import Constants
+from common.kodi_player_monitor import KodiPlayerMonitor, KodiPlayerState
+from common.logger import *
+from common.monitor import Monitor
+from common.phrases import Phrase, PhraseList
+from gui.info_snapshot import InfoSnapshot
+from utils import util
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class PrefetchRequest(NamedTuple):
+    container_id: int
+    # Absolute, one-based number of the focused item
+    item_number: int
+    # Number of items in the container
+    num_items: int
+    # Info labels of the focused layout, as voiced for the focused item
+    info_labels: Tuple[str, ...]
+    # 1 when scrolling toward the end of the list, -1 toward the start
+    direction: int
+    depth: int
+    time: float
+
+
+class ListPrefetcher:
+    """
+    Voices, but does not play, the items near the focused item of a list
+    container, so that the next move through the list finds its speech
+    already in the cache.
+
+    ListTopicModel calls note_item each time it voices a newly focused item.
+    Once focus has stayed on an item for LIST_PREFETCH_SETTLE_SECONDS, the
+    labels of up to depth items on either side (those in the direction of
+    scrolling first) are read through Container(id).ListItemNoWrap(offset),
+    seeded into the engine's text cache and then voiced at
+    GenerationPriority.PREFETCH, without checking for expiration. Items are
+    voiced one at a time: the next is not begun while any PREFETCH work is
+    waiting or running. Work is abandoned as soon as focus moves again,
+    including generation still waiting for a GenerationScheduler slot, and
+    nothing is prefetched while Kodi is playing video.
+
+    depth follows the speed of scrolling: the smoothed time between moves
+    through the list covers LIST_PREFETCH_HORIZON_SECONDS, clamped to
+    LIST_PREFETCH_MIN_DEPTH..LIST_PREFETCH_MAX_DEPTH.
+    """
+    # References to the focused item: ListItem.Label, but not ListItem(1).Label,
+    # ListItemNoWrap(1).Label or Container(50).ListItem.Label
+    LIST_ITEM_RE = re.compile(r'(?<![\w.)])ListItem\.')
+    ITEM_REFERENCE_RE = re.compile(r'ListItem')
+
+    _cond: threading.Condition = threading.Condition()
+    _request: PrefetchRequest | None = None
+    _started: bool = False
+    # Last item noted, to measure the speed of scrolling
+    _last_container_id: int = -1
+    _last_item_number: int = -1
+    _last_time: float = 0.0
+    # Smoothed seconds between moves through the same list
+    _move_seconds: float | None = None
+    requests: int = 0
+    prefetched: int = 0
+    already_voiced: int = 0
+    abandoned: int = 0
+    skipped_video: int = 0
+
+    @classmethod
+    def note_item(cls, container_id: int, info_labels: List[str]) -> None:
+        """
+        Called when the focused item of a list is voiced.
+
+        :param container_id: Control id of the list container
+        :param info_labels: Info labels voiced for the focused item. Those that
+                            refer to ListItem are read for the nearby items.
+        """
+        if container_id <= 0:
+            return
+        item_number: int = util.get_non_negative_int(InfoSnapshot.get_info_label(
+                f'Container({container_id}).CurrentItem'))
+        num_items: int = util.get_non_negative_int(InfoSnapshot.get_info_label(
+                f'Container({container_id}).NumItems'))
+        if item_number < 1 or num_items < 2:
+            return
+        now: float = time.monotonic()
+        with cls._cond:
+            direction: int = 1
+            if container_id == cls._last_container_id:
+                if item_number == cls._last_item_number:
+                    return
+                if item_number < cls._last_item_number:
+                    direction = -1
+                seconds: float = min(now - cls._last_time,
+                                     Constants.LIST_PREFETCH_HORIZON_SECONDS)
+                if cls._move_seconds is None:
+                    cls._move_seconds = seconds
+                else:
+                    cls._move_seconds += 0.5 * (seconds - cls._move_seconds)
+            cls._last_container_id = container_id
+            cls._last_item_number = item_number
+            cls._last_time = now
+            depth: int = Constants.LIST_PREFETCH_MIN_DEPTH
+            if cls._move_seconds is not None:
+                depth = round(Constants.LIST_PREFETCH_HORIZON_SECONDS /
+                              max(cls._move_seconds, 0.01))
+                depth = max(Constants.LIST_PREFETCH_MIN_DEPTH,
+                            min(Constants.LIST_PREFETCH_MAX_DEPTH, depth))
+            cls._request = PrefetchRequest(container_id, item_number,
+                                           num_items, tuple(info_labels),
+                                           direction, depth, now)
+            cls.requests += 1
+            if not cls._started:
+                cls._started = True
+                Monitor.register_abort_listener(cls._on_abort,
+                                                name='lstPrftchAbrt')
+                util.runInThread(cls._prefetch_loop, name='lstPrftch',
+                                 delay=0.0)
+            cls._cond.notify_all()
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int | float]:
+        with cls._cond:
+            return {'requests': cls.requests,
+                    'prefetched': cls.prefetched,
+                    'already_voiced': cls.already_voiced,
+                    'abandoned': cls.abandoned,
+                    'skipped_video': cls.skipped_video,
+                    'move_ms': (0.0 if cls._move_seconds is None
+                                else cls._move_seconds * 1000.0)}
+
+    @classmethod
+    def _on_abort(cls) -> None:
+        with cls._cond:
+            cls._cond.notify_all()
+
+    @classmethod
+    def _prefetch_loop(cls) -> None:
+        GenerationScheduler.set_priority(GenerationPriority.PREFETCH)
+        try:
+            while not Monitor.is_abort_requested():
+                request: PrefetchRequest | None = cls._wait_for_settled()
+                if request is None:
+                    continue
+                try:
+                    cls._prefetch(request)
+                except AbortException:
+                    reraise(*sys.exc_info())
+                except Exception:
+                    MY_LOGGER.exception('')
+        except AbortException:
+            return  # Let thread die
+
+    @classmethod
+    def _wait_for_settled(cls) -> PrefetchRequest | None:
+        """
+        Waits for a request, then for focus to stay on its item for
+        LIST_PREFETCH_SETTLE_SECONDS.
+
+        :return: The settled request, or None on abort
+        """
+        with cls._cond:
+            while not Monitor.is_abort_requested():
+                request: PrefetchRequest | None = cls._request
+                if request is None:
+                    cls._cond.wait(timeout=1.0)
+                    continue
+                remaining: float = (request.time
+                                    + Constants.LIST_PREFETCH_SETTLE_SECONDS
+                                    - time.monotonic())
+                if remaining <= 0.0:
+                    cls._request = None
+                    return request
+                cls._cond.wait(timeout=remaining)
+        return None
+
+    @classmethod
+    def _is_current(cls, request: PrefetchRequest) -> bool:
+        """
+        :return: False if focus has moved since request was made
+        """
+        with cls._cond:
+            return cls._request is None or cls._request.time == request.time
+
+    @classmethod
+    def _prefetch(cls, request: PrefetchRequest) -> None:
+        from backends.settings.service_types import ServiceID
+        from common.base_services import BaseServices
+        from common.settings import Settings
+
+        if KodiPlayerMonitor.player_status == KodiPlayerState.PLAYING_VIDEO:
+            with cls._cond:
+                cls.skipped_video += 1
+            return
+        if not Settings.is_use_cache():
+            return
+        engine_key: ServiceID | None = Settings.get_engine_key()
+        if engine_key is None:
+            return
+        active_engine = BaseServices.get_service(engine_key)
+        if not active_engine.has_speech_generator():
+            return
+
+        phrases: PhraseList = cls._get_phrases(request)
+        if phrases.is_empty():
+            return
+        active_engine.seed_text_cache(phrases)
+        voiced: int = 0
+        # get_cached_voice_file returns long before generation is done. Have
+        # the generation dropped if focus moves before it gets a slot.
+        GenerationScheduler.set_stale_check(lambda: not cls._is_current(request))
+        try:
+            for phrase in phrases:
+                phrase: Phrase
+                GenerationScheduler.pause_point(GenerationPriority.PREFETCH)
+                if (not cls._wait_for_prefetch_done(request) or
+                        KodiPlayerMonitor.player_status
+                        == KodiPlayerState.PLAYING_VIDEO):
+                    with cls._cond:
+                        cls.abandoned += 1
+                    break
+                result = active_engine.get_voice_cache().get_path_to_voice_file(
+                        phrase, use_cache=True)
+                if result.audio_exists:
+                    with cls._cond:
+                        cls.already_voiced += 1
+                    continue
+                active_engine.get_cached_voice_file(phrase)
+                voiced += 1
+        finally:
+            GenerationScheduler.set_stale_check(None)
+        with cls._cond:
+            cls.prefetched += voiced
+        if MY_LOGGER.isEnabledFor(DEBUG):
+            MY_LOGGER.debug(f'container: {request.container_id} '
+                            f'item: {request.item_number} '
+                            f'depth: {request.depth} phrases: {len(phrases)} '
+                            f'voiced: {voiced}')
+
+    @classmethod
+    def _wait_for_prefetch_done(cls, request: PrefetchRequest) -> bool:
+        """
+        Waits until no PREFETCH generation is waiting or running, so that
+        generation begun for earlier items (which may still be voicing)
+        does not pile up.
+
+        :return: False if focus moved while waiting
+        :raises AbortException:
+        """
+        while GenerationScheduler.has_work(GenerationPriority.PREFETCH):
+            if not cls._is_current(request):
+                return False
+            Monitor.exception_on_abort(timeout=0.1)
+        return cls._is_current(request)
+
+    @classmethod
+    def _get_phrases(cls, request: PrefetchRequest) -> PhraseList:
+        """
+        Reads the labels of the items near the focused one, nearest first
+        and those in the direction of scrolling before the others.
+        """
+        offsets: List[int] = []
+        for distance in range(1, request.depth + 1):
+            offsets.append(distance * request.direction)
+            offsets.append(-distance * request.direction)
+        phrases: PhraseList = PhraseList(check_expired=False)
+        texts: Set[str] = set()
+        for offset in offsets:
+            if not 1 <= request.item_number + offset <= request.num_items:
+                continue
+            if not cls._is_current(request):
+                break
+            for info_label in request.info_labels:
+                query: str | None = cls._get_item_query(request.container_id,
+                                                        info_label, offset)
+                if query is None:
+                    continue
+                text: str = InfoSnapshot.get_info_label(query).strip()
+                if text == '' or text in texts:
+                    continue
+                texts.add(text)
+                phrases.append(Phrase(text=text, check_expired=False))
+        return phrases
+
+    @classmethod
+    def _get_item_query(cls, container_id: int, info_label: str,
+                        offset: int) -> str | None:
+        """
+        Rewrites each reference to the focused item in info_label (a bare info
+        label or a full label, such as '$INFO[ListItem.Label,Title: ,]
+        $INFO[ListItem.Year]') to refer to the item offset from it. Anything
+        else in the label (prefixes, suffixes, $LOCALIZE) is kept.
+
+        :return: The rewritten label, or None if info_label does not depend on
+                 the item, or can not be rewritten: it refers to items some
+                 other way, or uses a $VAR (whose value may depend on the
+                 focused item)
+        """
+        references: int = len(cls.ITEM_REFERENCE_RE.findall(info_label))
+        if references == 0 or '$VAR[' in info_label:
+            return None
+        query: str
+        rewritten: int
+        query, rewritten = cls.LIST_ITEM_RE.subn(
+                f'Container({container_id}).ListItemNoWrap({offset}).',
+                info_label)
+        if rewritten != references:
+            return None
+        return query
@@ -9,6 +9,7 @@ from common.logger import BasicLogger
 from common.phrases import PhraseList
 from gui.base_model import BaseModel
 from gui.gui_globals import GuiGlobals
+from gui.list_prefetcher import ListPrefetcher
 from gui.parser.parse_topic import ParseTopic
 from gui.statements import Statement, Statements, StatementType
 from gui.topic_model import TopicModel
@@ -157,6 +158,10 @@ class ListTopicModel(TopicModel):
             for item_value in result:
                 phrases.add_text(item_value)
             stmts.append(Statement(phrases, stmt_type=StatementType.VALUE))
+            # Voice the nearby items in the background, in case the user
+            # moves to one of them next
+            ListPrefetcher.note_item(self.parent.control_id,
+                                     self.parent.get_focused_info_labels())
         MY_LOGGER.debug(f'phrases: {phrases}\n {stmts}')
 
         # Cause WindowStateMonitor to process events whether
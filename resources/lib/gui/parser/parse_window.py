@@ -31,6 +31,7 @@ from gui.parser.parse_slider import ParseSlider
 from gui.parser.parse_spin import ParseSpin
 from gui.parser.parse_spinex import ParseSpinex
 from gui.parser.parse_topic import ParseTopic
+from windows.skin_model_store import SkinModelStore
 from windows.windowparser import WindowParser
 from gui.base_tags import ElementKeywords as EK
 
@@ -141,11 +142,21 @@ class ParseWindow(BaseParser):
     @classmethod
     def get_instance(cls, xml_path: Path,
                      is_addon: bool) -> ForwardRef('ParseWindow'):
-        if xml_path not in cls.instances:
-            parser: ForwardRef('ParseWindow') = ParseWindow()
-            parser.parse_window(xml_path=xml_path, is_addon=True)
-            cls.instances[xml_path] = parser
-        return cls.instances[xml_path]
+        with WindowParser.parse_lock:
+            if xml_path not in cls.instances:
+                SkinModelStore.note_visit(SkinModelStore.MODEL, xml_path,
+                                          is_addon)
+                store_key: str | None = SkinModelStore.get_key(xml_path, is_addon)
+                parser: ForwardRef('ParseWindow') | None
+                parser = SkinModelStore.load(SkinModelStore.MODEL, xml_path,
+                                             is_addon, store_key)
+                if parser is None:
+                    parser = ParseWindow()
+                    parser.parse_window(xml_path=xml_path, is_addon=True)
+                    SkinModelStore.save(SkinModelStore.MODEL, xml_path, is_addon,
+                                        store_key, parser)
+                cls.instances[xml_path] = parser
+            return cls.instances[xml_path]
 
     def __init__(self):
         super().__init__(parent=None, window_parser=self)
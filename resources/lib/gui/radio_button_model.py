@@ -3,8 +3,6 @@ from __future__ import annotations
 
 from typing import Callable, List, Tuple
 
-import xbmc
-
 from common.logger import BasicLogger, DEBUG_V, DISABLED
 from common.messages import Messages
 from common.phrases import Phrase, PhraseList
@@ -14,6 +12,7 @@ from gui.base_parser import BaseParser
 from gui.base_tags import control_elements, ControlElement, Item
 from gui.element_parser import (ElementHandler)
 from gui.gui_globals import GuiGlobals
+from gui.info_snapshot import InfoSnapshot
 from gui.no_topic_models import NoRadioButtonTopicModel
 from gui.parser.parse_radio_button import ParseRadioButton
 from gui.radio_button_topic_model import RadioButtonTopicModel
@@ -205,7 +204,7 @@ class RadioButtonModel(BaseLabelModel):
             if self.control_id != -1:
                 try:
                     query: str = f'Control.GetLabel({self.control_id}).index(0)'
-                    text: str = xbmc.getInfoLabel(query)
+                    text: str = InfoSnapshot.get_info_label(query)
                     # None is returned when no substitutions have been done on text
                     new_text: str = Messages.format_boolean(text=text)
                     if new_text is None:
@@ -244,8 +243,8 @@ class RadioButtonModel(BaseLabelModel):
                 # RadioButtons ALL support boolean value (whether button
                 # pressed or not). Translate to desired phrasing: On/Off, Yes/NO,
                 # enabled/disabled, etc.
-                text: str = xbmc.getInfoLabel(f'Control.GetLabel('
-                                              f'{self.control_id}.index(1))')
+                text: str = InfoSnapshot.get_info_label(f'Control.GetLabel('
+                                                        f'{self.control_id}.index(1))')
                 bool_text: str = ''
                 is_true: bool
                 new_text: str
@@ -40,6 +40,7 @@ from gui.base_tags import (BaseAttributeType as BAT, control_elements, ControlEl
 from gui.base_topic_model import BaseTopicModel
 from gui.element_parser import ElementHandler
 from gui.gui_globals import GuiGlobals
+from gui.info_snapshot import InfoSnapshot
 from gui.interfaces import IWindowStructure
 from gui.parser.parse_topic import ParseTopic
 from gui.statements import Statement, Statements, StatementType
@@ -1087,10 +1088,10 @@ class TopicModel(BaseTopicModel):
         info: str = ''
         if self.labeled_by_expr.startswith('$INFO['):
             info: str = self.labeled_by_expr[6:-1]
-            label: str = xbmc.getInfoLabel(info)
+            label: str = InfoSnapshot.get_info_label(info)
         elif self.labeled_by_expr.startswith('$PROP['):
             info: str = self.labeled_by_expr[6:-1]
-            label: str = xbmc.getInfoLabel(f'Window().Property({info})')
+            label: str = InfoSnapshot.get_info_label(f'Window().Property({info})')
         if label is not None and label != '':
             stmts.last.phrases.add_text(texts=label)
             return True
@@ -1293,7 +1294,8 @@ class TopicModel(BaseTopicModel):
         container_id: int = self.control_id
         curr_item: str = ''
         try:
-            curr_item = xbmc.getInfoLabel(f'Container({container_id}).CurrentItem')
+            curr_item = InfoSnapshot.get_info_label(
+                    f'Container({container_id}).CurrentItem')
         except Exception:
             MY_LOGGER.exception('')
 
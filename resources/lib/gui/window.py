@@ -31,6 +31,7 @@ import xbmcgui
 
 from common.logger import BasicLogger, DEBUG_V
 from gui.base_tags import WindowType
+from gui.info_snapshot import InfoSnapshot
 from windows import guitables
 from windows.guitables import window_map
 from windows.window_state_monitor import WinDialog, WinDialogState, WindowStateMonitor
@@ -87,12 +88,13 @@ class Window:
 
     @staticmethod
     def has_focus(win_dialog_id: int | str) -> bool:
-        focused: bool = xbmc.getCondVisibility(f'[Window.Is({win_dialog_id})]')
+        focused: bool = InfoSnapshot.get_cond_visibility(f'[Window.Is({win_dialog_id})]')
         return focused
 
     @staticmethod
     def is_active(win_dialog_id: int | str) -> bool:
-        active: bool = xbmc.getCondVisibility(f'[Window.IsActive({win_dialog_id})]')
+        active: bool = InfoSnapshot.get_cond_visibility(
+                f'[Window.IsActive({win_dialog_id})]')
         return active
 
     @staticmethod
@@ -144,7 +146,7 @@ class Window:
             if Window._logger.isEnabledFor(DEBUG_V):
                 Window._logger.debug(f'winID: {win_dialog_id} name_id: {name_id} window '
                                      f"name: {name} currentWindow: "
-                                     f"{xbmc.getInfoLabel('System.CurrentWindow')}")
+                                     f"{InfoSnapshot.get_info_label('System.CurrentWindow')}")
             if window_name is None or len(window_name) == 0:
                 window_name = name
         elif win_dialog_id > 12999:
@@ -165,7 +167,7 @@ class Window:
 
         Window([window]).Property(key)
         """
-        return xbmc.getInfoLabel(query)
+        return InfoSnapshot.get_info_label(query)
 
     @staticmethod
     def is_true(query: str) -> bool:
@@ -181,7 +183,7 @@ class Window:
         visible = xbmc.getCondVisibility('[Control.IsVisible(41) + !Control.IsVisible(
         12)]')
         """
-        return xbmc.getCondVisibility(query)
+        return InfoSnapshot.get_cond_visibility(query)
 
     def window_state(self, changed: int) -> None:
         if changed & WindowStateMonitor.WINDOW_CHANGED:
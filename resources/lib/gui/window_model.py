@@ -4,14 +4,13 @@ from __future__ import annotations
 import pathlib
 from typing import Callable, Dict, ForwardRef, List
 
-import xbmc
-
 from common.logger import BasicLogger, DEBUG_V, DEBUG_XV
 from gui.base_model import BaseModel
 from gui.base_parser import BaseParser
 from gui.base_tags import control_elements, ControlElement, Item, WindowType
 from gui.base_topic_model import BaseTopicModel
 from gui.element_parser import (ElementHandler)
+from gui.info_snapshot import InfoSnapshot
 from gui.interfaces import IWindowStructure
 from gui.no_topic_models import NoWindowTopicModel
 from gui.parser.parse_window import ParseWindow
@@ -234,7 +233,7 @@ class WindowModel(BaseModel):
         return '\n'.join(results)
 
     def is_visible(self) -> bool:
-        return xbmc.getCondVisibility(f'Window.IsVisible({self.control_id})')
+        return InfoSnapshot.get_cond_visibility(f'Window.IsVisible({self.control_id})')
 
 
 ElementHandler.add_model_handler(WindowModel.item, WindowModel)
@@ -5,12 +5,11 @@ import xml.etree.ElementTree as ET
 from logging import DEBUG
 from typing import Dict, ForwardRef, List, Tuple, Union
 
-import xbmc
-
 from common import AbortException, reraise
 from common.logger import BasicLogger, DEBUG_V, DEBUG_XV, DISABLED
 from gui import ControlElement, ParseError
 from gui.i_model import IModel
+from gui.info_snapshot import InfoSnapshot
 
 from gui.no_topic_models import BaseFakeTopic
 from gui.topic_model import TopicModel
@@ -563,7 +562,7 @@ class WindowStructure:
 
     def get_current_control_model(self) -> IModel | None:
         try:
-            control_id_str: str = xbmc.getInfoLabel('System.CurrentControlId')
+            control_id_str: str = InfoSnapshot.get_info_label('System.CurrentControlId')
             return self.get_control_model(control_id_str)
         except AbortException:
             self._destroy()
@@ -30,10 +30,12 @@ try:
     from enum import StrEnum
 except ImportError:
     from common.strenum import StrEnum
-from utils.util import runInThread
+from common.worker_pool import WorkerPools
+from utils.util import run_in_pool, runInThread
 from windowNavigation.help_manager import HelpManager
 from windows.notice import NoticeDialog
 from windows.ui_constants import UIConstants
+from windows.skin_model_store import SkinModelStore
 from windows.window_state_monitor import WinDialogState, WindowStateMonitor
 
 # TODO Remove after eliminating util.getCommand
@@ -845,6 +847,9 @@ class TTSService:
             runInThread(call, args=[service_key],
                         name='seed_cache',
                         delay=Constants.SEED_CACHE_MOVIE_INFO_START_DELAY_SECONDS)
+        run_in_pool(WorkerPools.CPU, SkinModelStore.precompile,
+                    name='sknPrcmpl',
+                    delay=Constants.SKIN_PRECOMPILE_DELAY_SECONDS)
 
         WindowStateMonitor.register_window_state_listener(cls.handle_ui_changes,
                                                           "main",
@@ -248,6 +248,7 @@ class BootstrapEngines:
             engine: BaseEngineService | None = None
             if MY_LOGGER.isEnabledFor(DEBUG):
                 MY_LOGGER.debug(f'Loading service_id: {engine_id}')
+            SettingsLowLevel.load_service_settings(engine_service)
             if engine_id == Backends.ESPEAK_ID:
                 from backends.espeak import ESpeakTTSBackend
                 engine = ESpeakTTSBackend()
@@ -0,0 +1,147 @@
+# coding=utf-8
+"""
+Compares Phrase.clean_phrase_text, which remembers the text it has cleaned of
+markup, with the cleaning formerly done in full on every call.
+
+The corpus is the labels of the current skin (run with Estuary selected) and
+the addon's messages (strings.po). Labels given as message numbers or
+$LOCALIZE[n] are looked up. The corpus is cleaned in a shuffled order, over
+several rounds, as labels are voiced again and again while moving about
+Kodi. Also checks that both ways produce identical text, so that voice
+cache keys are unchanged.
+"""
+import random
+import re
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import xbmc
+
+from common import *
+
+from common.critical_settings import CriticalSettings
+from common.messages import Messages
+from common.phrases import Phrase
+from windows.windowparser import get_xbmc_skin_path
+
+try:
+    import regex
+except ImportError:
+    import re as regex
+
+
+class FormerCleaning:
+    """
+    Phrase.clean_phrase_text as it was before its results were remembered
+    """
+
+    @staticmethod
+    def clean_phrase_text(text: str) -> str:
+        cls = Phrase
+        text = text.strip()
+        text = cls._remove_multiple_whitespace_re.sub('', text)
+        text = cls._formatTagRE.sub('', text)
+        text = cls._colorTagRE.sub('', text)
+        text = cls._okTagRE.sub(r'\1O K\2', text)
+        text = regex.sub(cls._hyphen_prefix, r'\g<2>', text)
+        text = text.replace('XBMC', r'Kodi')
+        if text == '..':
+            text = Messages.get_msg(Messages.PARENT_DIRECTORY)
+        if text.endswith(')'):
+            text = Messages.format_boolean(text,
+                                           enabled_msgid=Messages.ENABLED.get_msg_id(),
+                                           disabled_msgid=Messages.DISABLED.get_msg_id())
+        return text
+
+
+class CleanTextBenchmark:
+    LABEL_TAGS: Tuple[str, ...] = ('label', 'label2', 'altlabel', 'hinttext')
+    LOCALIZE_RE: Final[re.Pattern] = re.compile(r'\$LOCALIZE\[(\d+)]')
+
+    def __init__(self, rounds: int = 20, skin_dir: Path | None = None,
+                 strings_path: Path | None = None) -> None:
+        """
+        :param rounds: Times the corpus is cleaned
+        :param skin_dir: Directory of the skin's window xml files. Defaults
+                         to that of the current skin
+        :param strings_path: Messages file. Defaults to the addon's English
+                             strings.po
+        """
+        self.rounds: int = rounds
+        if skin_dir is None:
+            skin_dir = get_xbmc_skin_path('Includes.xml').parent
+        self.skin_dir: Path = skin_dir
+        if strings_path is None:
+            strings_path = CriticalSettings.RESOURCES_PATH.joinpath(
+                    'language', 'resource.language.en_gb', 'strings.po')
+        self.strings_path: Path = strings_path
+
+    def skin_labels(self) -> List[str]:
+        labels: List[str] = []
+        for xml_path in sorted(self.skin_dir.glob('*.xml')):
+            root: ET.Element = ET.parse(xml_path).getroot()
+            for element in root.iter():
+                if element.tag in self.LABEL_TAGS and element.text:
+                    labels.append(element.text)
+                label: str | None = element.attrib.get('label')
+                if label:
+                    labels.append(label)
+        result: List[str] = []
+        for label in labels:
+            label = label.strip()
+            if label.isdigit():
+                label = xbmc.getLocalizedString(int(label))
+            else:
+                label = self.LOCALIZE_RE.sub(
+                        lambda match: xbmc.getLocalizedString(int(match.group(1))),
+                        label)
+            if label and '$' not in label:
+                result.append(label)
+        return result
+
+    def messages(self) -> List[str]:
+        result: List[str] = []
+        with self.strings_path.open('r', encoding='utf-8') as strings_file:
+            for line in strings_file:
+                if line.startswith('msgid "') and len(line.strip()) > 8:
+                    result.append(line.strip()[7:-1])
+        return result
+
+    def run(self) -> None:
+        skin_labels: List[str] = self.skin_labels()
+        messages: List[str] = self.messages()
+        corpus: List[str] = skin_labels + messages
+        different: int = sum(1 for text in corpus
+                             if FormerCleaning.clean_phrase_text(text) !=
+                             Phrase.clean_phrase_text(text))
+        texts: List[str] = []
+        shuffler: random.Random = random.Random(1)
+        for _ in range(self.rounds):
+            shuffler.shuffle(corpus)
+            texts.extend(corpus)
+
+        start: float = time.perf_counter()
+        for text in texts:
+            FormerCleaning.clean_phrase_text(text)
+        former_us: float = (time.perf_counter() - start) * 1000000.0 / len(texts)
+
+        Phrase._cleaned.clear()
+        before: Dict[str, int] = Phrase.get_clean_stats()
+        start = time.perf_counter()
+        for text in texts:
+            Phrase.clean_phrase_text(text)
+        memo_us: float = (time.perf_counter() - start) * 1000000.0 / len(texts)
+        after: Dict[str, int] = Phrase.get_clean_stats()
+
+        print(f'skin labels: {len(skin_labels)} messages: {len(messages)} '
+              f'distinct: {len(set(corpus))} rounds: {self.rounds} '
+              f'different results: {different}')
+        print(f'former: us per text: {former_us:.2f}')
+        print(f'memo: us per text: {memo_us:.2f} '
+              f'hits: {after["hits"] - before["hits"]} '
+              f'misses: {after["misses"] - before["misses"]}')
+
+
+if __name__ == '__main__':
+    CleanTextBenchmark().run()
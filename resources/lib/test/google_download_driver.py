@@ -0,0 +1,79 @@
+# coding=utf-8
+"""
+Exercises DownloadPool/MyGTTS against a local stub of Google's TTS service
+rather than Google itself.
+
+The stub answers each request with the base64 of the text it was asked to
+voice, after a delay, so that the result shows whether chunks were
+reassembled in order and the elapsed time shows whether they were
+downloaded concurrently.
+"""
+import base64
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import *
+
+from backends.engines.google_downloader import DownloadPool, MyGTTS
+from common.phrases import Phrase
+
+
+class StubTTSHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    delay: float = 0.5
+    connections: Set[int] = set()
+
+    def do_POST(self) -> None:
+        type(self).connections.add(self.client_address[1])
+        length: int = int(self.headers.get('Content-Length', 0))
+        form = urllib.parse.parse_qs(self.rfile.read(length).decode('utf-8'))
+        rpc = json.loads(form['f.req'][0])
+        text: str = json.loads(rpc[0][0][1])[0]
+        time.sleep(type(self).delay)
+        audio: str = base64.b64encode(text.encode('utf-8')).decode('ascii')
+        body: bytes = ('jQ1olc","[\\"' + audio + '\\"]\n').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class GoogleDownloadDriver:
+
+    @classmethod
+    def run_test(cls, chunks: int = 8) -> None:
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubTTSHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        DownloadPool.translate_url = f'http://127.0.0.1:{server.server_port}/'
+        try:
+            texts: List[str] = [f'chunk number {idx}' for idx in range(chunks)]
+
+            def download(text: str) -> bytes:
+                my_gtts: MyGTTS = MyGTTS()
+                my_gtts.config(Phrase(text=text, check_expired=False))
+                return my_gtts.download()
+
+            start: float = time.time()
+            futures = [DownloadPool.submit(download, text) for text in texts]
+            voiced: bytes = b''.join(future.result() for future in futures)
+            elapsed: float = time.time() - start
+            expected: bytes = ''.join(texts).encode('utf-8')
+            print(f'in order: {voiced == expected} chunks: {chunks} '
+                  f'elapsed: {elapsed:.2f}s sequential would be: '
+                  f'{chunks * StubTTSHandler.delay:.2f}s '
+                  f'connections: {len(StubTTSHandler.connections)}')
+        finally:
+            DownloadPool.translate_url = None
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    GoogleDownloadDriver.run_test()
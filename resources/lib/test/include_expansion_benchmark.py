@@ -0,0 +1,245 @@
+# coding=utf-8
+"""
+Compares the former include expansion of WindowParser (expand_includes and
+expand_other, which copied every element of the window and deep copied, by
+Includes.get_include, every include referenced, but added nothing of the
+include to the window) with Includes.expand, which adds the contents of
+each include and shares every subtree that does not differ between uses.
+
+Expands every window of the current skin (run with Estuary selected) each
+way and reports the Elements created and the time taken (for
+Includes.expand, also the time to expand every window again, as expanded
+includes are kept). Includes.expand is checked against expansion by deep
+copy, which makes the same windows without sharing. Also reports how the windows differ from the former ones:
+elements and labels added by includes, and any include references or
+$PARAMs left unexpanded.
+"""
+import copy
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from common import *
+
+from windows.windowparser import (ExpandedInclude, IGNORED_TAGS, Includes,
+                                  get_xbmc_skin_path)
+
+
+class FormerExpansion:
+    """
+    WindowParser.expand_includes and expand_other as they were, without
+    their logging. Counts the Elements created.
+    """
+
+    def __init__(self, includes: Includes) -> None:
+        self.includes: Includes = includes
+        self.elements: int = 0
+
+    def process_includes(self, et_root: ET.Element) -> ET.Element:
+        dummy_root: ET.Element = ET.Element(f'dummy_root')
+        dummy_root.append(et_root)
+        result_dummy_root: ET.Element = self.expand_includes(dummy_root)
+        return result_dummy_root.find('./*')
+
+    def expand_includes(self, parent: ET.Element) -> ET.Element:
+        result_dummy_root: ET.Element = ET.Element('dummy_root')
+        result: ET.Element = result_dummy_root
+        for child in parent.findall('./*'):
+            if child.tag in IGNORED_TAGS:
+                continue
+            if child.tag == 'include':
+                if child.attrib.get('file') is not None:
+                    continue
+                if child.attrib.get('name') is not None:
+                    continue
+                if child.attrib.get('content') is not None or child.text is not None:
+                    include_name: str = child.attrib.get('content')
+                    if include_name is None:
+                        include_name = child.text
+                    include_root: ET.Element = self.includes.get_include(include_name)
+                    if include_root is not None:
+                        self.elements += sum(1 for _ in include_root.iter())
+                        expanded_dummy: ET.Element
+                        expanded_dummy = self.expand_includes(include_root)
+                        result.extend(expanded_dummy.findall(''))
+                continue
+            dummy_root: ET.Element | None = self.expand_other(child)
+            result_dummy_root.extend(dummy_root.findall('./*'))
+        return result_dummy_root
+
+    def expand_other(self, child: ET.Element) -> ET.Element | None:
+        dummy_root: ET.Element = ET.Element('dummy_root')
+        new_child: ET.Element = ET.SubElement(dummy_root, child.tag, child.attrib)
+        new_child.text = child.text
+        self.elements += 1
+        result_dummy_root: ET.Element = self.expand_includes(child)
+        new_child.extend(result_dummy_root.findall('./*'))
+        return dummy_root
+
+
+class DeepCopyExpansion:
+    """
+    Expands includes as Includes.expand does, but copies every element
+    """
+
+    def __init__(self, includes: Includes) -> None:
+        self.includes: Includes = includes
+        self.elements: int = 0
+
+    def expand(self, window: ET.Element) -> ET.Element:
+        result: ET.Element = ET.Element(window.tag, window.attrib)
+        result.text = window.text
+        self.elements += 1
+        self.expand_children(window, result, None)
+        return result
+
+    def expand_children(self, parent: ET.Element, dest: ET.Element,
+                        params: Dict[str, str] | None,
+                        expanding: Tuple[str, ...] = ()) -> None:
+        for child in parent:
+            if child.tag in IGNORED_TAGS:
+                continue
+            if child.tag == 'include':
+                self.expand_include(child, dest, params, expanding)
+                continue
+            attrib: Dict[str, str] = child.attrib
+            text: str | None = child.text
+            if params is not None:
+                attrib = {name: Includes.substitute(value, params)
+                          for name, value in attrib.items()}
+                text = Includes.substitute(text, params)
+            new_child: ET.Element = ET.SubElement(dest, child.tag, attrib)
+            new_child.text = text
+            self.elements += 1
+            self.expand_children(child, new_child, params, expanding)
+
+    def expand_include(self, reference: ET.Element, dest: ET.Element,
+                       params: Dict[str, str] | None,
+                       expanding: Tuple[str, ...]) -> None:
+        if (reference.attrib.get('file') is not None
+                or reference.attrib.get('name') is not None):
+            return
+        name: str | None = reference.attrib.get('content')
+        if name is None and reference.text is not None:
+            name = reference.text.strip()
+        if name in expanding:
+            return
+        definition: ET.Element | None = self.includes.get_include(name)
+        if definition is None:
+            return
+        self.elements += sum(1 for _ in definition.iter())
+        include_params: Dict[str, str] = {}
+        contents: ET.Element = definition
+        for child in definition:
+            if child.tag == 'param':
+                include_params[child.attrib.get('name')] = child.attrib.get(
+                        'default', child.text) or ''
+            elif child.tag == 'definition':
+                contents = child
+        for param in reference.findall('param'):
+            value: str = param.attrib.get('value', param.text) or ''
+            if params is not None:
+                value = Includes.substitute(value, params)
+            include_params[param.attrib.get('name')] = value
+        expanded: ET.Element = ET.Element('dummy_root')
+        self.expand_children(contents, expanded, include_params,
+                             expanding + (name,))
+        dest.extend(element for element in expanded if element.tag != 'param')
+
+
+class IncludeExpansionBenchmark:
+    LABEL_TAGS: Tuple[str, ...] = ('label', 'label2', 'altlabel', 'hinttext')
+
+    @staticmethod
+    def canonical(root: ET.Element) -> str:
+        # The former expansion dropped the text following each element (tail),
+        # shared elements keep it. WindowParser never reads tails
+        root = copy.deepcopy(root)
+        for element in root.iter():
+            element.tail = None
+        return ET.canonicalize(xml_data=ET.tostring(root, encoding='unicode'),
+                               strip_text=True)
+
+    def run(self) -> None:
+        xml_dir: Path = get_xbmc_skin_path('Includes.xml').parent
+        windows: List[ET.Element] = []
+        for xml_path in sorted(xml_dir.glob('*.xml')):
+            root: ET.Element = ET.parse(xml_path).getroot()
+            if root.tag == 'window':
+                windows.append(root)
+        includes: Includes = Includes()
+        includes.load_includes_files()
+        originals: Set[int] = {id(element) for window in windows
+                               for element in window.iter()}
+
+        former: FormerExpansion = FormerExpansion(includes)
+        start: float = time.perf_counter()
+        former_windows: List[ET.Element] = [former.process_includes(window)
+                                            for window in windows]
+        former_seconds: float = time.perf_counter() - start
+
+        start = time.perf_counter()
+        shared_windows: List[ET.Element] = [includes.expand(window)
+                                            for window in windows]
+        shared_seconds: float = time.perf_counter() - start
+        # Expanded includes are kept until the skin changes, so later windows
+        # (and later visits) only pay for their own elements
+        start = time.perf_counter()
+        for window in windows:
+            includes.expand(window)
+        again_seconds: float = time.perf_counter() - start
+        created: Set[int] = set()
+        for window in shared_windows:
+            created.update(id(element) for element in window.iter())
+        expanded: ExpandedInclude
+        for expanded in Includes._expanded_includes.values():
+            for element in expanded.elements:
+                created.update(id(child) for child in element.iter())
+        for definition in Includes._new_includes_map.values():
+            originals.update(id(element) for element in definition.iter())
+        created.difference_update(originals)
+
+        deep_copy: DeepCopyExpansion = DeepCopyExpansion(includes)
+        start = time.perf_counter()
+        copied_windows: List[ET.Element] = [deep_copy.expand(window)
+                                            for window in windows]
+        copy_seconds: float = time.perf_counter() - start
+
+        same: int = sum(1 for copied, shared in zip(copied_windows, shared_windows)
+                        if self.canonical(copied) == self.canonical(shared))
+        changed: int = sum(1 for old, shared in zip(former_windows, shared_windows)
+                           if self.canonical(old) != self.canonical(shared))
+        former_nodes: int = sum(1 for window in former_windows
+                                for _ in window.iter())
+        nodes: int = sum(1 for window in shared_windows for _ in window.iter())
+        former_labels: int = sum(self.count_labels(window)
+                                 for window in former_windows)
+        labels: int = sum(self.count_labels(window) for window in shared_windows)
+        unexpanded: int = sum(1 for window in shared_windows
+                              for element in window.iter()
+                              if element.tag == 'include')
+        params: int = sum(1 for window in shared_windows
+                          for element in window.iter()
+                          if '$PARAM[' in (element.text or '') or
+                          any('$PARAM[' in value
+                              for value in element.attrib.values()))
+        print(f'windows: {len(windows)} same as deep copy: {same} '
+              f'changed from former: {changed}')
+        print(f'elements: former: {former_nodes} now: {nodes} '
+              f'labels: former: {former_labels} now: {labels} '
+              f'includes left: {unexpanded} $PARAMs left: {params}')
+        print(f'former: elements created: {former.elements} '
+              f'ms: {former_seconds * 1000.0:.1f}')
+        print(f'deep copy: elements created: {deep_copy.elements} '
+              f'ms: {copy_seconds * 1000.0:.1f}')
+        print(f'shared: elements created: {len(created)} '
+              f'ms: {shared_seconds * 1000.0:.1f} '
+              f'again: {again_seconds * 1000.0:.1f}')
+
+    def count_labels(self, window: ET.Element) -> int:
+        return sum(1 for element in window.iter()
+                   if element.tag in self.LABEL_TAGS and element.text)
+
+
+if __name__ == '__main__':
+    IncludeExpansionBenchmark().run()
@@ -0,0 +1,66 @@
+# coding=utf-8
+"""
+Measures the memory held by a backlog of Phrases waiting to be seeded into
+the voice cache, as the background seeding queues hold them.
+
+Creates 100,000 Phrases, each with its language, voice, etc. set from
+strings made at run time (as read from settings) and with more events than
+a Phrase keeps, then reports the memory traced by tracemalloc, in total and
+per Phrase.
+"""
+import time
+import tracemalloc
+
+from common import *
+
+from common.phrases import Phrase, PhraseList
+
+
+# Events as added by SpeechGenerator and others
+EVENTS: Tuple[str, ...] = ('driver.seed_text', 'waiting on download in progress',
+                           'generate_speech', 'my_gtts', 'generation finished',
+                           'already generated')
+
+
+class PhraseMemoryBenchmark:
+
+    def __init__(self, phrases: int = 100000, events: int = 12) -> None:
+        self.phrases: int = phrases
+        self.events: int = events
+
+    def create_backlog(self) -> List[Phrase]:
+        # Not literals, so not interned by the compiler
+        language: str = '-'.join(['en', 'US'])
+        lang_dir: str = language[:2].lower()
+        territory_dir: str = language[3:].lower()
+        voice: str = ''.join(['en-US-', 'Standard-B'])
+        backlog: List[Phrase] = []
+        for index in range(self.phrases):
+            phrase: Phrase = Phrase(text=f'Movie title number {index}',
+                                    check_expired=False,
+                                    language=''.join(language),
+                                    gender=''.join(['fe', 'male']),
+                                    voice=''.join(voice))
+            phrase.set_lang_dir(''.join(lang_dir))
+            phrase.set_territory_dir(''.join(territory_dir))
+            for event in range(self.events):
+                phrase.add_event(EVENTS[event % len(EVENTS)])
+            backlog.append(phrase)
+        return backlog
+
+    def run(self) -> None:
+        PhraseList.global_serial_number += 1
+        tracemalloc.start()
+        start: float = time.perf_counter()
+        base: int = tracemalloc.get_traced_memory()[0]
+        backlog: List[Phrase] = self.create_backlog()
+        used: int = tracemalloc.get_traced_memory()[0] - base
+        seconds: float = time.perf_counter() - start
+        tracemalloc.stop()
+        print(f'phrases: {len(backlog)} events added to each: {self.events}')
+        print(f'MB: {used / 1048576.0:.1f} bytes per phrase: '
+              f'{used / len(backlog):.0f} seconds: {seconds:.2f}')
+
+
+if __name__ == '__main__':
+    PhraseMemoryBenchmark().run()
@@ -0,0 +1,72 @@
+# coding=utf-8
+"""
+Compares the cost of creating Phrases when their origin is found with
+inspect.stack() (formerly done by Phrase.set_debug_info on every Phrase),
+with PhraseProvenance and with provenance disabled.
+
+Creates 10,000 Phrases each way, from a few frames down the stack, as
+PhraseList.create and convert_str_to_phrases do.
+"""
+import inspect
+import time
+from pathlib import Path
+
+from common import *
+
+from common.phrases import Phrase, PhraseProvenance
+
+
+class InspectStackPhrase(Phrase):
+    """
+    A Phrase which also finds its origin as Phrase.set_debug_info formerly did
+    """
+
+    def __init__(self, text: str, check_expired: bool = True) -> None:
+        super().__init__(text=text, check_expired=check_expired)
+        caller_frame: inspect.FrameInfo = inspect.stack()[1]
+        filename = Path(caller_frame.filename).name
+        self.debug_info = (f'file {filename} func: {caller_frame.function} '
+                           f'line: {caller_frame.lineno}')
+
+
+class PhraseProvenanceBenchmark:
+
+    def __init__(self, phrases: int = 10000, depth: int = 20) -> None:
+        self.phrases: int = phrases
+        self.depth: int = depth
+
+    def create(self, phrase_class: Type[Phrase]) -> float:
+        """
+        :return: Microseconds per Phrase
+        """
+        texts: List[str] = [f'Item {index}' for index in range(self.phrases)]
+        start: float = time.perf_counter()
+        for text in texts:
+            phrase_class(text=text, check_expired=False)
+        return (time.perf_counter() - start) * 1000000.0 / self.phrases
+
+    def nested(self, depth: int, phrase_class: Type[Phrase]) -> float:
+        if depth == 0:
+            return self.create(phrase_class)
+        return self.nested(depth - 1, phrase_class)
+
+    def run(self) -> None:
+        saved: bool = PhraseProvenance.enabled
+        try:
+            inspect_us: float = self.nested(self.depth, InspectStackPhrase)
+            PhraseProvenance.set_enabled(True)
+            enabled_us: float = self.nested(self.depth, Phrase)
+            phrase: Phrase = Phrase(text='check')
+            PhraseProvenance.set_enabled(False)
+            disabled_us: float = self.nested(self.depth, Phrase)
+        finally:
+            PhraseProvenance.set_enabled(saved)
+        print(f'phrases: {self.phrases} stack depth: >{self.depth}')
+        print(f'inspect.stack: us per phrase: {inspect_us:.2f}')
+        print(f'provenance: us per phrase: {enabled_us:.2f}')
+        print(f'disabled: us per phrase: {disabled_us:.2f}')
+        print(f'debug info: {phrase.get_debug_info()}')
+
+
+if __name__ == '__main__':
+    PhraseProvenanceBenchmark().run()
@@ -0,0 +1,76 @@
+# coding=utf-8
+"""
+Compares the queue consumer loop formerly used by EngineQueue (poll for
+abort every 20ms, then get without waiting) with Monitor.get_or_abort, which
+sleeps until an item or abort arrives.
+
+Reports, for each, the number of times the consumer wakes per second while
+the queue is idle and the latency between putting an item and the consumer
+getting it.
+"""
+import queue
+import statistics
+import threading
+import time
+
+from common import *
+
+from common.monitor import Monitor
+
+
+class QueueWakeupBenchmark:
+
+    def __init__(self, poll: bool, poll_delay: float = 0.02) -> None:
+        self.poll: bool = poll
+        self.poll_delay: float = poll_delay
+        self.work_queue: queue.Queue = queue.Queue(100)
+        self.wakeups: int = 0
+        self.latencies: List[float] = []
+        self.stop: bool = False
+        if not poll:
+            Monitor.register_abort_queue(self.work_queue, name='bnchmrk')
+
+    def consume(self) -> None:
+        while not self.stop:
+            try:
+                if self.poll:
+                    if Monitor.wait_for_abort(timeout=self.poll_delay):
+                        return
+                    self.wakeups += 1
+                    put_time: float = self.work_queue.get(timeout=0.0)
+                else:
+                    self.wakeups += 1
+                    put_time: float = Monitor.get_or_abort(self.work_queue)
+                self.latencies.append(time.perf_counter() - put_time)
+            except queue.Empty:
+                pass
+            except AbortException:
+                return
+
+    def run(self, idle_seconds: float = 5.0, items: int = 200) -> None:
+        consumer = threading.Thread(target=self.consume, name='bnchmrk',
+                                    daemon=True)
+        consumer.start()
+        time.sleep(0.5)
+        self.wakeups = 0
+        time.sleep(idle_seconds)
+        idle_wakeups: float = self.wakeups / idle_seconds
+        for _ in range(items):
+            self.work_queue.put(time.perf_counter())
+            # Space items out so that each one finds the consumer asleep
+            time.sleep(0.037)
+        time.sleep(0.5)
+        self.stop = True
+        self.work_queue.put(time.perf_counter())
+        latencies_ms: List[float] = [latency * 1000.0 for latency in
+                                     self.latencies[:items]]
+        print(f'{"polling" if self.poll else "blocking"}: '
+              f'idle wakeups/sec: {idle_wakeups:.1f} '
+              f'latency ms mean: {statistics.mean(latencies_ms):.3f} '
+              f'median: {statistics.median(latencies_ms):.3f} '
+              f'max: {max(latencies_ms):.3f}')
+
+
+if __name__ == '__main__':
+    QueueWakeupBenchmark(poll=True).run()
+    QueueWakeupBenchmark(poll=False).run()
@@ -0,0 +1,98 @@
+# coding=utf-8
+"""
+Compares the settings read path formerly used by SettingsLowLevel._getSetting
+(check_reload, is_in_cache and get_setting, each taking the settings RLock)
+with reads from SettingsManager's snapshot, which take no lock.
+
+Reports the cost of one read, both when the reading thread is alone and
+while other threads read at the same time.
+"""
+import threading
+import time
+
+from common import *
+
+from backends.settings.service_types import ServiceID, ServiceKey
+from common.settings_low_level import SettingsLowLevel, SettingsManager
+
+
+class LockedReads:
+    """
+    The reads formerly made by SettingsLowLevel._getSetting
+    """
+
+    @staticmethod
+    def get_setting(service_key: ServiceID, default_value: Any) -> Any:
+        with SettingsManager._settings_lock:  # check_reload
+            empty: bool = not SettingsManager._settings_stack[-1].settings
+        if empty:
+            return default_value
+        with SettingsManager._settings_lock:  # is_in_cache
+            if (service_key.short_key not in
+                    SettingsManager._settings_stack[-1].settings.keys()):
+                return default_value
+        with SettingsManager._settings_lock:  # get_setting
+            value = SettingsManager._settings_stack[-1].settings.get(
+                    service_key.short_key)
+        if value is None or (isinstance(value, str) and value == ''):
+            value = default_value
+        return value
+
+
+class SettingsReadBenchmark:
+
+    def __init__(self, reads: int = 200000, readers: int = 3) -> None:
+        self.reads: int = reads
+        self.readers: int = readers
+        self.keys: List[ServiceID] = [ServiceKey.CACHE_EXPIRATION_DAYS,
+                                      ServiceKey.AUTO_ITEM_EXTRA,
+                                      ServiceKey.AUTO_ITEM_EXTRA_DELAY,
+                                      ServiceKey.BACKGROUND_PROGRESS_INTERVAL]
+
+    def time_reads(self, get_setting: Callable[[ServiceID, Any], Any]) -> float:
+        """
+        :return: Microseconds per read
+        """
+        keys: List[ServiceID] = self.keys
+        start: float = time.perf_counter()
+        for index in range(self.reads):
+            get_setting(keys[index % len(keys)], None)
+        return (time.perf_counter() - start) * 1000000.0 / self.reads
+
+    def time_contended_reads(self,
+                             get_setting: Callable[[ServiceID, Any], Any]) -> float:
+        stop: threading.Event = threading.Event()
+
+        def read() -> None:
+            while not stop.is_set():
+                for key in self.keys:
+                    get_setting(key, None)
+
+        threads: List[threading.Thread] = [threading.Thread(target=read,
+                                                            daemon=True)
+                                           for _ in range(self.readers)]
+        for thread in threads:
+            thread.start()
+        try:
+            return self.time_reads(get_setting)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def run(self) -> None:
+        settings: Dict[str, Any] = {f'setting_{index}.eng': index
+                                    for index in range(300)}
+        settings.update({key.short_key: 7 for key in self.keys})
+        SettingsManager.load_settings(settings)
+
+        for name, get_setting in (('locked', LockedReads.get_setting),
+                                  ('snapshot', SettingsLowLevel._getSetting)):
+            alone: float = self.time_reads(get_setting)
+            contended: float = self.time_contended_reads(get_setting)
+            print(f'{name}: us per read: {alone:.3f} with {self.readers} other '
+                  f'readers: {contended:.3f}')
+
+
+if __name__ == '__main__':
+    SettingsReadBenchmark().run()
@@ -19,6 +19,7 @@ from common.garbage_collector import GarbageCollector
 from common.logger import *
 from common.monitor import Monitor
 from common.settings import Settings
+from common.worker_pool import WorkerPools
 
 MY_LOGGER = BasicLogger.get_logger(__name__)
 
@@ -169,6 +170,10 @@ def runInThread(func: Callable, args: List[Any] = None, name: str = '?',
     Runs a function in a thread. The thread catches and reports exceptions,
     handles thread garbage collection as well as unhandled AbortException
     (lets thread die).
+
+    Starts a new thread on each call. Meant for functions that run for the
+    life of the addon (polling loops, queue consumers). Short-lived work
+    should use run_in_pool.
     :param func: function to run
     :param args: args for function
     :param name: thread name (the shorter the better)
@@ -188,6 +193,24 @@ def runInThread(func: Callable, args: List[Any] = None, name: str = '?',
     GarbageCollector.add_thread(thread)
 
 
+def run_in_pool(pool_name: str, func: Callable, args: List[Any] = None,
+                name: str = '?', delay: float = 0.0, **kwargs) -> None:
+    """
+    Runs a function on a worker of one of the WorkerPools, rather than on
+    a thread of its own. Exceptions and AbortException are handled as by
+    runInThread.
+
+    :param pool_name: WorkerPools.IO, CPU or SUBPROCESS
+    :param func: function to run
+    :param args: args for function
+    :param name: task name, added to the worker's name while it runs
+    :param delay: Seconds to delay before starting
+    :param kwargs: More args for function
+    """
+    WorkerPools.submit(pool_name, func, args, name=name, delay=delay,
+                       **kwargs)
+
+
 def thread_wrapper(*args, **kwargs):
     try:
         target: Callable = kwargs.pop('target')
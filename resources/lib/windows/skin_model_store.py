@@ -0,0 +1,311 @@
+# coding=utf-8
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from pathlib import Path
+
+from common import *
+from common.constants import Constants
+from common.logger import *
+from common.monitor import Monitor
+from common.worker_pool import WorkerPools
+from windows.window_parser_cache import WindowParserCache
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class SkinModelStore:
+    """
+    Persistent store of parsed windows, so that the first visit to a window
+    after Kodi starts loads a pickle rather than parsing the skin's xml,
+    expanding includes and building the control model again.
+
+    Two kinds of result are stored:
+        WINDOW: the ParsedWindow built by WindowParser
+        MODEL: the ParseWindow built for a window's WindowModel
+
+    Files are kept in <profile>/skin_models/<skin id>/. Each is keyed by the
+    skin id and version, the sha1 of the window's .xml, a digest of the other
+    .xml files of the skin (includes, etc.) and whether the window belongs
+    to an addon. The key is part of the file name, so a stale file is simply
+    never opened. It is removed when the window is next stored.
+
+    Visits to each window are counted. A background pass, started by
+    precompile, stores the most visited windows that are missing, so that
+    they are ready before the user next visits them.
+    """
+    STORE_VERSION: Final[int] = 3
+    WINDOW: Final[str] = 'window'
+    MODEL: Final[str] = 'model'
+    DIR_NAME: Final[str] = 'skin_models'
+    VISITS_NAME: Final[str] = 'visits.json'
+    VISITS_FLUSH_SECONDS: Final[float] = 60.0
+
+    _lock: threading.RLock = threading.RLock()
+    # precompiling is True in the thread running precompile
+    _local: threading.local = threading.local()
+    # (skin id, skin version, xml directory) -> digest of the directory
+    _dir_digests: Dict[Tuple[str, str, str], str] = {}
+    # '<kind>:<xml path>' -> {'kind', 'path', 'is_addon', 'count'}
+    _visits: Dict[str, Dict[str, Any]] | None = None
+    _visits_skin: str | None = None
+    _visits_dirty: bool = False
+    _visits_written: float = 0.0
+    loads: int = 0
+    misses: int = 0
+    saves: int = 0
+
+    @classmethod
+    def get_key(cls, xml_path: Path, is_addon: bool) -> str | None:
+        """
+        :param xml_path: Path of a window's .xml file
+        :param is_addon: True if the window belongs to an addon
+        :return: Digest identifying the current contents of the window and
+                 skin, or None if the window can not be read
+        """
+        try:
+            window_digest: str = hashlib.sha1(xml_path.read_bytes()).hexdigest()
+        except OSError:
+            return None
+        skin_id, skin_version = WindowParserCache.get_skin()
+        key: str = (f'{cls.STORE_VERSION}|{skin_id}|{skin_version}|'
+                    f'{window_digest}|{cls._get_dir_digest(xml_path.parent)}|'
+                    f'{is_addon}')
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def load(cls, kind: str, xml_path: Path, is_addon: bool,
+             key: str | None) -> Any | None:
+        """
+        :param kind: WINDOW or MODEL
+        :param xml_path: Path of a window's .xml file
+        :param is_addon: True if the window belongs to an addon
+        :param key: As returned by get_key
+        :return: The stored result, or None if there is none for key
+        """
+        if key is None:
+            return None
+        path: Path = cls._get_path(kind, xml_path, is_addon, key)
+        try:
+            with path.open('rb') as store_file:
+                value: Any = pickle.load(store_file)
+            with cls._lock:
+                cls.loads += 1
+            if MY_LOGGER.isEnabledFor(DEBUG_V):
+                MY_LOGGER.debug_v(f'loaded {kind} for {xml_path}')
+            return value
+        except FileNotFoundError:
+            pass
+        except AbortException:
+            reraise(*sys.exc_info())
+        except Exception:
+            MY_LOGGER.exception(f'Removing unreadable {path}')
+            path.unlink(missing_ok=True)
+        with cls._lock:
+            cls.misses += 1
+        return None
+
+    @classmethod
+    def save(cls, kind: str, xml_path: Path, is_addon: bool, key: str | None,
+             value: Any) -> None:
+        """
+        Stores a result in the background, replacing any stored for an
+        earlier version of the window. value must not be modified afterward.
+
+        :param kind: WINDOW or MODEL
+        :param xml_path: Path of a window's .xml file
+        :param is_addon: True if the window belongs to an addon
+        :param key: As returned by get_key before xml_path was parsed
+        :param value: Result to store
+        """
+        if key is None:
+            return
+        from utils.util import run_in_pool
+        run_in_pool(WorkerPools.IO, cls._save, name='sknStr', kind=kind,
+                    xml_path=xml_path, is_addon=is_addon, key=key, value=value)
+
+    @classmethod
+    def note_visit(cls, kind: str, xml_path: Path, is_addon: bool) -> None:
+        """
+        Counts a visit to a window, so that precompile knows which windows
+        are used most. Windows built by precompile are not counted.
+        """
+        if getattr(cls._local, 'precompiling', False):
+            return
+        with cls._lock:
+            visits: Dict[str, Dict[str, Any]] = cls._get_visits()
+            visit_id: str = f'{kind}:{xml_path}'
+            visit: Dict[str, Any] | None = visits.get(visit_id)
+            if visit is None:
+                visit = {'kind': kind, 'path': str(xml_path),
+                         'is_addon': is_addon, 'count': 0}
+                visits[visit_id] = visit
+            visit['count'] += 1
+            visit['is_addon'] = is_addon
+            cls._visits_dirty = True
+            if time.monotonic() - cls._visits_written < cls.VISITS_FLUSH_SECONDS:
+                return
+            cls._visits_written = time.monotonic()
+        from utils.util import run_in_pool
+        run_in_pool(WorkerPools.IO, cls._write_visits, name='sknVsts')
+
+    @classmethod
+    def precompile(cls) -> None:
+        """
+        Stores the Constants.SKIN_PRECOMPILE_WINDOWS most visited windows of
+        the current skin, unless already stored. Runs in a background thread.
+
+        Each window is built while holding WindowParser.parse_lock, as the GUI
+        worker does, since both use the class-level state of Includes.
+        """
+        from gui.parser.parse_window import ParseWindow
+        from windows.windowparser import WindowParser
+
+        with cls._lock:
+            visits: List[Dict[str, Any]] = list(cls._get_visits().values())
+        visits.sort(key=lambda visit: visit['count'], reverse=True)
+        compiled: int = 0
+        for visit in visits[:Constants.SKIN_PRECOMPILE_WINDOWS]:
+            Monitor.exception_on_abort(timeout=0.1)  # Let the GUI work
+            kind: str = visit['kind']
+            xml_path: Path = Path(visit['path'])
+            is_addon: bool = visit['is_addon']
+            key: str | None = cls.get_key(xml_path, is_addon)
+            if key is None or cls._get_path(kind, xml_path, is_addon, key).exists():
+                continue
+            cls._local.precompiling = True
+            try:
+                if kind == cls.WINDOW:
+                    WindowParser(xml_path, is_addon=is_addon)
+                elif kind == cls.MODEL:
+                    ParseWindow.get_instance(xml_path, is_addon=is_addon)
+                compiled += 1
+            except AbortException:
+                reraise(*sys.exc_info())
+            except Exception:
+                MY_LOGGER.exception(f'Can not precompile {xml_path}')
+            finally:
+                cls._local.precompiling = False
+        cls._write_visits()
+        if MY_LOGGER.isEnabledFor(DEBUG):
+            MY_LOGGER.debug(f'precompiled {compiled} windows')
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            return {'loads': cls.loads,
+                    'misses': cls.misses,
+                    'saves': cls.saves}
+
+    @classmethod
+    def _save(cls, kind: str, xml_path: Path, is_addon: bool, key: str,
+              value: Any) -> None:
+        path: Path = cls._get_path(kind, xml_path, is_addon, key)
+        tmp_path: Path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        try:
+            path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
+            with tmp_path.open('wb') as store_file:
+                pickle.dump(value, store_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            # Remove versions stored for earlier contents of the window
+            prefix: str = path.name[:path.name.rindex('_') + 1]
+            for old_path in path.parent.glob(f'{prefix}*.pickle'):
+                if old_path != path:
+                    old_path.unlink(missing_ok=True)
+            with cls._lock:
+                cls.saves += 1
+            if MY_LOGGER.isEnabledFor(DEBUG_V):
+                MY_LOGGER.debug_v(f'stored {kind} for {xml_path}')
+        except AbortException:
+            reraise(*sys.exc_info())
+        except Exception:
+            MY_LOGGER.exception(f'Can not store {path}')
+            tmp_path.unlink(missing_ok=True)
+
+    @classmethod
+    def _get_path(cls, kind: str, xml_path: Path, is_addon: bool,
+                  key: str) -> Path:
+        window_id: str = hashlib.md5(f'{xml_path}|{is_addon}'.encode('utf-8')
+                                     ).hexdigest()
+        return cls._get_skin_dir() / f'{kind}_{window_id}_{key}.pickle'
+
+    @classmethod
+    def _get_skin_dir(cls) -> Path:
+        skin_id, _ = WindowParserCache.get_skin()
+        return Path(Constants.PROFILE_PATH) / cls.DIR_NAME / (skin_id or 'unknown')
+
+    @classmethod
+    def _get_dir_digest(cls, xml_dir: Path) -> str:
+        """
+        Digest of the names, sizes and mtimes of the .xml files of a skin.
+        Computed once per skin version, since skins rarely change without
+        their version changing.
+        """
+        skin_id, skin_version = WindowParserCache.get_skin()
+        digest_key: Tuple[str, str, str] = (skin_id, skin_version, str(xml_dir))
+        with cls._lock:
+            digest: str | None = cls._dir_digests.get(digest_key)
+        if digest is not None:
+            return digest
+        entries: List[str] = []
+        try:
+            with os.scandir(xml_dir) as scan:
+                for dir_entry in scan:
+                    if dir_entry.name.endswith('.xml'):
+                        stat: os.stat_result = dir_entry.stat()
+                        entries.append(f'{dir_entry.name}|{stat.st_size}|'
+                                       f'{stat.st_mtime}')
+        except OSError:
+            pass
+        entries.sort()
+        digest = hashlib.md5('\n'.join(entries).encode('utf-8')).hexdigest()
+        with cls._lock:
+            cls._dir_digests[digest_key] = digest
+        return digest
+
+    @classmethod
+    def _get_visits(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        Reads the visits to windows of the current skin on first use. Must be
+        called with the lock held.
+        """
+        skin_id, _ = WindowParserCache.get_skin()
+        if cls._visits is not None and cls._visits_skin == skin_id:
+            return cls._visits
+        cls._visits = {}
+        cls._visits_skin = skin_id
+        cls._visits_dirty = False
+        path: Path = cls._get_skin_dir() / cls.VISITS_NAME
+        try:
+            with path.open('r', encoding='utf-8') as visits_file:
+                contents: Dict[str, Any] = json.load(visits_file)
+            if contents.get('version') == cls.STORE_VERSION:
+                cls._visits = contents.get('visits', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError):
+            MY_LOGGER.exception(f'Ignoring damaged {path}')
+        return cls._visits
+
+    @classmethod
+    def _write_visits(cls) -> None:
+        with cls._lock:
+            if not cls._visits_dirty:
+                return
+            cls._visits_dirty = False
+            path: Path = cls._get_skin_dir() / cls.VISITS_NAME
+            tmp_path: Path = path.with_suffix('.tmp')
+            try:
+                path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
+                tmp_path.write_text(json.dumps({'version': cls.STORE_VERSION,
+                                                'visits': cls._visits}),
+                                    encoding='utf-8')
+                os.replace(tmp_path, path)
+            except OSError:
+                MY_LOGGER.exception(f'Can not write {path}')
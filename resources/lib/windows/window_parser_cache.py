@@ -0,0 +1,206 @@
+# coding=utf-8
+from __future__ import annotations
+
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import NamedTuple
+
+import xbmc
+
+from common import *
+from common.constants import Constants
+from common.logger import *
+
+MY_LOGGER: BasicLogger = BasicLogger.get_logger(__name__)
+
+
+class WindowIndex:
+    """
+    Indexes of an include-expanded window, built once per tree so that
+    WindowParser lookups do not scan the tree.
+
+    Lists returned are shared and must not be modified.
+    """
+
+    def __init__(self, root: ET.Element) -> None:
+        # control id -> first control with that id, in document order
+        self.controls_by_id: Dict[str, ET.Element] = {}
+        # element -> parent, for every element below root
+        self.parents: Dict[ET.Element, ET.Element] = {}
+        # (ancestor, control type) -> descendant controls of that type, in
+        # document order
+        self.descendants_by_type: Dict[Tuple[ET.Element, str],
+                                       List[ET.Element]] = {}
+        # control -> position in document order
+        self.positions: Dict[ET.Element, int] = {}
+        for parent in root.iter():
+            for child in parent:
+                self.parents[child] = parent
+        for element in root.iter('control'):
+            self.positions[element] = len(self.positions)
+            control_id: str | None = element.attrib.get('id')
+            if control_id is not None:
+                self.controls_by_id.setdefault(control_id, element)
+            control_type: str | None = element.attrib.get('type')
+            if control_type is None:
+                continue
+            ancestor: ET.Element | None = self.parents.get(element)
+            while ancestor is not None:
+                self.descendants_by_type.setdefault((ancestor, control_type),
+                                                    []).append(element)
+                ancestor = self.parents.get(ancestor)
+
+    def get_control(self, control_id: int | str) -> ET.Element | None:
+        return self.controls_by_id.get(str(control_id))
+
+    def get_parent(self, element: ET.Element) -> ET.Element | None:
+        return self.parents.get(element)
+
+    def get_ancestors(self, element: ET.Element) -> List[ET.Element]:
+        """
+        :return: ancestors of element, nearest first
+        """
+        ancestors: List[ET.Element] = []
+        ancestor: ET.Element | None = self.parents.get(element)
+        while ancestor is not None:
+            ancestors.append(ancestor)
+            ancestor = self.parents.get(ancestor)
+        return ancestors
+
+    def get_descendants(self, ancestor: ET.Element,
+                        control_types: Iterable[str]) -> List[ET.Element]:
+        """
+        :param ancestor: Element to search below
+        :param control_types: Types of control to return
+        :return: Every control below ancestor of one of the given types, in
+                 document order
+        """
+        found: List[List[ET.Element]] = []
+        for control_type in control_types:
+            descendants: List[ET.Element] | None
+            descendants = self.descendants_by_type.get((ancestor, control_type))
+            if descendants is not None:
+                found.append(descendants)
+        if len(found) == 0:
+            return []
+        if len(found) == 1:
+            return found[0]
+        return sorted((control for controls in found for control in controls),
+                      key=self.positions.__getitem__)
+
+
+class ParsedWindow(NamedTuple):
+    """
+    Everything that WindowParser derives from a window's .xml file. Shared
+    between WindowParsers, so must never be modified.
+    """
+    # The window's .xml as parsed
+    tree: ET.ElementTree
+    # Root of the window after includes are expanded
+    root: ET.Element
+    # Indexes of root
+    index: WindowIndex
+
+
+class WindowParserCache:
+    """
+    Bounded, process-wide cache of parsed windows, so that a WindowParser
+    does not parse and expand includes for the same .xml file on every
+    focus change.
+
+    Entries are keyed by the path and mtime of the .xml file, the id and
+    version of the current skin and whether the window belongs to an addon
+    (addon windows are not include-expanded). When the skin changes, every
+    entry is dropped and skin_changed reports the change, so that the
+    skin's includes can be reloaded. The least recently used entry is
+    dropped once there are more than Constants.WINDOW_PARSER_CACHE_ENTRIES.
+    """
+    _lock: threading.RLock = threading.RLock()
+    # key -> ParsedWindow. Ordered from least to most recently used
+    _entries: Dict[Tuple[str, float, str, str, bool], ParsedWindow] = {}
+    _skin: Tuple[str, str] | None = None
+    hits: int = 0
+    misses: int = 0
+
+    @classmethod
+    def skin_changed(cls) -> bool:
+        """
+        Checks the id and version of the current skin. If they have changed
+        since the last call, every entry is dropped.
+
+        :return: True if the skin has changed since the last call
+        """
+        skin_id: str = xbmc.getSkinDir()
+        skin: Tuple[str, str] = (skin_id,
+                                 xbmc.getInfoLabel(f'System.AddonVersion({skin_id})'))
+        with cls._lock:
+            if skin == cls._skin:
+                return False
+            changed: bool = cls._skin is not None
+            if changed:
+                MY_LOGGER.info(f'Skin changed from {cls._skin} to {skin}')
+            cls._skin = skin
+            cls._entries.clear()
+            return changed
+
+    @classmethod
+    def get_skin(cls) -> Tuple[str, str]:
+        """
+        :return: id and version of the skin seen by the last call to
+                 skin_changed
+        """
+        with cls._lock:
+            if cls._skin is None:
+                cls.skin_changed()
+            return cls._skin
+
+    @classmethod
+    def get_key(cls, xml_path: Path,
+                is_addon: bool) -> Tuple[str, float, str, str, bool] | None:
+        """
+        :param xml_path: Path of a window's .xml file
+        :param is_addon: True if the window belongs to an addon
+        :return: Key of the parsed window, or None if the file can not be
+                 found
+        """
+        try:
+            mtime: float = xml_path.stat().st_mtime
+        except OSError:
+            return None
+        skin_id, skin_version = cls.get_skin()
+        return str(xml_path), mtime, skin_id, skin_version, is_addon
+
+    @classmethod
+    def get(cls, key: Tuple[str, float, str, str, bool]) -> ParsedWindow | None:
+        with cls._lock:
+            parsed: ParsedWindow | None = cls._entries.pop(key, None)
+            if parsed is None:
+                cls.misses += 1
+                return None
+            cls._entries[key] = parsed  # Now most recently used
+            cls.hits += 1
+            return parsed
+
+    @classmethod
+    def put(cls, key: Tuple[str, float, str, str, bool],
+            parsed: ParsedWindow) -> None:
+        with cls._lock:
+            cls._entries.pop(key, None)
+            cls._entries[key] = parsed
+            while len(cls._entries) > Constants.WINDOW_PARSER_CACHE_ENTRIES:
+                del cls._entries[next(iter(cls._entries))]
+        if MY_LOGGER.isEnabledFor(DEBUG_V):
+            MY_LOGGER.debug_v(f'cached: {key}')
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._entries.clear()
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            return {'entries': len(cls._entries),
+                    'hits': cls.hits,
+                    'misses': cls.misses}
@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 import copy
+import statistics
 import sys
 import threading
-from collections import namedtuple, OrderedDict
+import time
+from collections import deque, namedtuple, OrderedDict
 
 from common.constants import Constants
 from common.kodi_player_monitor import KodiPlayerMonitor, KodiPlayerState
@@ -13,7 +15,7 @@ try:
     from enum import StrEnum
 except ImportError:
     from common.strenum import StrEnum
-from typing import (Callable, Dict, Final, ForwardRef, List,
+from typing import (Callable, Deque, Dict, Final, ForwardRef, List,
                     OrderedDict as OrderedDict_type, Tuple)
 
 import xbmc
@@ -22,6 +24,7 @@ import xbmcgui
 from common import AbortException, reraise
 from common.logger import *
 from common.monitor import Monitor
+from gui.info_snapshot import InfoSnapshot
 from utils import util
 
 MY_LOGGER = BasicLogger.get_logger(__name__)
@@ -65,8 +68,8 @@ class WindowMonitor(xbmcgui.Window):
         return focus_id
 
     def isVisible(self) -> bool:
-        visible: bool = xbmc.getCondVisibility(f'Control.IsVisible('
-                                               f'{self.current_focus})')
+        visible: bool = InfoSnapshot.get_cond_visibility(f'Control.IsVisible('
+                                                         f'{self.current_focus})')
         self.current_visible = visible
         return visible
 
@@ -144,6 +147,29 @@ class WinDialogState:
                                  changed=self.changed)
         return my_copy
 
+    def coalesce(self, superseded: ForwardRef('WinDialogState')
+                 ) -> ForwardRef('WinDialogState'):
+        """
+        Combines this state with an earlier state of the same window which
+        will never be voiced, because this one replaces it.
+
+        :param superseded: Earlier state
+        :return: This state if either is a bad window, otherwise a copy of
+                 this state that also reports the changes (window changed,
+                 revoice, etc.) reported by superseded
+        """
+        if self.is_bad_window or superseded.is_bad_window:
+            return self
+        coalesced: WinDialogState
+        coalesced = WinDialogState(windialog=self.windialog,
+                                   window_id=self.window_id,
+                                   window_instance=self.window_instance,
+                                   window_focus_id=self.focus_id,
+                                   is_control_visible=self.is_control_visible,
+                                   changed=self._changed | superseded._changed)
+        coalesced._revoice = self._revoice or superseded._revoice
+        return coalesced
+
     @property
     def changed(self) -> int:
         return self._changed
@@ -308,9 +334,16 @@ class WindowStateMonitor:
     _window_state_listeners: OrderedDict_type[str, ListenerInfo]
     _window_state_listeners = OrderedDict()
     IDLE_POLLING_INTERVAL: float = 0.6
-    POLLING_INTERVAL: Final[float] = 0.2
-    NON_FOCUSED_POLLING_INTERVAL: Final[float] = 0.4
-    current_polling_interval: float = POLLING_INTERVAL
+    current_polling_interval: float = Constants.GUI_POLL_MIN_SECONDS
+    # Set to check the GUI at once, rather than at the next poll
+    _wake: threading.Event = threading.Event()
+    _wake_time: float = 0.0
+    # Upper bound of the delay before each of the last changes was detected
+    _detection_delays: Deque[float] = deque(maxlen=100)
+    wakeups: int = 0
+    polls: int = 0
+    changes_on_wakeup: int = 0
+    changes_on_poll: int = 0
     INVALID_DIALOG: Final[int] = 9999
 
     WINDOW_CHANGED: Final[int] = 0x01
@@ -344,11 +377,34 @@ class WindowStateMonitor:
             cls._window_state_listener_lock = threading.RLock()
             cls._window_state_lock = threading.RLock()
 
+            Monitor.register_notification_listener(cls._on_notification,
+                                                   name='MonGuStNtfy')
+            Monitor.register_abort_listener(cls.wake, name='MonGuStAbrt')
             # Weird problems with recursion if we make requests to the super
             util.runInThread(cls.monitor_gui_state, args=[],
                              name='MonGuSt',
                              delay=0.0)
 
+    @classmethod
+    def wake(cls) -> None:
+        """
+        Checks the state of the GUI now, rather than at the next poll. Called
+        when something has happened that is likely to have changed it.
+        """
+        if not cls._wake.is_set():
+            cls._wake_time = time.monotonic()
+            cls._wake.set()
+
+    @classmethod
+    def _on_notification(cls, **kwargs) -> None:
+        """
+        Kodi does not notify services of focus changes, but its
+        notifications (player, screensaver, input requested, library, etc.)
+        and the commands sent by this addon's keymaps usually come with, or
+        just before, a change to the GUI.
+        """
+        cls.wake()
+
     @classmethod
     def revoice_current_focus(cls):
         with cls._window_state_lock:
@@ -359,21 +415,60 @@ class WindowStateMonitor:
 
     @classmethod
     def monitor_gui_state(cls) -> None:
-        while not Monitor.wait_for_abort(timeout=cls.current_polling_interval):
+        """
+        Checks the state of the GUI whenever woken (see wake) and otherwise
+        polls it. Polling is fastest (Constants.GUI_POLL_MIN_SECONDS) just
+        after a change, since more usually follow, as when scrolling through
+        a list. Each poll that finds nothing changed slows polling by
+        GUI_POLL_BACKOFF, to at most GUI_POLL_MAX_SECONDS.
+        """
+        while True:
+            waited: float = cls.current_polling_interval
+            woken: bool = cls._wake.wait(timeout=waited)
+            cls._wake.clear()
+            if Monitor.is_abort_requested():
+                break
+            if woken:
+                cls.wakeups += 1
+                waited = time.monotonic() - cls._wake_time
+            else:
+                cls.polls += 1
             window_state: WinDialogState
             window_state = cls.check_win_dialog_state()
+            if window_state.focus_changed:
+                cls._detection_delays.append(waited)
+                if woken:
+                    cls.changes_on_wakeup += 1
+                else:
+                    cls.changes_on_poll += 1
             if (KodiPlayerMonitor.player_status == KodiPlayerState.PLAYING_VIDEO
                     and Constants.STOP_ON_PLAY):
                 cls.current_polling_interval = cls.IDLE_POLLING_INTERVAL
             elif window_state.focus_changed:
-                cls.current_polling_interval = cls.POLLING_INTERVAL
+                cls.current_polling_interval = Constants.GUI_POLL_MIN_SECONDS
             else:
-                cls.current_polling_interval = cls.NON_FOCUSED_POLLING_INTERVAL
+                cls.current_polling_interval = min(
+                        cls.current_polling_interval * Constants.GUI_POLL_BACKOFF,
+                        Constants.GUI_POLL_MAX_SECONDS)
 
             # notify_listeners does additional filtering
             if not window_state.is_bad_window:
                 cls._notify_listeners(window_state)
 
+    @classmethod
+    def get_stats(cls) -> Dict[str, int | float]:
+        """
+        :return: counts of wakeups and polls, the changes found by each and the
+                 median upper bound of the delay before a change was detected
+        """
+        delays: List[float] = list(cls._detection_delays)
+        return {'wakeups': cls.wakeups,
+                'polls': cls.polls,
+                'changes_on_wakeup': cls.changes_on_wakeup,
+                'changes_on_poll': cls.changes_on_poll,
+                'median_detection_ms': (statistics.median(delays) * 1000.0
+                                        if delays else 0.0)}
+
     @classmethod
     def check_win_dialog_state(cls) -> WinDialogState:
         """
@@ -808,7 +903,7 @@ class WindowStateMonitor:
                 cls.previous_window_state.window_id != window_id):
             return False
 
-        return xbmc.getCondVisibility(f'Control.IsVisible({control_id})')
+        return InfoSnapshot.get_cond_visibility(f'Control.IsVisible({control_id})')
         '''
         else:
             control: xbmcgui.Control
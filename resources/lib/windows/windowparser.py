@@ -3,10 +3,13 @@ from __future__ import annotations  # For union operator |
 
 import copy
 import os
+import re
 import sys
+import threading
 import xml.dom.minidom as minidom
 from _ast import List
 from pathlib import Path
+from typing import NamedTuple
 
 import xbmc
 import xbmcgui
@@ -16,6 +19,9 @@ from common.monitor import Monitor
 from common.phrases import PhraseList
 from gui.base_tags import WindowType
 from windows.ui_constants import UIConstants
+from windows.skin_model_store import SkinModelStore
+from windows.window_parser_cache import (ParsedWindow, WindowIndex,
+                                         WindowParserCache)
 from windows.window_state_monitor import WinDialog, WinDialogState, WindowStateMonitor
 
 USE_LXML: bool = False
@@ -36,6 +42,8 @@ MY_LOGGER = BasicLogger.get_logger(__name__)
 USE_NEW_FUNCTIONS: Final[bool] = True
 USE_OLD_FUNCTIONS: Final[bool] = False
 REVERSE_ATTRIB: Final[str] = '__REVERSE__'
+# Reference to a parameter of an include, as in: <label>$PARAM[label]</label>
+PARAM_PATTERN: Final[Pattern] = re.compile(r'\$PARAM\[([^\]]*)]')
 
 
 def currentWindowXMLFile() -> Path | None:
@@ -154,19 +162,6 @@ def nodeParents(dom, node) -> List[Any] | None:
         return None
 
 
-def new_get_ancestors(dom: ET.ElementTree, node: ET.Element) -> List[ET.Element]:
-    parents: List[ET.Element] = []
-    parent: ET.Element = node.find('..')
-    while parent is not None:
-        parents.append(parent)
-        next_parent = parent.find("..")
-        if MY_LOGGER.isEnabledFor(DEBUG_XV):
-            MY_LOGGER.debug_xv(f'parent: {parent}'
-                                              f' parent_new: {next_parent}')
-        parent = next_parent
-    return parents
-
-
 def lxml_get_ancestors(dom: lxml_ET.ElementTree,
                        node: lxml_ET.Element) -> List[lxml_ET.Element]:
     new_parents: List[lxml_ET.Element] = []
@@ -225,15 +220,54 @@ class WindowParser:
     Each Window is represented by an .xml document. Each .xml document
     is a tree of Elements (xml.etree.ElementTree). Each has its own
     top-level root Element.
+
+    Includes keeps class-level state, so windows are parsed one at a time:
+    parse_lock is held while a WindowParser or ParseWindow is built, whether
+    by the GUI worker or by SkinModelStore.precompile.
     """
     includes: ForwardRef('Includes') = None
-    forest_map: Dict[str, Dict[ET.Element, ET.Element]] = {}
+    parse_lock: threading.RLock = threading.RLock()
+
+    def __init__(self, xml_path: Path, is_addon: bool | None = None):
+        """
+        :param xml_path: Path of the window's .xml file
+        :param is_addon: True if the window belongs to an addon. None to
+                         check the current window
+        """
+        with WindowParser.parse_lock:
+            self._parse(xml_path, is_addon)
 
-    def __init__(self, xml_path: Path):
+    def _parse(self, xml_path: Path, is_addon: bool | None) -> None:
         clz = type(self)
         self.xml_path = xml_path
 
         self.current_window_path: Path = xml_path
+        self.currentControl = None
+        if WindowParserCache.skin_changed():
+            clz.includes = None
+            Includes.reset()
+        if is_addon is None:
+            is_addon = currentWindowIsAddon()
+        key: Tuple[str, float, str, str, bool] | None = None
+        store_key: str | None = None
+        if not (USE_OLD_FUNCTIONS or USE_LXML):
+            # The old and lxml functions need more than is cached
+            key = WindowParserCache.get_key(xml_path, is_addon)
+            SkinModelStore.note_visit(SkinModelStore.WINDOW, xml_path, is_addon)
+        if key is not None:
+            parsed: ParsedWindow | None = WindowParserCache.get(key)
+            if parsed is None:
+                store_key = SkinModelStore.get_key(xml_path, is_addon)
+                parsed = SkinModelStore.load(SkinModelStore.WINDOW, xml_path,
+                                             is_addon, store_key)
+                if parsed is not None:
+                    WindowParserCache.put(key, parsed)
+            if parsed is not None:
+                self.et_includes_xml: ET.ElementTree = parsed.tree
+                self.et_root: ET.Element = parsed.root
+                self.index: WindowIndex = parsed.index
+                return
+
         if USE_OLD_FUNCTIONS:
             self.xml = minidom.parse(str(xml_path))
         if USE_LXML:
@@ -242,17 +276,21 @@ class WindowParser:
         self.et_includes_xml: ET.ElementTree = ET.parse(xml_path)
         self.et_root: ET.Element = self.et_includes_xml.getroot()
         #  MY_LOGGER.debug(f'window_type: {dump_subtree(self.et_root)}')
-        self.build_reverse_tree_map(self.et_root, xml_path)
 
         if MY_LOGGER.isEnabledFor(DEBUG_V):
             MY_LOGGER.debug_v(f'xml: {xml_path}')
-        self.currentControl = None
         if clz.includes is None:
             clz.includes = Includes()
 
-        MY_LOGGER.debug(f'{xml_path} isAddon: {currentWindowIsAddon()}')
-        if not currentWindowIsAddon():
+        MY_LOGGER.debug(f'{xml_path} isAddon: {is_addon}')
+        if not is_addon:
             self.processIncludes()
+        self.index: WindowIndex = WindowIndex(self.et_root)
+        if key is not None:
+            parsed = ParsedWindow(self.et_includes_xml, self.et_root, self.index)
+            WindowParserCache.put(key, parsed)
+            SkinModelStore.save(SkinModelStore.WINDOW, xml_path, is_addon,
+                                store_key, parsed)
 
     def get_xml_root(self) -> ET.Element:
         return self.et_root
@@ -300,218 +338,25 @@ class WindowParser:
         # Get root element of current xml file
         return self.et_root
 
-    def build_reverse_tree_map(self, root: ET.Element, xml_file_path: Path):
-        """
-        Creates an ancestor map of elements for a given xml source file.
-        Used to quickly find the parents of any node. Note that
-        the map is created for tine initial xml with include files not yet
-        processed. It may mean that it is useless to persist.
+    def get_parent(self, child: ET.Element) -> ET.Element | None:
+        return self.index.get_parent(child)
 
-        :param root:
-        :param xml_file_path:
-        :return:
+    def get_ancestors(self, child: ET.Element) -> List[ET.Element]:
         """
-        clz = type(self)
-        if clz.forest_map.get(str(xml_file_path)) is not None:
-            return
-
-        reverse_tree_map: Dict[ET.Element, ET.Element]
-        reverse_tree_map = {c: p for p in root.iter() for c in p}
-        clz.forest_map[str(xml_file_path)] = reverse_tree_map
-
-    @classmethod
-    def get_parent(cls, tree_name: str, child: ET.Element) -> ET.Element | None:
-        reverse_tree_map: Dict[ET.Element, ET.Element]
-        reverse_tree_map = cls.forest_map.get(tree_name)
-        if reverse_tree_map is None:
-            return None
-        return reverse_tree_map.get(child)
-
-    @classmethod
-    def get_ancestors(cls, tree_name: str, child: ET.Element) -> List[ET.Element]:
-        reverse_tree_map: Dict[ET.Element, ET.Element]
-        reverse_tree_map = cls.forest_map.get(tree_name)
-        if reverse_tree_map is None:
-            return None
-        ancestors: List[ET.Element] = []
-        for ancestor in reverse_tree_map.get(child):
-            if ancestor is None:
-                return ancestors
-            ancestors.append(ancestor)
-        return ancestors
+        :return: ancestors of child in the include-expanded window, nearest
+                 first
+        """
+        return self.index.get_ancestors(child)
 
     def processIncludes(self):
-        type(self)
-        dummy_root: ET.Element = ET.Element(f'dummy_root')
-        dummy_root.append(self.et_root)
-        result_dummy_root: ET.Element = self.expand_includes(dummy_root)
-        result: ET.Element = result_dummy_root.find('./*')
-        if MY_LOGGER.isEnabledFor(DEBUG_V):
-            MY_LOGGER.debug_v(f'expanded result: {dump_subtree(result)}')
-        self.et_root = result
-
-    def expand_includes(self, parent: ET.Element) -> ET.Element:
-        Monitor.exception_on_abort()
+        """
+        Replaces et_root with the window with its includes expanded. See
+        Includes.expand
+        """
         clz = type(self)
-        result_dummy_root: ET.Element = ET.Element('dummy_root')
-        try:
-            result: ET.Element = result_dummy_root
-            for child in parent.findall('./*'):
-                if child.tag in IGNORED_TAGS:
-                    continue
-                if child.tag == 'include':
-                    if child.attrib.get('file') is not None:
-                        include_file_name: str = child.attrib.get('file')
-                        included_file_path: Path = get_xbmc_skin_path(include_file_name)
-                        if MY_LOGGER.isEnabledFor(DEBUG_V):
-                            MY_LOGGER.debug_v(f'Ignoring Include file import:'
-                                              f' {included_file_path}')
-                        # included_xml: ET = ET.parse(str(included_file_path))
-                        # root = included_xml.getroot()
-                        # new_dest: ET.Element = ET.Element('dummy_root')
-                        # new_dest_tree: ET.ElementTree = ET.ElementTree(new_dest)
-                        # self.parse_includes_tree(root, new_dest)
-                        # Nothing to put in new ElementTree. All includes were
-                        # put into parse_includes_tree by call.
-                        continue
-                    else:
-                        # If node is <include name=include_name>, then parse the
-                        # include definition, then place in map.
-
-                        include_name: str = child.attrib.get('name')
-                        if include_name is not None:
-                            if MY_LOGGER.isEnabledFor(DEBUG_V):
-                                MY_LOGGER.debug_v(f'Ignoring Include file '
-                                                  f'definition: {include_name}')
-                            # new_parent: ET.Element = child
-                            # include_root: ET.Element = ET.Element('dummy_root')
-                            # include_tree: ET.ElementTree = ET.ElementTree(include_root)
-                            # self.parse_includes_tree(new_parent, include_root)
-
-                            # Add this include definition into a dictionary
-                            # for quick access
-                            # if include_name in clz._new_includes_map.keys():
-                            #     MY_LOGGER.debug_v(
-                            #         f'ERROR entry already in new map: {include_name}')
-                            # else:
-                            #     text: str = dump_subtree(new_parent)
-                            #     MY_LOGGER.debug_v(f'ORIG: {text}')
-                            #     text: str = dump_subtree(include_root)
-                            #     MY_LOGGER.debug_v(f'COMPLETE: {text}')
-                            #     include_child: ET.Element = include_root.find('.*')
-                            #     if include_child is not None:
-                            #         clz._new_includes_map[include_name] = include_child
-                            #     else:
-                            #         MY_LOGGER.debug_v(f'Include: {
-                            #         include_name} omitted due to empty')
-                            continue
-                    if child.attrib.get('content') is not None or child.text is not None:
-                        include_name: str = child.attrib.get('content')
-                        if include_name is None:
-                            include_name = child.text
-                        include_root: ET.Element = clz.includes.get_include(include_name)
-                        if include_root is None:
-                            if MY_LOGGER.isEnabledFor(DEBUG):
-                                MY_LOGGER.debug(f'Could not find definition '
-                                                f'for include: {include_name}')
-                        else:
-                            if MY_LOGGER.isEnabledFor(DEBUG_V):
-                                MY_LOGGER.debug_v(f'found definition for '
-                                                  f'include: {include_name}')
-                                MY_LOGGER.debug_v(dump_subtree(include_root))
-                            expanded_dummy: ET.Element
-                            expanded_dummy = self.expand_includes(include_root)
-                            if MY_LOGGER.isEnabledFor(DEBUG_V):
-                                MY_LOGGER.debug_v(f'Expanded includes: '
-                                                  f'{include_name} '
-                                                  f'{dump_subtree(expanded_dummy)}')
-                            result.extend(expanded_dummy.findall(''))
-                        x = result.findall('.//include')
-                        if x is not None and len(x) > 0:
-                            if MY_LOGGER.isEnabledFor(DEBUG_V):
-                                MY_LOGGER.debug_v(f'include FOUND in result')
-                                MY_LOGGER.debug_v(f'{dump_subtree(include_root)}')
-                        continue
-                    if MY_LOGGER.isEnabledFor(DEBUG):
-                        MY_LOGGER.debug(
-                            f'Unexpected include element without "file" or "name".')
-                    continue
-                # Probably don't need to do this. Kodi probably expands this in any
-                # expression that we send it for evaluation.
-                '''
-                if child.tag == 'constant':
-                    if child.attrib.get('name'):
-                        constant_name: str = child.attrib.get('name')
-                        value: Any = child.text
-                        if constant_name in clz.constant_definitions.keys():
-                            MY_LOGGER.debug_v(f'ERROR: constant already defined: '
-                                              f'{constant_name} value: {value}')
-                        else:
-                            clz.constant_definitions[constant_name] = value
-                    continue
-
-                # Probably don't need to do this. Kodi probably expands this in any
-                # expression that we send it for evaluation.
-                if child.tag == 'expression':
-                    if child.attrib.get('name'):
-                        expression_name: str = child.attrib.get('name')
-                        value: str = child.text
-                        if expression_name in clz.expression_definitions.keys():
-                            MY_LOGGER.debug_v(f'ERROR: constant already defined: '
-                                              f'{expression_name} value: {value}')
-                        else:
-                            clz.expression_definitions[expression_name] = value
-                    continue
-                '''
-                # x = result_dummy_root.findall('.//include')
-                # if x is not None and len(x) > 0:
-                #     MY_LOGGER.debug_v(f'include FOUND in result')
-                dummy_root: ET.Element | None = self.expand_other(child)
-                # x = dummy_root.findall('.//include')
-                # if x is not None and len(x) > 0:
-                #     MY_LOGGER.debug_v(f'include FOUND in result')
-                result_dummy_root.extend(dummy_root.findall('./*'))
-
-        except StopIteration:
-            pass
-        except AbortException:
-            reraise(*sys.exc_info())
-        except Exception as e:
-            MY_LOGGER.exception('Boom!')
-
-        if MY_LOGGER.isEnabledFor(DEBUG_V):
-            MY_LOGGER.debug_v(
-                f'expand includes: {dump_subtree(result_dummy_root)}')
-        return result_dummy_root
-
-    def expand_other(self, child: ET.Element) -> ET.Element | None:
-        type(self)
-        # Copy this non-handled or excluded child node to the new tree
-        dummy_root: ET.Element = ET.Element('dummy_root')
-        try:
-            # Recurse to deal with grandchildren
-            # orig_text: str = dump_subtree(child)
-            new_child: ET.Element = ET.SubElement(dummy_root, child.tag, child.attrib)
-            new_child.text = child.text
-            if MY_LOGGER.isEnabledFor(DEBUG_V) and new_child.tag == 'include':
-                MY_LOGGER.debug_v(f'include FOUND in result')
-            result_dummy_root: ET.Element = self.expand_includes(child)
-            new_child.extend(result_dummy_root.findall('./*'))
-
-            # MY_LOGGER.debug_v(f'orig: {orig_text}')
-            ''
-            # text = dump_subtree(dest_node)
-            # MY_LOGGER.debug_v(f'changed: {text}')
-        except AbortException:
-            reraise(*sys.exc_info())
-        except Exception as e:
-            MY_LOGGER.exception('Boom!')
+        self.et_root = clz.includes.expand(self.et_root)
         if MY_LOGGER.isEnabledFor(DEBUG_V):
-            MY_LOGGER.debug_v(f'expand_other: {dump_subtree(dummy_root)}')
-            x = dummy_root.findall('.//include')
-            if x is not None and len(x) > 0:
-                MY_LOGGER.debug_v(f'include FOUND in result')
-        return dummy_root
+            MY_LOGGER.debug_v(f'expanded result: {dump_subtree(self.et_root)}')
 
     def old_processIncludes(self):
         """
@@ -793,7 +638,8 @@ class WindowParser:
         # If the window/control is not reachable from Includes.xml, then
         # variables are not likely known to this module
 
-        text = UIConstants.VAR_RE.sub(self.variableReplace, text)
+        with WindowParser.parse_lock:  # Variables are held by Includes
+            text = UIConstants.VAR_RE.sub(self.variableReplace, text)
         text = UIConstants.LOCALIZE_RE.sub(self.localizeReplacer, text)
         text = UIConstants.ADDON_RE.sub(self.addonReplacer, text)
         text = extractInfos(text, self.currentControl)
@@ -824,9 +670,7 @@ class WindowParser:
 
     def new_getControl(self, control_id) -> ET.Element:
         Monitor.exception_on_abort()
-        new_control: ET.Element = self.et_includes_xml.find(
-            f".//control[@id='{control_id}']")
-        return new_control
+        return self.index.get_control(control_id)
 
     def lxml_getControl(self, control_id) -> lxml_ET.Element:
         new_control: lxml_ET.Element = self.lxml_includes_xml.find(
@@ -984,19 +828,11 @@ class WindowParser:
             if newclist is None:
                 return None
             new_lts: List[Any] = []
-            []
             new_fl = newclist.find('focusedlayout')
             if new_fl is None:
                 return None
-            new_lt = new_fl.findall(".//control[@type='label']")
-            if new_lt is not None:
-                new_lts.extend(new_lt)
-            new_lt = new_fl.findall(".//control[@type='fadelabel']")
-            if new_lt is not None:
-                new_lts.extend(new_lt)
-            new_lt = new_fl.findall(".//control[@type='textbox']")
-            if new_lt is not None:
-                new_lts.extend(new_lt)
+            for pat in ('label', 'fadelabel', 'textbox'):
+                new_lts.extend(self.index.get_descendants(new_fl, (pat,)))
             new_texts: List[str] = []
             for new_l in new_lts:
                 if not self.new_controlIsVisibleGlobally(new_l):
@@ -1023,33 +859,27 @@ class WindowParser:
             if fl is None:
                 return None
 
-            parents: List[ET.Element] = []
             texts: Dict[str, str] = {}
             for pat in ('label',
                         'fadelabel',
                         'textbox'):
-
-                parent_pat: str = f".//control[@type='{pat}']/.."
-                some_parents: List[ET.Element] = fl.findall(parent_pat)
                 if MY_LOGGER.isEnabledFor(DEBUG_V):
                     MY_LOGGER.debug_v(f'control_id: {control_id} '
                                       f'xml: {self.current_window_path} '
-                                      f'parent_pat: {parent_pat}')
-                if some_parents is None:
-                    continue
-
-                parents.extend(some_parents)
-                child_pat = f"./control[@type='{pat}']"
-                for parent in some_parents:
+                                      f'type: {pat}')
+                # Group the controls by parent, parents in order of their
+                # first matching child
+                children_by_parent: Dict[ET.Element, List[ET.Element]] = {}
+                for child in self.index.get_descendants(fl, (pat,)):
+                    children_by_parent.setdefault(self.get_parent(child),
+                                                  []).append(child)
+
+                for parent, some_children in children_by_parent.items():
                     parent: ET.Element
                     if MY_LOGGER.isEnabledFor(DEBUG_V):
                         MY_LOGGER.debug_v(
-                            f'control_id: {control_id} child_pat: {child_pat} '
+                            f'control_id: {control_id} type: {pat} '
                             f'parent: {parent.tag}')
-                    some_children = parent.findall(child_pat)
-                    some_children: List[ET.Element] | None
-                    if some_children is None:
-                        continue
                     for child in some_children:
                         child: ET.Element
                         # <label>$INFO[ListItem.Label2]</label>
@@ -1121,10 +951,12 @@ class WindowParser:
 
     def new_getWindowTexts(self) -> List[str]:
         Monitor.exception_on_abort()
-        query: str = ".//control[@type='label' or @type='fadelabel' or " \
-                     "@type='textbox' or @type='slider']"
-        # We need the parent nodes that match they query
-        parents: List[ET.Element] = self.et_includes_xml.findall(query + "/..")
+        control_types: Tuple[str, ...] = ('label', 'fadelabel', 'textbox',
+                                          'slider')
+        # We need the parent nodes of the matching controls
+        parents: Dict[ET.Element, None] = {}  # Acts as an ordered set
+        for control in self.index.get_descendants(self.et_root, control_types):
+            parents[self.get_parent(control)] = None
         new_texts: List[str] = []
         parent: ET.Element
         MY_LOGGER.debug(f'In getWindowTexts')
@@ -1133,8 +965,9 @@ class WindowParser:
             if not self.new_controlIsVisible(parent):
                 MY_LOGGER.debug(f'file: {self.xml_path} Skipping Parent: {parent.tag}')
                 continue
-            # Now query to find the children that match the query
-            children: List[ET.Element] = parent.findall(query)
+            # Now find the children that match
+            children: List[ET.Element]
+            children = self.index.get_descendants(parent, control_types)
             for child in children:
                 MY_LOGGER.debug(f'child: {child.tag} attrib: {child.attrib} '
                                   f'text: {child.text}')
@@ -1155,7 +988,7 @@ class WindowParser:
                     label_id = win.getProperty('SliderLabel')
                     new_text = xbmc.getInfoLabel(f'Control.GetLabel({label_id})')
                     if new_text and new_text not in new_texts:
-                        new_texts.append(f'{new_text}. You fucker')
+                        new_texts.append(new_text)
                     MY_LOGGER.debug(f'SliderLabel found. Added text: {new_texts}')
                 else:
                     new_text = self.new_getLabelText(child)
@@ -1225,7 +1058,7 @@ class WindowParser:
         new_x: int
         new_y: int
         new_x, new_y = self.controlPosition(control)
-        for p, new_parent in new_get_ancestors(self.et_includes_xml, control):
+        for new_parent in self.get_ancestors(control):
             if new_parent.get('type') == 'group':
                 new_parent_x, new_parent_y = self.controlPosition(new_parent)
                 new_x += new_parent_x
@@ -1304,7 +1137,7 @@ class WindowParser:
 
     def new_controlIsVisibleGlobally(self, parent: ET.Element,
                                      control: ET.Element) -> bool:
-        for new_parent in new_get_ancestors(self.et_includes_xml, control):
+        for new_parent in self.get_ancestors(control):
             if not self.new_controlIsVisible(new_parent):
                 return False
         return self.new_controlIsVisible(control)
@@ -1349,6 +1182,22 @@ class WindowParser:
             return True
 
 
+class ExpandedInclude(NamedTuple):
+    """
+    The contents of an include definition, with the includes that it
+    references expanded. Shared by every use of the include, so must never be
+    modified.
+    """
+    # Contents of the definition
+    elements: List[ET.Element]
+    # param name -> default value
+    defaults: Dict[str, str]
+    # Elements of the contents that are copied on each use: controls,
+    # elements that reference params and the ancestors of both. Everything
+    # else is shared by every use
+    copied: Set[ET.Element]
+
+
 class Includes:
     _logger: BasicLogger = None
     _old_includes_files_loaded: bool = False
@@ -1357,6 +1206,8 @@ class Includes:
     _old_includes_map = {}
     _new_includes_map: Dict[str, ET.Element] = {}
     _lxml_includes_map: Dict[str, lxml_ET.Element] = {}
+    # include name -> its expansion. Built on first use
+    _expanded_includes: Dict[str, ExpandedInclude] = {}
     constant_definitions: Dict[str, Any] = {}
     expression_definitions: Dict[str, str] = {}
 
@@ -1374,6 +1225,237 @@ class Includes:
         self.et_root: ET.Element = self.et_includes_xml.getroot()
         self.load_includes_files()
 
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Forgets every include definition, so that they are loaded from the
+        current skin on next use.
+        """
+        cls._old_includes_files_loaded = False
+        cls._new_includes_files_loaded = False
+        cls._lxml_includes_files_loaded = False
+        cls._old_includes_map = {}
+        cls._new_includes_map = {}
+        cls._lxml_includes_map = {}
+        cls._expanded_includes = {}
+        cls.constant_definitions = {}
+        cls.expression_definitions = {}
+
+    def expand(self, root: ET.Element) -> ET.Element:
+        """
+        Expands the includes referenced by a window: each reference is
+        replaced by the contents of the include, with its params substituted.
+        Elements in IGNORED_TAGS are dropped.
+
+        Nothing is deep copied. Only the elements that differ from the
+        window or from an include's contents are created. Every other subtree
+        (the bulk of most includes) is shared with the window, the include
+        definitions and other windows, so the result must never be modified.
+        Controls are always created, so that each has a single parent.
+
+        :param root: Root of a window's .xml. It is not modified
+        :return: Root of the expanded window
+        """
+        Monitor.exception_on_abort()
+        changed: Set[ET.Element] = self.get_marked(root, self.is_changed)
+        if root not in changed:
+            return root
+        result: ET.Element = ET.Element(root.tag, root.attrib)
+        result.text = root.text
+        self.expand_children(root, result, changed, ())
+        return result
+
+    def expand_children(self, parent: ET.Element, dest: ET.Element,
+                        changed: Set[ET.Element],
+                        expanding: Tuple[str, ...]) -> None:
+        """
+        Appends the expanded children of parent to dest.
+
+        :param parent: Element whose children are expanded
+        :param dest: Element to append to
+        :param changed: Elements below parent that are includes, in
+                        IGNORED_TAGS, or have such a descendant. All others
+                        are appended as is
+        :param expanding: Names of the includes being expanded, to stop an
+                          include from including itself
+        """
+        for child in parent:
+            if child not in changed:
+                dest.append(child)
+                continue
+            if child.tag in IGNORED_TAGS:
+                continue
+            if child.tag == 'include':
+                self.append_include(child, dest, expanding)
+                continue
+            new_child: ET.Element = ET.SubElement(dest, child.tag, child.attrib)
+            new_child.text = child.text
+            self.expand_children(child, new_child, changed, expanding)
+
+    def append_include(self, reference: ET.Element, dest: ET.Element,
+                       expanding: Tuple[str, ...]) -> None:
+        """
+        Appends the contents of a referenced include to dest. Include
+        definitions and imports of include files are ignored; they have
+        already been loaded from Includes.xml.
+
+        :param reference: <include>name</include> or
+                          <include content="name"> with optional <param>s
+        :param dest: Element to append to
+        :param expanding: See expand_children
+        """
+        if (reference.attrib.get('file') is not None
+                or reference.attrib.get('name') is not None):
+            if MY_LOGGER.isEnabledFor(DEBUG_V):
+                MY_LOGGER.debug_v(f'Ignoring Include file import or definition: '
+                                  f'{reference.attrib}')
+            return
+        include_name: str | None = reference.attrib.get('content')
+        if include_name is None and reference.text is not None:
+            include_name = reference.text.strip()
+        if not include_name:
+            if MY_LOGGER.isEnabledFor(DEBUG):
+                MY_LOGGER.debug(
+                        f'Unexpected include element without "file" or "name".')
+            return
+        if include_name in expanding:
+            MY_LOGGER.info(f'Include {include_name} includes itself')
+            return
+        expanded: ExpandedInclude | None
+        expanded = self.get_expanded_include(include_name, expanding)
+        if expanded is None:
+            if MY_LOGGER.isEnabledFor(DEBUG):
+                MY_LOGGER.debug(f'Could not find definition '
+                                f'for include: {include_name}')
+            return
+        params: Dict[str, str] = expanded.defaults
+        reference_params: List[ET.Element] = reference.findall('param')
+        if reference_params:
+            params = dict(params)
+            for param in reference_params:
+                params[param.attrib.get('name')] = param.attrib.get('value',
+                                                                     param.text) or ''
+        for element in expanded.elements:
+            dest.append(self.instantiate(element, expanded.copied, params))
+
+    def get_expanded_include(self, name: str,
+                             expanding: Tuple[str, ...] = ()
+                             ) -> ExpandedInclude | None:
+        """
+        Returns a named include with the includes that it references
+        expanded. Expanded once, on first use, and shared from then on.
+
+        :param name: name of include to get
+        :param expanding: See expand_children
+        :return: The include, or None if it is not defined
+        """
+        clz = type(self)
+        expanded: ExpandedInclude | None = clz._expanded_includes.get(name)
+        if expanded is not None:
+            return expanded
+        self.load_includes_files()
+        definition: ET.Element | None = clz._new_includes_map.get(name)
+        if definition is None:
+            return None
+
+        # <param>s declare the defaults of params. When they are given, the
+        # contents are in <definition>
+        defaults: Dict[str, str] = {}
+        contents: ET.Element = definition
+        for child in definition:
+            if child.tag == 'param':
+                defaults[child.attrib.get('name')] = child.attrib.get('default',
+                                                                      child.text) or ''
+            elif child.tag == 'definition':
+                contents = child
+        expanded_root: ET.Element = ET.Element('dummy_root')
+        self.expand_children(contents,
+                             expanded_root,
+                             self.get_marked(contents, self.is_changed),
+                             expanding + (name,))
+        elements: List[ET.Element] = [element for element in expanded_root
+                                      if element.tag != 'param']
+        copied: Set[ET.Element] = set()
+        for element in elements:
+            copied.update(self.get_marked(element, self.is_copied))
+        expanded = ExpandedInclude(elements, defaults, copied)
+        clz._expanded_includes[name] = expanded
+        if MY_LOGGER.isEnabledFor(DEBUG_V):
+            MY_LOGGER.debug_v(f'Include {name} expands to:')
+            MY_LOGGER.debug_v(f'{dump_subtree(expanded_root)}')
+        return expanded
+
+    def instantiate(self, element: ET.Element, copied: Set[ET.Element],
+                    params: Dict[str, str]) -> ET.Element:
+        """
+        Returns an element of an ExpandedInclude for one use of the include.
+
+        :param element: Element of ExpandedInclude.elements
+        :param copied: ExpandedInclude.copied
+        :param params: param name -> value for this use
+        :return: element itself, if it is not in copied. Otherwise a copy of
+                 element, with params substituted, and its children
+                 instantiated
+        """
+        if element not in copied:
+            return element
+        new_element: ET.Element = ET.Element(
+                element.tag, {name: self.substitute(value, params)
+                              for name, value in element.attrib.items()})
+        new_element.text = self.substitute(element.text, params)
+        for child in element:
+            new_element.append(self.instantiate(child, copied, params))
+        return new_element
+
+    @staticmethod
+    def substitute(text: str | None, params: Dict[str, str]) -> str | None:
+        """
+        Replaces each $PARAM[name] in text by its value. Params without a
+        value are replaced by '', as Kodi does.
+        """
+        if text is None or '$PARAM[' not in text:
+            return text
+        return PARAM_PATTERN.sub(lambda match: params.get(match.group(1), ''),
+                                 text)
+
+    @staticmethod
+    def is_changed(element: ET.Element) -> bool:
+        return element.tag == 'include' or element.tag in IGNORED_TAGS
+
+    @staticmethod
+    def is_copied(element: ET.Element) -> bool:
+        if element.tag == 'control':
+            return True
+        if element.text is not None and '$PARAM[' in element.text:
+            return True
+        for value in element.attrib.values():
+            if '$PARAM[' in value:
+                return True
+        return False
+
+    @staticmethod
+    def get_marked(root: ET.Element,
+                   is_marked: Callable[[ET.Element], bool]) -> Set[ET.Element]:
+        """
+        :param root: Element to search
+        :param is_marked: Tests a single element
+        :return: Elements at or below root that are marked or have a marked
+                 descendant
+        """
+        marked: Set[ET.Element] = set()
+
+        def visit(element: ET.Element) -> bool:
+            found: bool = is_marked(element)
+            for child in element:
+                if visit(child):
+                    found = True
+            if found:
+                marked.add(element)
+            return found
+
+        visit(root)
+        return marked
+
     def get_include(self, name: str) -> ET.Element | None:
         """
         Returns a copy of a named Include from a cache of all named Includes